@@ -0,0 +1,59 @@
+"""
+Compares the throughput of BatchSearch against running each query through
+field_and_group_search and get_related in a loop, on data/*.json scaled up.
+
+Usage: python3 benchmarks/batch_benchmark.py [scale] [queries]
+"""
+import io
+import sys
+import json
+import time
+import random
+
+from common import scaled_search
+from batch import BatchSearch, SUMMARY_FIELDS, parse_query
+from relations import RELATIONS
+
+
+def make_queries(search, count):
+    # ids and emails, drawn with repeats the way scripted lookups are
+    generator = random.Random(0)
+    pool = [json.dumps({"query": user["email"], "field": "email", "group": "users"}) for user in search.users[:2000] if "email" in user]
+    pool += [json.dumps({"query": ticket["_id"], "field": "_id", "group": "tickets"}) for ticket in search.tickets[:2000]]
+    pool += [str(org["_id"]) for org in search.orgs[:500]]
+    return [generator.choice(pool) for _ in range(count)]
+
+
+def run_loop(search, lines, stream):
+    for line in lines:
+        query = parse_query(line)
+        results = []
+        for entry in search.field_and_group_search(query) or []:
+            record = dict(entry.data)
+            for name, records in search.get_related(entry.data, entry.group).items():
+                fields = SUMMARY_FIELDS[RELATIONS[entry.group][name][1]]
+                record[name] = [{field: related.get(field) for field in fields} for related in records]
+            results.append({"group": entry.group, "field": entry.field, "record": record})
+        result = {"query": query.string, "field": query.field, "group": query.group, "count": len(results), "results": results}
+        stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    search = scaled_search(scale)
+    search.build_search()
+    lines = make_queries(search, count)
+
+    for name, run in [
+        ("loop", lambda stream: run_loop(search, lines, stream)),
+        ("batch", lambda stream: BatchSearch(search).write(lines, stream)),
+    ]:
+        start = time.perf_counter()
+        run(io.StringIO())
+        elapsed = time.perf_counter() - start
+        print(f"{name:>5}: {count / elapsed:,.0f} queries/s ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
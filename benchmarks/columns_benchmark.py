@@ -0,0 +1,80 @@
+"""
+Measures the memory taken by generated records held as a list of dicts per
+group and by a ColumnTable, and times counting the values of single ticket
+fields over each.
+
+Usage: python3 benchmarks/columns_benchmark.py [--users N] [--orgs N] [--tickets N]
+"""
+import time
+import tempfile
+import argparse
+import tracemalloc
+from collections import Counter
+
+from generate import generate
+from loader import iter_records
+from columns import ColumnTable
+
+GROUPS = ("users", "tickets", "orgs")
+FIELDS = ["status", "priority", "has_incidents", "organization_id", "tags"]
+RUNS = 5
+
+
+def traced(make):
+    # the memory still held by what make returns
+    tracemalloc.start()
+    result = make()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, memory
+
+
+def load_dicts(paths):
+    return {group: list(iter_records(path)) for group, path in zip(GROUPS, paths)}
+
+
+def load_columns(paths):
+    table = ColumnTable()
+    for group, path in zip(GROUPS, paths):
+        for record in iter_records(path):
+            table.add(record, group)
+    return table
+
+
+def scan(records, field):
+    counts = Counter()
+    for record in records:
+        value = record.get(field)
+        if value is not None:
+            counts.update(value if type(value) is list else [value])
+    return counts
+
+
+def timed(function):
+    begin = time.perf_counter()
+    for _ in range(RUNS):
+        result = function()
+    return (time.perf_counter() - begin) / RUNS * 1e3, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare records held as dicts and by column")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--orgs", type=int, default=1000)
+    parser.add_argument("--tickets", type=int, default=100000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        paths = generate(directory, args.users, args.orgs, args.tickets)
+        groups, dict_memory = traced(lambda: load_dicts(paths))
+        table, column_memory = traced(lambda: load_columns(paths))
+    records = sum(len(records) for records in groups.values())
+    print(f"{records} records: dicts {dict_memory / 2 ** 20:.1f} MiB, columns {column_memory / 2 ** 20:.1f} MiB")
+    for field in FIELDS:
+        scanned, expected = timed(lambda: scan(groups["tickets"], field))
+        counted, counts = timed(lambda: table.counts("tickets", field))
+        assert counts == expected
+        print(f"tickets {field}: scan {scanned:.1f}ms, column {counted:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
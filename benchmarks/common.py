@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../zensearch")))
+
+DATA_FILES = {
+    "users": "data/users.json",
+    "tickets": "data/tickets.json",
+    "orgs": "data/organizations.json",
+}
+UNIQUE_FIELDS = ("_id", "url", "external_id")
+
+
+def scaled_groups(scale):
+    # copies every record of data/*.json scale times, giving the identifying
+    # fields of each copy distinct values
+    groups = {}
+    for group, filepath in DATA_FILES.items():
+        with open(filepath, "r") as f:
+            records = json.load(f)
+        groups[group] = []
+        for copy in range(scale):
+            for record in records:
+                record = dict(record)
+                for field in UNIQUE_FIELDS:
+                    if field in record and copy:
+                        record[field] = f"{record[field]}-{copy}"
+                groups[group].append(record)
+    return groups
+
+
+def scaled_search(scale):
+    # a Search over the scaled records, not yet built
+    from search import Search
+
+    search = Search(*DATA_FILES.values())
+    search.groups.update(scaled_groups(scale))
+    search.users, search.tickets, search.orgs = (search.groups[group] for group in DATA_FILES)
+    return search
@@ -0,0 +1,59 @@
+"""
+Measures the latency of fuzzy trie lookups with one and two typos,
+on data/*.json scaled up.
+
+Usage: python3 benchmarks/fuzzy_benchmark.py [scale]
+"""
+import sys
+import time
+import random
+
+from common import scaled_groups
+from trie import Trie
+
+
+class Value:
+    def __init__(self, string):
+        self.string = string
+
+
+def typo(string, generator):
+    position = generator.randrange(len(string))
+    return string[:position] + generator.choice("abcdefghijklmnopqrstuvwxyz") + string[position + 1 :]
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    trie = Trie()
+    names = []
+    count = 0
+    for group, records in scaled_groups(scale).items():
+        for record in records:
+            for field, value in record.items():
+                values = value if type(value) is list else [value]
+                for item in values:
+                    trie.add(Value(str(item).lower()))
+                    count += 1
+            if "name" in record:
+                names.append(record["name"].lower())
+            if "email" in record:
+                names.append(record["email"].lower())
+
+    generator = random.Random(0)
+    queries = [typo(generator.choice(names), generator) for _ in range(200)]
+    print(f"{count} indexed values ({scale}x data/*.json)")
+    for max_distance in [1, 2]:
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            trie.fuzzy_retrieve(query, max_distance)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(
+            f"distance {max_distance}: p50 {timings[len(timings) // 2] * 1e3:.2f}ms"
+            f" p99 {timings[int(len(timings) * 0.99)] * 1e3:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
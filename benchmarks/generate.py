@@ -0,0 +1,201 @@
+"""
+Generates users, organizations and tickets with the schema of data/*.json
+and valid organization_id, submitter_id and assignee_id links, at any scale.
+Values are drawn from the vocabulary of data/*.json and records are written
+as they are made, so tens of millions of records never sit in memory.
+
+Usage: python3 benchmarks/generate.py directory [--users N] [--orgs N] [--tickets N] [--seed N] [--ndjson]
+"""
+import os
+import sys
+import json
+import uuid
+import random
+import argparse
+from datetime import datetime, timezone
+
+from common import DATA_FILES
+
+URL = "http://initech.zendesk.com/api/v2"
+OFFSETS = ("-10:00", "-11:00")
+START = datetime(2010, 1, 1, tzinfo=timezone.utc).timestamp()
+END = datetime(2017, 1, 1, tzinfo=timezone.utc).timestamp()
+# share of records missing each optional field, as in data/*.json
+OPTIONAL = {
+    "users": {"alias": 0.01, "verified": 0.03, "locale": 0.01, "timezone": 0.03, "email": 0.03, "organization_id": 0.04},
+    "tickets": {"type": 0.01, "description": 0.01, "assignee_id": 0.02, "organization_id": 0.02, "due_at": 0.03},
+    "orgs": {},
+}
+FILENAMES = {"users": "users", "tickets": "tickets", "orgs": "organizations"}
+
+
+class Vocabulary:
+    """
+    The values of each field of data/*.json, to draw generated values from.
+    """
+
+    def __init__(self):
+        self.values = {}
+        for group, filepath in DATA_FILES.items():
+            with open(filepath, "r") as f:
+                for record in json.load(f):
+                    for field, value in record.items():
+                        items = value if type(value) is list else [value]
+                        self.values.setdefault((group, field), set()).update(items)
+        self.values = {key: sorted(values, key=str) for key, values in self.values.items()}
+        self.first_names = sorted({name.split()[0] for name in self.values[("users", "name")]})
+        self.last_names = sorted({name.split()[-1] for name in self.values[("users", "name")]})
+        self.words = sorted(
+            {word.strip(".").lower() for text in self.values[("tickets", "description")] for word in text.split()}
+        )
+
+    def choice(self, rng, group, field):
+        return rng.choice(self.values[(group, field)])
+
+    def sample(self, rng, group, field, count=4):
+        return rng.sample(self.values[(group, field)], count)
+
+
+class Generator:
+    """
+    Makes records of each group. Ids are assigned in order, orgs from 101
+    and users from 1 as in data/*.json, and tickets link to existing ones.
+    """
+
+    def __init__(self, users, orgs, tickets, seed=0):
+        self.counts = {"users": users, "orgs": orgs, "tickets": tickets}
+        self.rng = random.Random(seed)
+        self.vocabulary = Vocabulary()
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def timestamp(self):
+        moment = datetime.fromtimestamp(self.rng.uniform(START, END), timezone.utc)
+        return moment.strftime("%Y-%m-%dT%H:%M:%S ") + self.rng.choice(OFFSETS)
+
+    def org_id(self):
+        return 101 + self.rng.randrange(self.counts["orgs"])
+
+    def user_id(self):
+        return 1 + self.rng.randrange(self.counts["users"])
+
+    def drop_optional(self, group, record):
+        for field, share in OPTIONAL[group].items():
+            if self.rng.random() < share:
+                del record[field]
+        return record
+
+    def org(self, index):
+        words = self.vocabulary
+        _id = 101 + index
+        name = words.choice(self.rng, "orgs", "name")
+        return {
+            "_id": _id,
+            "url": f"{URL}/organizations/{_id}.json",
+            "external_id": self.uuid(),
+            "name": name if index < len(words.values[("orgs", "name")]) else f"{name} {index}",
+            "domain_names": words.sample(self.rng, "orgs", "domain_names"),
+            "created_at": self.timestamp(),
+            "details": words.choice(self.rng, "orgs", "details"),
+            "shared_tickets": self.rng.random() < 0.5,
+            "tags": words.sample(self.rng, "orgs", "tags"),
+        }
+
+    def user(self, index):
+        words = self.vocabulary
+        _id = 1 + index
+        first, last = self.rng.choice(words.first_names), self.rng.choice(words.last_names)
+        record = {
+            "_id": _id,
+            "url": f"{URL}/users/{_id}.json",
+            "external_id": self.uuid(),
+            "name": f"{first} {last}",
+            "alias": f"{self.rng.choice(('Mr', 'Miss'))} {self.rng.choice(words.first_names)}",
+            "created_at": self.timestamp(),
+            "active": self.rng.random() < 0.5,
+            "verified": self.rng.random() < 0.5,
+            "shared": self.rng.random() < 0.5,
+            "locale": words.choice(self.rng, "users", "locale"),
+            "timezone": words.choice(self.rng, "users", "timezone"),
+            "last_login_at": self.timestamp(),
+            "email": f"{first}{last}{_id}@{words.choice(self.rng, 'orgs', 'domain_names')}".lower(),
+            "phone": f"{self.rng.randrange(10 ** 4):04}-{self.rng.randrange(10 ** 3):03}-{self.rng.randrange(10 ** 3):03}",
+            "signature": words.choice(self.rng, "users", "signature"),
+            "organization_id": self.org_id(),
+            "tags": words.sample(self.rng, "users", "tags"),
+            "suspended": self.rng.random() < 0.5,
+            "role": words.choice(self.rng, "users", "role"),
+        }
+        return self.drop_optional("users", record)
+
+    def ticket(self, index):
+        words = self.vocabulary
+        _id = self.uuid()
+        description = " ".join(self.rng.choices(words.words, k=self.rng.randrange(10, 30)))
+        record = {
+            "_id": _id,
+            "url": f"{URL}/tickets/{_id}.json",
+            "external_id": self.uuid(),
+            "created_at": self.timestamp(),
+            "type": words.choice(self.rng, "tickets", "type"),
+            "subject": words.choice(self.rng, "tickets", "subject"),
+            "description": description.capitalize() + ".",
+            "priority": words.choice(self.rng, "tickets", "priority"),
+            "status": words.choice(self.rng, "tickets", "status"),
+            "submitter_id": self.user_id(),
+            "assignee_id": self.user_id(),
+            "organization_id": self.org_id(),
+            "tags": words.sample(self.rng, "tickets", "tags"),
+            "has_incidents": self.rng.random() < 0.5,
+            "due_at": self.timestamp(),
+            "via": words.choice(self.rng, "tickets", "via"),
+        }
+        return self.drop_optional("tickets", record)
+
+    def records(self, group):
+        make = {"users": self.user, "orgs": self.org, "tickets": self.ticket}[group]
+        for index in range(self.counts[group]):
+            yield make(index)
+
+
+def write_records(filepath, records, ndjson=False):
+    # writes a JSON array, or newline delimited JSON, a record at a time
+    with open(filepath, "w") as f:
+        if ndjson:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
+        f.write("[")
+        for index, record in enumerate(records):
+            f.write(",\n" if index else "\n")
+            f.write(json.dumps(record, ensure_ascii=False))
+        f.write("\n]\n")
+
+
+def generate(directory, users, orgs, tickets, seed=0, ndjson=False):
+    # returns the users, tickets and organizations file paths in the order Search takes them
+    os.makedirs(directory, exist_ok=True)
+    generator = Generator(users, orgs, tickets, seed)
+    paths = {}
+    for group in ("orgs", "users", "tickets"):
+        paths[group] = os.path.join(directory, f"{FILENAMES[group]}.json")
+        write_records(paths[group], generator.records(group), ndjson)
+    return [paths["users"], paths["tickets"], paths["orgs"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Zendesk shaped users, organizations and tickets")
+    parser.add_argument("directory")
+    parser.add_argument("--users", type=int, default=75000)
+    parser.add_argument("--orgs", type=int, default=2500)
+    parser.add_argument("--tickets", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ndjson", action="store_true", help="write newline delimited JSON instead of arrays")
+    args = parser.parse_args()
+    for path in generate(args.directory, args.users, args.orgs, args.tickets, args.seed, args.ndjson):
+        print(path, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Times the first query on generated data, built up front by Search and on
+demand by LazySearch, with the records as generated and with extra fields
+added to every one of them.
+
+Usage: python3 benchmarks/lazy_benchmark.py [--users N] [--orgs N] [--tickets N] [--extra-fields N]
+"""
+import os
+import time
+import tempfile
+import argparse
+
+from generate import generate, write_records
+from loader import iter_records
+from search import Search
+from lazy import LazySearch
+from query import Query
+
+
+def widen(paths, directory, extra):
+    # copies of the files with extra fields of distinct values in every record
+    wide = []
+    for path in paths:
+        records = (
+            dict(record, **{f"extra_{field}": f"{record['_id']}-{field}" for field in range(extra)})
+            for record in iter_records(path)
+        )
+        wide.append(os.path.join(directory, "wide-" + os.path.basename(path)))
+        write_records(wide[-1], records)
+    return wide
+
+
+def first_query(make, query):
+    start = time.perf_counter()
+    search = make()
+    results = search.field_and_group_search(query)
+    return time.perf_counter() - start, len(results or [])
+
+
+def eager(paths):
+    search = Search(*paths, cache_size=0)
+    search.build_search()
+    return search
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the first query of eager and lazy searches")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--orgs", type=int, default=1000)
+    parser.add_argument("--tickets", type=int, default=60000)
+    parser.add_argument("--extra-fields", type=int, default=20)
+    args = parser.parse_args()
+    query = Query("pending", "status", "tickets")
+    with tempfile.TemporaryDirectory() as directory:
+        paths = generate(directory, args.users, args.orgs, args.tickets)
+        wide = widen(paths, directory, args.extra_fields)
+        for label, files in [("as generated", paths), (f"with {args.extra_fields} extra fields", wide)]:
+            eager_seconds, eager_count = first_query(lambda: eager(files), query)
+            lazy_seconds, lazy_count = first_query(lambda: LazySearch(*files, cache_size=0), query)
+            assert eager_count == lazy_count
+            print(f"{label}: first tickets status query, eager {eager_seconds:.2f}s, lazy {lazy_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Load tests the HTTP server of search.py --serve with concurrent keep-alive
+clients sending field/group and freeform queries drawn from data/*.json,
+reporting requests per second and p50/p95/p99/max latency.
+
+Starts a server over data/*.json unless given the address of a running one.
+
+Usage: python3 benchmarks/load_test.py [--address HOST:PORT] [--clients N] [--requests N] [--seed N]
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+from urllib.parse import urlencode
+
+from common import DATA_FILES
+from server import parse_address
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def sample_targets(count, generator):
+    # half scoped to a field and group, half freeform
+    records = []
+    for group, filepath in DATA_FILES.items():
+        with open(os.path.join(ROOT, filepath), "r") as f:
+            records.extend((group, record) for record in json.load(f))
+    targets = []
+    for index in range(count):
+        group, record = generator.choice(records)
+        field = generator.choice([field for field, value in record.items() if type(value) not in (list, bool)])
+        params = {"query": record[field], "limit": 10}
+        if index % 2 == 0:
+            params.update(field=field, group=group)
+        targets.append("/search?" + urlencode(params))
+    return targets
+
+
+async def get(reader, writer, target):
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: zensearch\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host, port, targets, timings, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    for target in targets:
+        begin = time.perf_counter()
+        if await get(reader, writer, target) != 200:
+            errors.append(target)
+        timings.append(time.perf_counter() - begin)
+    writer.close()
+
+
+async def load(host, port, targets, clients):
+    timings, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, targets[index::clients], timings, errors) for index in range(clients)))
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    percentile = lambda share: timings[min(len(timings) - 1, int(len(timings) * share))] * 1e3
+    return {
+        "clients": clients,
+        "requests": len(timings),
+        "errors": len(errors),
+        "requests_per_s": len(timings) / elapsed,
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": timings[-1] * 1e3,
+    }
+
+
+def start_server():
+    # binds a free port, then hands it to the server once it is released
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "zensearch/search.py", "--serve", f"127.0.0.1:{port}"], cwd=ROOT, stdout=subprocess.DEVNULL
+    )
+    for _ in range(600):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server, ("127.0.0.1", port)
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    sys.exit("the server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test search.py --serve")
+    parser.add_argument("--address", help="HOST:PORT of a running server")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    targets = sample_targets(args.requests, random.Random(args.seed))
+    server = None
+    if args.address:
+        host, port = parse_address(args.address)
+    else:
+        server, (host, port) = start_server()
+    try:
+        print(json.dumps(asyncio.run(load(host, port, targets, args.clients)), indent=2))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Measures the memory taken by the index built by Search.build_search, not
+counting the records themselves, on data/*.json scaled up.
+
+Usage: python3 benchmarks/memory_benchmark.py [scale]
+"""
+import sys
+import time
+import tracemalloc
+
+from common import scaled_search
+
+
+def count_values(search):
+    count = 0
+    for records in search.groups.values():
+        for record in records:
+            for value in record.values():
+                count += len(value) if type(value) is list else 1
+    return count
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    search = scaled_search(scale)
+    values = count_values(search)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    search.build_search()
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{values} indexed values ({scale}x data/*.json), build {elapsed:.2f}s")
+    print(f"index memory {memory / 2 ** 20:.1f} MiB, {memory / values * 1e6 / 2 ** 20:.1f} MiB per million values")
+
+
+if __name__ == "__main__":
+    main()
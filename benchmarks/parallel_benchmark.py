@@ -0,0 +1,34 @@
+"""
+Measures the index build time of Search.build_search against the number of
+worker processes, on data/*.json scaled up.
+
+Usage: python3 benchmarks/parallel_benchmark.py [scale] [max workers]
+"""
+import os
+import sys
+import time
+
+from common import scaled_search
+
+
+def build_time(scale, workers):
+    search = scaled_search(scale)
+    start = time.perf_counter()
+    search.build_search(workers=workers)
+    return time.perf_counter() - start
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    serial = build_time(scale, None)
+    print(f"{scale}x data/*.json on {os.cpu_count()} cpus")
+    print(f"   serial: {serial:.2f}s")
+    for workers in range(2, max(max_workers, 2) + 1):
+        elapsed = build_time(scale, workers)
+        print(f"{workers:>2} workers: {elapsed:.2f}s | speedup {serial / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Times filters of several fields on data/*.json copied scale times, run most
+selective clause first as planned, in the order written, and by scanning
+every ticket.
+
+Usage: python3 benchmarks/planner_benchmark.py [scale]
+"""
+import sys
+import time
+
+from common import scaled_search
+from planner import Planner, parse_filter
+from relations import normalise
+
+FILTERS = [
+    "priority=high AND status=pending AND tags=Ohio",
+    "via=web AND has_incidents=false AND type=task AND organization_id=101",
+    "(status=open OR status=hold) AND priority=urgent AND NOT via=chat",
+]
+RUNS = 10
+
+
+def scan(tickets, clause):
+    matched = 0
+    for ticket in tickets:
+        if clause_matches(ticket, clause):
+            matched += 1
+    return matched
+
+
+def clause_matches(record, clause):
+    name = type(clause).__name__
+    if name == "Term":
+        value = record.get(clause.field)
+        values = value if type(value) is list else [value]
+        return clause.field in record and clause.value in (normalise(item) for item in values)
+    if name == "Not":
+        return not clause_matches(record, clause.clause)
+    if name == "And":
+        return all(clause_matches(record, inner) for inner in clause.clauses)
+    return any(clause_matches(record, inner) for inner in clause.clauses)
+
+
+def timed(function):
+    begin = time.perf_counter()
+    for _ in range(RUNS):
+        result = function()
+    return (time.perf_counter() - begin) / RUNS * 1e3, result
+
+
+def run(planner, clause, planned):
+    step = planner.plan(clause)
+    if not planned:
+        # the clauses as written, largest or not
+        order = {id(inner): index for index, inner in enumerate(clause.clauses)}
+        step.steps.sort(key=lambda inner: order[id(inner.clause)])
+    return len(planner.run(step))
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    search = scaled_search(scale)
+    search.build_search()
+    planner = Planner(search, "tickets")
+    print(f"{len(search.tickets)} tickets")
+    for text in FILTERS:
+        clause = parse_filter(text)
+        planned, rows = timed(lambda: run(planner, clause, True))
+        written, written_rows = timed(lambda: run(planner, clause, False))
+        scanned, scanned_rows = timed(lambda: scan(search.tickets, clause))
+        assert rows == written_rows == scanned_rows
+        print(f"{text}\n  {rows} rows: planned {planned:.2f}ms, as written {written:.2f}ms, scan {scanned:.2f}ms")
+    print(search.explain(FILTERS[0], "tickets"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Measures the memory of worker processes forked from a built Search and from
+the same Search frozen into a memory mapped snapshot, on data/*.json scaled
+up. Each worker answers the same freeform searches, then reports its RSS,
+PSS and USS (pages of its own). The frozen search is opened from its snapshot
+in a new process, as a server started with --snapshot would be, rather than
+in one holding the freed pages of a built index. Linux only, as sizes are
+read from /proc.
+
+Usage: python3 benchmarks/prefork_benchmark.py [scale] [workers] [queries]
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import multiprocessing
+
+from common import scaled_search
+from prefork import prefork, memory_usage
+from query import Query
+from search import Search
+from snapshot import Snapshot
+from cache import QueryCache
+
+
+def sample_queries(search, count, generator):
+    records = [record for records in search.groups.values() for record in records]
+    queries = []
+    for _ in range(count):
+        record = generator.choice(records)
+        field = generator.choice([field for field, value in record.items() if type(value) not in (list, bool)])
+        queries.append(Query(record[field]))
+    return queries
+
+
+def measure(search, workers, queries):
+    # each worker writes its memory usage as a line of JSON to the pipe,
+    # short enough to be written atomically
+    read_end, write_end = os.pipe()
+
+    def work(worker):
+        os.close(read_end)
+        for query in queries:
+            for result in (search.freeform_search(query) or [])[:10]:
+                search.result_view(result)
+        os.write(write_end, (json.dumps(memory_usage()) + "\n").encode())
+
+    prefork(workers, work)
+    os.close(write_end)
+    with os.fdopen(read_end, "r") as f:
+        usages = [json.loads(line) for line in f]
+    parent = memory_usage()
+    return {
+        "parent_rss_mib": parent["rss_kib"] / 1024,
+        "parent_uss_mib": parent["uss_kib"] / 1024,
+        "worker_mean": {
+            name.replace("kib", "mib"): sum(usage[name] for usage in usages) / len(usages) / 1024 for name in usages[0]
+        },
+        # the parent's pages plus the pages each worker copied or allocated
+        "total_mib": (parent["uss_kib"] + sum(usage["uss_kib"] for usage in usages)) / 1024,
+    }
+
+
+def measure_frozen(path, workers, queries):
+    search = Search.from_snapshot(Snapshot(path), [])
+    search.cache = QueryCache(0)
+    return measure(search, workers, queries)
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    search = scaled_search(scale)
+    search.build_search()
+    # cached results are private to each worker, so the cache is left out
+    search.cache = QueryCache(0)
+    queries = sample_queries(search, count, random.Random(0))
+
+    report = {"scale": scale, "workers": workers, "queries": count}
+    report["built"] = measure(search, workers, queries)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "index.snapshot")
+        search.save_snapshot(path)
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            report["frozen"] = pool.apply(measure_frozen, (path, workers, queries))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures range lookups on the due_at index of millions of tickets, made by
+repeating the due dates of data/tickets.json with a one second offset per copy.
+
+Usage: python3 benchmarks/range_benchmark.py [millions of tickets]
+"""
+import sys
+import json
+import time
+import random
+from itertools import islice
+
+from common import DATA_FILES
+from range_index import RangeColumn, parse_value
+from records import pack
+
+DAY = 24 * 60 * 60
+
+
+def build_column(count):
+    with open(DATA_FILES["tickets"], "r") as f:
+        due = [parse_value(ticket["due_at"]) for ticket in json.load(f) if "due_at" in ticket]
+    keys = [key for _, key in due if key is not None]
+    column = RangeColumn(due[0][0])
+    for doc in range(count):
+        column.add(keys[doc % len(keys)] + doc // len(keys), pack(doc, 0))
+    column.sort()
+    return column
+
+
+def percentiles(timings):
+    timings.sort()
+    return timings[len(timings) // 2] * 1e3, timings[int(len(timings) * 0.99)] * 1e3
+
+
+def main():
+    count = int(float(sys.argv[1]) * 1e6) if len(sys.argv) > 1 else 10 ** 7
+    start = time.perf_counter()
+    column = build_column(count)
+    print(f"{count} tickets, index built and sorted in {time.perf_counter() - start:.2f}s")
+
+    generator = random.Random(0)
+    first, last = column.keys[0], column.keys[-1]
+    for days in [1, 30]:
+        counts, pages = [], []
+        for _ in range(200):
+            low = generator.uniform(first, last)
+            begin = time.perf_counter()
+            lower, upper = column.bounds(low, low + days * DAY)
+            counted = time.perf_counter()
+            list(islice(column.iter_slice(lower, upper), 100))
+            counts.append(counted - begin)
+            pages.append(time.perf_counter() - begin)
+        print(
+            f"{days:>2} day range: count p50 {percentiles(counts)[0]:.3f}ms p99 {percentiles(counts)[1]:.3f}ms"
+            f" | first 100 p50 {percentiles(pages)[0]:.3f}ms p99 {percentiles(pages)[1]:.3f}ms"
+        )
+
+    low = generator.uniform(first, last)
+    begin = time.perf_counter()
+    sum(1 for key in column.keys if low <= key < low + DAY)
+    print(f"full scan of the keys for comparison: {(time.perf_counter() - begin) * 1e3:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Compares the time taken to render and write results in each output format,
+for every record of data/*.json scaled up.
+
+Usage: python3 benchmarks/render_benchmark.py [scale]
+"""
+import io
+import sys
+import time
+
+from common import scaled_search
+from entry import Entry
+from render import RENDERERS
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    search = scaled_search(scale)
+    search.build_search()
+    results = [Entry(record, record["_id"], "_id", group) for group, records in search.groups.items() for record in records]
+    # related records are resolved once up front so only rendering is timed
+    for result in results:
+        search.get_related(result.data, result.group)
+
+    print(f"{len(results)} results ({scale}x data/*.json)")
+    for name in RENDERERS:
+        search.set_output(name, io.StringIO())
+        start = time.perf_counter()
+        search.output_results(results)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>6}: {elapsed:.2f}s | {len(results) / elapsed:,.0f} results/s")
+
+
+if __name__ == "__main__":
+    main()
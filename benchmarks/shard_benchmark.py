@@ -0,0 +1,87 @@
+"""
+Builds a ShardedSearch of generated data with each shard count and reports
+the build time, the memory of every shard process and of the coordinator,
+and the throughput and p50/p99 latency of field/group, _id and freeform
+searches. Shard memory is read from /proc, so on Linux only.
+
+Usage: python3 benchmarks/shard_benchmark.py [--users N] [--orgs N] [--tickets N] [--shards 1,2,4] [--queries N]
+"""
+import json
+import time
+import random
+import tempfile
+import argparse
+
+from generate import generate
+from suite import latencies
+from loader import iter_records
+from shards import ShardedSearch
+from prefork import memory_usage
+from query import Query
+
+
+def sample_records(paths, count, generator):
+    # a reservoir sample of the records of every group, so the benchmark
+    # itself never holds the data
+    sample = []
+    seen = 0
+    for group, path in zip(("users", "tickets", "orgs"), paths):
+        for record in iter_records(path):
+            seen += 1
+            if len(sample) < count:
+                sample.append((group, record))
+            elif generator.randrange(seen) < count:
+                sample[generator.randrange(count)] = (group, record)
+    return sample
+
+
+def sample_queries(paths, count, generator):
+    scoped, ids, freeform = [], [], []
+    for group, record in sample_records(paths, count, generator):
+        field = generator.choice([field for field, value in record.items() if type(value) not in (list, bool)])
+        scoped.append(Query(record[field], field=field, group=group))
+        ids.append(Query(record["_id"], field="_id", group=group))
+        freeform.append(Query(record[field]))
+    return scoped, ids, freeform
+
+
+def run(paths, shards, queries):
+    start = time.perf_counter()
+    search = ShardedSearch(*paths, shards=shards, cache_size=0)
+    search.build_search()
+    build = time.perf_counter() - start
+    shard_memory = [memory_usage(process.pid) for process in search.processes]
+    scoped, ids, freeform = queries
+    report = {
+        "shards": shards,
+        "build_s": build,
+        "shard_rss_mib": [usage["rss_kib"] / 1024 for usage in shard_memory],
+        "total_shard_uss_mib": sum(usage["uss_kib"] for usage in shard_memory) / 1024,
+        "coordinator_rss_mib": memory_usage()["rss_kib"] / 1024,
+        "field_group": latencies(search.field_and_group_search, scoped),
+        "_id": latencies(search.field_and_group_search, ids),
+        "freeform": latencies(search.freeform_search, freeform),
+    }
+    search.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sharded searches of generated data")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--orgs", type=int, default=1000)
+    parser.add_argument("--tickets", type=int, default=60000)
+    parser.add_argument("--shards", default="1,2,4")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = generate(directory, args.users, args.orgs, args.tickets, args.seed)
+        queries = sample_queries(paths, args.queries, random.Random(args.seed))
+        reports = [run(paths, int(shards), queries) for shards in args.shards.split(",")]
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
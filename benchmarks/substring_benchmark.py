@@ -0,0 +1,55 @@
+"""
+Measures the suffix array of the substring search over data/*.json copied
+scale times: its build time, its size next to the text it covers and to a
+suffix trie holding every suffix, and lookups against a scan of every value.
+
+Usage: python3 benchmarks/substring_benchmark.py [scale]
+"""
+import sys
+import time
+import random
+
+from common import scaled_search
+from substring_index import SubstringIndex
+
+
+def percentiles(timings):
+    timings.sort()
+    return timings[len(timings) // 2] * 1e3, timings[int(len(timings) * 0.99)] * 1e3
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    search = scaled_search(scale)
+    search.build_search()
+    strings = [string for string, _ in search.trie.iter_terminals("")]
+
+    start = time.perf_counter()
+    index = SubstringIndex(strings)
+    print(f"{len(strings)} distinct values, {len(index)} characters, suffix array built in {time.perf_counter() - start:.2f}s")
+    index_bytes = index.suffixes.itemsize * len(index.suffixes) + index.starts.itemsize * len(index.starts)
+    print(f"suffix array and offsets: {index_bytes / 2 ** 20:.1f} MiB, {index_bytes / len(index):.1f} bytes per character")
+    print(f"a suffix trie would hold {sum(len(string) * (len(string) + 1) // 2 for string in strings)} characters of suffixes")
+
+    generator = random.Random(0)
+    candidates = [string for string in strings if len(string) > 6]
+    patterns = []
+    for _ in range(200):
+        string = generator.choice(candidates)
+        begin = generator.randrange(len(string) - 3)
+        patterns.append(string[begin : begin + generator.randint(3, 6)])
+
+    indexed, scanned = [], []
+    for pattern in patterns:
+        begin = time.perf_counter()
+        found = sum(1 for _ in index.search(pattern))
+        indexed.append(time.perf_counter() - begin)
+        begin = time.perf_counter()
+        assert found == sum(1 for string in strings if pattern in string)
+        scanned.append(time.perf_counter() - begin)
+    print(f"suffix array lookup: p50 {percentiles(indexed)[0]:.3f}ms p99 {percentiles(indexed)[1]:.3f}ms")
+    print(f"scan of every value: p50 {percentiles(scanned)[0]:.3f}ms p99 {percentiles(scanned)[1]:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
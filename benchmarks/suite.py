@@ -0,0 +1,144 @@
+"""
+Benchmarks loading, build_search, exact, field/group and prefix searches and
+related record resolution on generated data, reporting throughput, p50/p99
+latency and peak RSS as JSON so runs can be compared.
+
+Usage: python3 benchmarks/suite.py [--users N] [--orgs N] [--tickets N] [--data directory]
+                                   [--queries N] [--workers N] [--output file] [--compare file]
+"""
+import sys
+import json
+import time
+import random
+import platform
+import resource
+import tempfile
+import argparse
+
+from generate import generate
+from search import Search
+from query import Query
+from cache import QueryCache
+
+
+def peak_rss_mib():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+def latencies(function, arguments):
+    timings = []
+    start = time.perf_counter()
+    for argument in arguments:
+        begin = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    return {
+        "count": len(timings),
+        "throughput": len(timings) / elapsed if elapsed else None,
+        "p50_ms": timings[len(timings) // 2] * 1e3,
+        "p99_ms": timings[int(len(timings) * 0.99)] * 1e3,
+        "mean_ms": elapsed / len(timings) * 1e3,
+    }
+
+
+def sample_queries(search, count, generator):
+    # values drawn from the records so every query finds something, booleans
+    # are left out as they match half of a group
+    records = [(group, record) for group, records in search.groups.items() for record in records]
+    picks = [generator.choice(records) for _ in range(count)]
+    exact, scoped, related = [], [], []
+    for group, record in picks:
+        field = generator.choice([field for field, value in record.items() if type(value) not in (list, bool)])
+        exact.append(Query(str(record[field]).lower()))
+        scoped.append(Query(str(record[field]).lower(), field=field, group=group))
+        related.append((record, group))
+    prefixes = [Query(query.string[: max(1, len(query.string) // 2)]) for query in exact]
+    return exact, scoped, prefixes, related
+
+
+def run(paths, query_count, workers=None, seed=0):
+    report = {"python": platform.python_version(), "workers": workers or 1}
+
+    start = time.perf_counter()
+    search = Search(*paths, cache_size=0)
+    load = time.perf_counter() - start
+    records = sum(len(records) for records in search.groups.values())
+    values = sum(
+        len(value) if type(value) is list else 1
+        for records in search.groups.values()
+        for record in records
+        for value in record.values()
+    )
+    report["records"] = {group: len(records) for group, records in search.groups.items()}
+    report["load"] = {"seconds": load, "records_per_s": records / load, "peak_rss_mib": peak_rss_mib()}
+
+    start = time.perf_counter()
+    search.build_search(workers)
+    build = time.perf_counter() - start
+    report["build"] = {
+        "seconds": build,
+        "records_per_s": records / build,
+        "values_per_s": values / build,
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+    # the cache is disabled so every query is answered by the indexes
+    search.cache = QueryCache(0)
+    exact, scoped, prefixes, related = sample_queries(search, query_count, random.Random(seed))
+    report["queries"] = {
+        "exact": latencies(search.freeform_search, exact),
+        "field_group": latencies(search.field_and_group_search, scoped),
+        "prefix_first_page": latencies(lambda query: list(search.prefix_search(query, limit=10)), prefixes),
+        "related": latencies(lambda pair: search.get_related(*pair), related),
+    }
+    report["peak_rss_mib"] = peak_rss_mib()
+    return report
+
+
+def compare(report, previous, path=""):
+    # yields the numbers of the report next to those of a previous run
+    for key, value in report.items():
+        if isinstance(value, dict):
+            yield from compare(value, previous.get(key, {}), f"{path}{key}.")
+        elif isinstance(value, (int, float)) and isinstance(previous.get(key), (int, float)) and previous[key]:
+            yield f"{path}{key}", previous[key], value, value / previous[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark building and searching generated data")
+    parser.add_argument("--users", type=int, default=75000)
+    parser.add_argument("--orgs", type=int, default=2500)
+    parser.add_argument("--tickets", type=int, default=200000)
+    parser.add_argument("--data", help="use the users.json, tickets.json and organizations.json in this directory")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file rather than stdout")
+    parser.add_argument("--compare", help="print the change from the JSON report of an earlier run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.data:
+            paths = [f"{args.data}/users.json", f"{args.data}/tickets.json", f"{args.data}/organizations.json"]
+        else:
+            paths = generate(directory, args.users, args.orgs, args.tickets, args.seed)
+        report = run(paths, args.queries, args.workers, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare, "r") as f:
+            previous = json.load(f)
+        for name, before, after, ratio in compare(report, previous):
+            print(f"{name:<40} {before:>14.3f} -> {after:>14.3f} ({ratio:.2f}x)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares the memory use and lookup latency of the radix Trie against the
+original dictionary per character trie, on data/*.json scaled up.
+
+Usage: python3 benchmarks/trie_benchmark.py [scale]
+"""
+import sys
+import time
+import random
+import tracemalloc
+
+from common import scaled_groups
+from trie import Trie
+from entry import Entry
+
+
+class DictTrie:
+    """
+    The original dictionary per character trie, kept for comparison.
+    """
+
+    def __init__(self):
+        self.root = {}
+        self.TERMINAL = "\0"
+
+    def add(self, entry):
+        current_node = self.root
+        for char in entry.string:
+            current_node = current_node.setdefault(char, {})
+        current_node.setdefault(self.TERMINAL, []).append(entry)
+
+    def retrieve(self, string):
+        current_node = self.root
+        for char in string:
+            if char in current_node:
+                current_node = current_node[char]
+            else:
+                return False
+        return current_node.get(self.TERMINAL, False)
+
+
+def load_entries(scale):
+    entries = []
+    for group, records in scaled_groups(scale).items():
+        for record in records:
+            for field, value in record.items():
+                values = value if type(value) is list else [value]
+                for item in values:
+                    entries.append(Entry(record, item, field, group))
+    return entries
+
+
+def measure_build(trie_class, entries):
+    tracemalloc.start()
+    start = time.perf_counter()
+    trie = trie_class()
+    for entry in entries:
+        trie.add(entry)
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return trie, elapsed, memory
+
+
+def measure_lookups(trie, strings):
+    timings = []
+    for string in strings:
+        start = time.perf_counter()
+        trie.retrieve(string)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    entries = load_entries(scale)
+    strings = [entry.string for entry in random.Random(0).sample(entries, 10000)]
+    strings += [string + "x" for string in strings[:1000]]
+
+    print(f"{len(entries)} indexed values ({scale}x data/*.json)")
+    for name, trie_class in [("dict trie", DictTrie), ("radix trie", Trie)]:
+        trie, elapsed, memory = measure_build(trie_class, entries)
+        p50, p99 = measure_lookups(trie, strings)
+        print(
+            f"{name:>10}: build {elapsed:.2f}s | memory {memory / 2 ** 20:.1f} MiB"
+            f" | lookup p50 {p50 * 1e6:.1f}us p99 {p99 * 1e6:.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,9 @@
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../zensearch')))
+
+
+def summarise(entries):
+    # results are compared by value, as searches that copy or decode the
+    # records return other dicts than a built search
+    return sorted((entry.group, entry.field, entry.string, str(entry.data.get("_id"))) for entry in entries or [])
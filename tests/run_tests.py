@@ -1,6 +1,27 @@
 import test_trie
 import test_entry
 import test_search
+import test_field_index
+import test_relations
+import test_snapshot
+import test_loader
+import test_parallel
+import test_text_index
+import test_batch
+import test_cache
+import test_update
+import test_range_index
+import test_render
+import test_metrics
+import test_server
+import test_prefork
+import test_shards
+import test_substring_index
+import test_facet_index
+import test_planner
+import test_lazy
+import test_columns
+import test_generate
 import context
 import unittest
 
@@ -13,3 +34,65 @@ unittest.TextTestRunner(verbosity=2).run(entry_test_suite)
 search_test_suite = unittest.TestLoader().loadTestsFromModule(test_search)
 unittest.TextTestRunner(verbosity=2).run(search_test_suite)
 
+field_index_test_suite = unittest.TestLoader().loadTestsFromModule(test_field_index)
+unittest.TextTestRunner(verbosity=2).run(field_index_test_suite)
+
+relations_test_suite = unittest.TestLoader().loadTestsFromModule(test_relations)
+unittest.TextTestRunner(verbosity=2).run(relations_test_suite)
+
+snapshot_test_suite = unittest.TestLoader().loadTestsFromModule(test_snapshot)
+unittest.TextTestRunner(verbosity=2).run(snapshot_test_suite)
+
+loader_test_suite = unittest.TestLoader().loadTestsFromModule(test_loader)
+unittest.TextTestRunner(verbosity=2).run(loader_test_suite)
+
+parallel_test_suite = unittest.TestLoader().loadTestsFromModule(test_parallel)
+unittest.TextTestRunner(verbosity=2).run(parallel_test_suite)
+
+text_index_test_suite = unittest.TestLoader().loadTestsFromModule(test_text_index)
+unittest.TextTestRunner(verbosity=2).run(text_index_test_suite)
+
+batch_test_suite = unittest.TestLoader().loadTestsFromModule(test_batch)
+unittest.TextTestRunner(verbosity=2).run(batch_test_suite)
+
+cache_test_suite = unittest.TestLoader().loadTestsFromModule(test_cache)
+unittest.TextTestRunner(verbosity=2).run(cache_test_suite)
+
+update_test_suite = unittest.TestLoader().loadTestsFromModule(test_update)
+unittest.TextTestRunner(verbosity=2).run(update_test_suite)
+
+range_index_test_suite = unittest.TestLoader().loadTestsFromModule(test_range_index)
+unittest.TextTestRunner(verbosity=2).run(range_index_test_suite)
+
+render_test_suite = unittest.TestLoader().loadTestsFromModule(test_render)
+unittest.TextTestRunner(verbosity=2).run(render_test_suite)
+
+metrics_test_suite = unittest.TestLoader().loadTestsFromModule(test_metrics)
+unittest.TextTestRunner(verbosity=2).run(metrics_test_suite)
+
+server_test_suite = unittest.TestLoader().loadTestsFromModule(test_server)
+unittest.TextTestRunner(verbosity=2).run(server_test_suite)
+
+prefork_test_suite = unittest.TestLoader().loadTestsFromModule(test_prefork)
+unittest.TextTestRunner(verbosity=2).run(prefork_test_suite)
+
+shards_test_suite = unittest.TestLoader().loadTestsFromModule(test_shards)
+unittest.TextTestRunner(verbosity=2).run(shards_test_suite)
+
+substring_index_test_suite = unittest.TestLoader().loadTestsFromModule(test_substring_index)
+unittest.TextTestRunner(verbosity=2).run(substring_index_test_suite)
+
+facet_index_test_suite = unittest.TestLoader().loadTestsFromModule(test_facet_index)
+unittest.TextTestRunner(verbosity=2).run(facet_index_test_suite)
+
+planner_test_suite = unittest.TestLoader().loadTestsFromModule(test_planner)
+unittest.TextTestRunner(verbosity=2).run(planner_test_suite)
+
+lazy_test_suite = unittest.TestLoader().loadTestsFromModule(test_lazy)
+unittest.TextTestRunner(verbosity=2).run(lazy_test_suite)
+
+columns_test_suite = unittest.TestLoader().loadTestsFromModule(test_columns)
+unittest.TextTestRunner(verbosity=2).run(columns_test_suite)
+
+generate_test_suite = unittest.TestLoader().loadTestsFromModule(test_generate)
+unittest.TextTestRunner(verbosity=2).run(generate_test_suite)
@@ -0,0 +1,74 @@
+import context
+from batch import BatchSearch, parse_query
+from search import Search
+from query import Query
+import io
+import json
+import unittest
+
+
+class TestParseQuery(unittest.TestCase):
+    def test_plain_text(self):
+        query = parse_query(" Francisca Rasmussen\n")
+        self.assertEqual((query.string, query.field, query.group), ("francisca rasmussen", None, None))
+
+    def test_number(self):
+        self.assertEqual(parse_query("104\n").string, "104")
+
+    def test_json_object(self):
+        query = parse_query('{"query": 104, "field": "_id", "group": "orgs", "fuzziness": 1}')
+        self.assertEqual((query.string, query.field, query.group, query.fuzziness), ("104", "_id", "orgs", 1))
+
+
+class TestBatchSearch(unittest.TestCase):
+    def setUp(self):
+        self.search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+        )
+        self.search.build_search()
+        self.batch = BatchSearch(self.search)
+
+    def test_run(self):
+        result = next(self.batch.run([Query("104", field="_id", group="orgs")]))
+        self.assertEqual(result["count"], 1)
+        record = result["results"][0]["record"]
+        self.assertEqual(record["_id"], 104)
+        self.assertEqual([user["_id"] for user in record["users"]], [3])
+        self.assertEqual(set(record["users"][0]), {"_id", "name"})
+        self.assertNotIn("users", self.search.orgs[3])
+
+    def test_repeated_queries_share_results(self):
+        queries = [Query("104"), Query("104"), Query("nothere")]
+        results = list(self.batch.run(queries))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[2]["results"], [])
+        self.assertEqual(len(self.batch.results), 2)
+
+    def test_related_resolved_once(self):
+        list(self.batch.run([Query("104"), Query("104", field="_id", group="orgs")]))
+        org = self.search.orgs[3]
+        self.assertEqual(sum(1 for group, record_id in self.batch.summaries if group == "orgs" and record_id == "104"), 1)
+
+    def test_summaries_follow_the_record(self):
+        # records decoded from a snapshot are freed once they leave its cache,
+        # and the next record decoded may take the same id(), as this dict does
+        record = dict(self.search.orgs[0])
+        self.batch.summarise(record, "orgs")
+        record.clear()
+        record.update(self.search.orgs[1])
+        self.assertEqual(self.batch.summarise(record, "orgs")["_id"], self.search.orgs[1]["_id"])
+
+    def test_write_ndjson(self):
+        stream = io.StringIO()
+        self.batch.write(["104\n", "\n", '{"query": "enthaze", "group": "orgs"}\n', "104\n"], stream)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        results = [json.loads(line) for line in lines]
+        self.assertEqual(results[0], results[2])
+        self.assertEqual([result["record"]["_id"] for result in results[1]["results"]], [101])
+
+
+if __name__ == "__main__":
+    unittest.main()
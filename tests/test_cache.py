@@ -0,0 +1,93 @@
+import context
+from cache import QueryCache, MISSING
+from search import Search
+from query import Query
+import unittest
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_get_put(self):
+        cache = QueryCache(maxsize=2)
+        self.assertIs(cache.get("a"), MISSING)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = QueryCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIs(cache.get("b"), MISSING)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_ttl(self):
+        clock = Clock()
+        cache = QueryCache(maxsize=2, ttl=10, clock=clock)
+        cache.put("a", 1)
+        clock.now = 9
+        self.assertEqual(cache.get("a"), 1)
+        clock.now = 10
+        self.assertIs(cache.get("a"), MISSING)
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_cached_values_can_be_falsy(self):
+        cache = QueryCache()
+        calls = []
+        for _ in range(2):
+            self.assertEqual(cache.cached("a", lambda: calls.append(1)), None)
+        self.assertEqual(len(calls), 1)
+
+    def test_disabled(self):
+        cache = QueryCache(maxsize=0)
+        cache.put("a", 1)
+        self.assertIs(cache.get("a"), MISSING)
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+        )
+        self.search.build_search()
+
+    def test_repeated_query_hits_cache(self):
+        first = self.search.field_and_group_search(query_string="104", field="_id", group="orgs")
+        second = self.search.field_and_group_search(query=Query("104", field="_id", group="orgs"))
+        self.assertIs(first, second)
+        self.assertEqual(self.search.cache.hits, 1)
+
+    def test_related_cached(self):
+        org = self.search.orgs[0]
+        self.assertIs(self.search.get_related(org, "orgs"), self.search.get_related(org, "orgs"))
+
+    def test_add_item_invalidates(self):
+        self.assertEqual(self.search.freeform_search(Query("newvalue")), False)
+        self.search.add_item({"_id": 999, "name": "newvalue"}, "orgs")
+        results = self.search.freeform_search(Query("newvalue"))
+        self.assertEqual([entry.data["_id"] for entry in results], [999])
+
+    def test_add_item_invalidates_related(self):
+        org = self.search.orgs[0]
+        self.assertEqual(self.search.get_related(org, "orgs")["users"], [self.search.users[4]])
+        user = {"_id": 999, "organization_id": org["_id"]}
+        self.search.add_item(user, "users")
+        self.assertEqual(self.search.get_related(org, "orgs")["users"], [self.search.users[4], user])
+
+
+if __name__ == "__main__":
+    unittest.main()
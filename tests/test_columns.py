@@ -0,0 +1,126 @@
+import context
+from context import summarise
+import columns
+from columns import ColumnTable, ColumnarSearch, IntColumn, DictionaryColumn, TextColumn, ObjectColumn, MISSING
+from search import Search
+from query import Query
+from collections import Counter
+import unittest
+
+SOURCES = ["data/users.json", "data/tickets.json", "data/organizations.json"]
+
+
+class TestColumnTable(unittest.TestCase):
+    def setUp(self):
+        self.table = ColumnTable()
+        self.docs = [
+            self.table.add({"_id": 1, "name": "a", "active": True, "tags": ["x", "y"]}, "users"),
+            self.table.add({"_id": 2, "active": False, "tags": []}, "users"),
+            self.table.add({"_id": 3, "name": "c", "extra": None}, "users"),
+        ]
+
+    def test_records_as_added(self):
+        self.assertEqual(self.table.record(self.docs[0]), {"_id": 1, "name": "a", "active": True, "tags": ["x", "y"]})
+        self.assertEqual(self.table.record(self.docs[1]), {"_id": 2, "active": False, "tags": []})
+        self.assertEqual(self.table.record(self.docs[2]), {"_id": 3, "name": "c", "extra": None})
+        self.assertEqual(self.table.value(self.docs[1], "name"), MISSING)
+        self.assertEqual(len(self.table), 3)
+
+    def test_mixed_types(self):
+        self.assertIsInstance(self.table.columns["users"]["_id"], IntColumn)
+        self.table.add({"_id": "four"}, "users")
+        self.assertIsInstance(self.table.columns["users"]["_id"], ObjectColumn)
+        self.assertEqual([record["_id"] for _, record, _ in self.table.iter_docs()], [1, 2, 3, "four"])
+
+    def test_unique_strings_stored_as_text(self):
+        self.assertIsInstance(self.table.columns["users"]["name"], DictionaryColumn)
+        limit = columns.DICTIONARY_LIMIT
+        columns.DICTIONARY_LIMIT = 4
+        try:
+            for number in range(5):
+                self.table.add({"name": f"name {number}"}, "users")
+        finally:
+            columns.DICTIONARY_LIMIT = limit
+        self.assertIsInstance(self.table.columns["users"]["name"], TextColumn)
+        self.assertEqual([record.get("name") for _, record, _ in self.table.iter_docs()][-3:], ["name 2", "name 3", "name 4"])
+
+    def test_update_and_remove(self):
+        self.table.update(self.docs[0], {"_id": 1, "tags": ["z"], "role": "admin"})
+        self.assertEqual(self.table.record(self.docs[0]), {"_id": 1, "tags": ["z"], "role": "admin"})
+        self.assertEqual(self.table.value(self.docs[2], "role"), MISSING)
+        self.table.remove(self.docs[1])
+        self.assertIsNone(self.table.record(self.docs[1]))
+        self.assertEqual([doc for doc, _, _ in self.table.iter_docs()], [self.docs[0], self.docs[2]])
+
+    def test_live_docs(self):
+        docs = self.table.docs("users")
+        self.table.remove(self.docs[1])
+        self.assertIs(self.table.docs("users"), docs)
+        self.assertEqual(list(docs), [self.docs[0], self.docs[2]])
+
+    def test_counts(self):
+        self.table.add({"_id": 4, "active": True, "tags": ["x"]}, "users")
+        self.assertEqual(self.table.counts("users", "active"), Counter({True: 2, False: 1}))
+        self.assertEqual(self.table.counts("users", "tags"), Counter({"x": 2, "y": 1}))
+        self.assertEqual(self.table.counts("users", "name"), Counter({"a": 1, "c": 1}))
+        self.table.remove(self.docs[0])
+        self.assertEqual(self.table.counts("users", "active"), Counter({True: 1, False: 1}))
+        self.assertEqual(self.table.counts("users", "tags"), Counter({"x": 1}))
+        self.assertEqual(self.table.counts("users", "_id"), Counter({2: 1, 3: 1, 4: 1}))
+        self.assertEqual(self.table.counts("users", "nothing"), Counter())
+
+
+class TestColumnarSearch(unittest.TestCase):
+    def setUp(self):
+        self.columnar = ColumnarSearch(*SOURCES)
+        self.columnar.build_search()
+        self.search = Search(*SOURCES)
+        self.search.build_search()
+
+    def test_records_match(self):
+        for group in self.search.groups:
+            self.assertEqual(list(self.columnar.groups[group]), self.search.groups[group])
+            self.assertEqual(len(self.columnar.groups[group]), len(self.search.groups[group]))
+        self.assertEqual(self.columnar.tickets[3], self.search.tickets[3])
+        self.assertEqual(self.columnar.users[1:3], self.search.users[1:3])
+
+    def test_searches_match(self):
+        for query in [Query("pending"), Query("101", "organization_id"), Query("ohio", "tags", "tickets")]:
+            self.assertEqual(summarise(self.columnar.field_and_group_search(query)), summarise(self.search.field_and_group_search(query)))
+        self.assertEqual(summarise(self.columnar.text_search("korea")), summarise(self.search.text_search("korea")))
+        self.assertEqual(self.columnar.facets("tickets", limit=None), self.search.facets("tickets", limit=None))
+        ticket = self.columnar.tickets[0]
+        self.assertEqual(self.columnar.get_related(ticket, "tickets"), self.search.get_related(self.search.tickets[0], "tickets"))
+
+    def test_facets_from_columns(self):
+        for group in self.search.groups:
+            self.assertEqual(self.columnar.facets(group), self.search.facets(group))
+        self.assertIsNone(self.columnar.facet_index)
+        ticket = self.columnar.tickets[0]
+        self.columnar.update_item("tickets", ticket["_id"], dict(ticket, status="Escalated", tags=["Ohio", "new"]))
+        self.columnar.delete_item("tickets", self.columnar.tickets[1]["_id"])
+        # the counts of the facet index built over the changed records
+        expected = Search.facets(self.columnar, "tickets", limit=None)
+        self.assertEqual(self.columnar.facets("tickets", limit=None), expected)
+        counts = self.columnar.facets("tickets", fields=["status", "nothing"], limit=2)
+        self.assertEqual(counts, {"status": expected["status"][:2], "nothing": []})
+
+    def test_value_counts(self):
+        expected = Counter(ticket["status"] for ticket in self.search.tickets).most_common(3)
+        self.assertEqual(self.columnar.value_counts("tickets", "status", limit=3), expected)
+
+    def test_updates(self):
+        ticket = self.columnar.tickets[0]
+        self.columnar.update_item("tickets", ticket["_id"], dict(ticket, status="escalated"))
+        self.assertEqual(self.columnar.find_item("tickets", ticket["_id"])["status"], "escalated")
+        results = self.columnar.field_and_group_search(Query("escalated", "status", "tickets"))
+        self.assertEqual([entry.data["_id"] for entry in results], [ticket["_id"]])
+        self.columnar.add_item({"_id": 999, "name": "New Org"}, "orgs")
+        self.assertEqual(self.columnar.orgs[-1], {"_id": 999, "name": "New Org"})
+        self.columnar.delete_item("orgs", 999)
+        self.assertEqual(len(self.columnar.orgs), len(self.search.orgs))
+        self.assertIsNone(self.columnar.field_and_group_search(Query("new org", "name", "orgs")))
+
+
+if __name__ == "__main__":
+    unittest.main()
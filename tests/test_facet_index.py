@@ -0,0 +1,124 @@
+import context
+from facet_index import FacetIndex, bitset
+from search import Search
+from query import Query
+from relations import normalise
+from collections import Counter
+import io
+import unittest
+
+
+def scan_counts(records, field):
+    # counts the values of the field by walking every record, as the
+    # facet index should
+    counts = Counter()
+    for record in records:
+        value = record.get(field)
+        if value is not None:
+            counts.update(normalise(item) for item in (value if type(value) is list else [value]))
+    return sorted(counts.items(), key=lambda pair: (-pair[1], pair[0]))
+
+
+class TestFacetIndex(unittest.TestCase):
+    def setUp(self):
+        docs = [
+            (0, {"status": "open", "tags": ["a", "b"]}, "tickets"),
+            (1, {"name": "Ann"}, "users"),
+            (2, {"status": "closed", "tags": ["b"]}, "tickets"),
+            (3, {"status": "open", "active": True}, "tickets"),
+        ]
+        self.index = FacetIndex(fields=("status", "tags", "active")).build(docs)
+
+    def test_bitset(self):
+        self.assertEqual(bitset([0, 3, 9], 10), 0b1000001001)
+        self.assertEqual(bitset([], 10), 0)
+
+    def test_counts(self):
+        self.assertEqual(self.index.counts("tickets", "status"), [("open", 2), ("closed", 1)])
+        self.assertEqual(self.index.counts("tickets", "tags", limit=1), [("b", 2)])
+        self.assertEqual(self.index.counts("tickets", "active"), [("true", 1)])
+        self.assertEqual(self.index.counts("users", "status"), [])
+
+    def test_select(self):
+        bits = self.index.select("tickets", [3, 1, 2])
+        self.assertEqual(bits, 0b110)
+        self.assertEqual(self.index.counts("tickets", "status", bits), [("closed", 1), ("open", 1)])
+        self.assertEqual(self.index.counts("tickets", "status", bits & self.index.value("tickets", "tags", "B")), [("closed", 1)])
+
+    def test_add_and_remove(self):
+        self.index.remove(2, {"status": "closed", "tags": ["b"]}, "tickets")
+        self.index.add(4, {"status": "closed", "tags": ["c"]}, "tickets")
+        # an update removes the old values before adding the new
+        self.index.remove(0, {"status": "open", "tags": ["a", "b"]}, "tickets")
+        self.index.add(0, {"status": "hold"}, "tickets")
+        self.assertEqual(self.index.counts("tickets", "status"), [("closed", 1), ("hold", 1), ("open", 1)])
+        self.assertEqual(self.index.counts("tickets", "tags"), [("c", 1)])
+        self.assertEqual(self.index.select("tickets", [4]), 0b1000)
+
+    def test_group_fields(self):
+        self.assertEqual(self.index.group_fields("tickets"), ["status", "tags", "active"])
+        self.assertEqual(self.index.group_fields("users"), [])
+
+
+class TestSearchFacets(unittest.TestCase):
+    def setUp(self):
+        self.search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+        )
+        self.search.build_search()
+
+    def test_group_facets_match_scan(self):
+        facets = self.search.facets("tickets", limit=None)
+        for field in ["status", "priority", "type", "tags", "organization_id", "has_incidents"]:
+            self.assertEqual(facets[field], scan_counts(self.search.tickets, field))
+
+    def test_query_facets(self):
+        facets = self.search.facets("tickets", Query("pending", "status"), fields=["priority"], limit=None)
+        pending = [ticket for ticket in self.search.tickets if ticket.get("status") == "pending"]
+        self.assertEqual(facets, {"priority": scan_counts(pending, "priority")})
+
+    def test_where(self):
+        # _id is not a facet field, so its records come from the field index
+        where = {"priority": "high", "_id": "436bf9b0-1147-4c0a-8439-6f79833bff5b"}
+        self.assertEqual(self.search.facets("tickets", where=where, fields=["organization_id"]), {"organization_id": [("116", 1)]})
+        where = {"status": "solved", "priority": "high"}
+        self.assertEqual(self.search.facets("tickets", where=where, fields=["organization_id"]), {"organization_id": [("104", 1)]})
+        where = {"status": "pending", "priority": "low"}
+        self.assertEqual(self.search.facets("tickets", where=where, fields=["organization_id"]), {"organization_id": []})
+
+    def test_kept_after_update(self):
+        ticket = self.search.tickets[0]
+        status = ticket["status"]
+        before = dict(self.search.facets("tickets", fields=["status"])["status"])
+        index = self.search.facet_index
+        self.search.update_item("tickets", ticket["_id"], dict(ticket, status="escalated"))
+        after = dict(self.search.facets("tickets", fields=["status"])["status"])
+        self.assertIs(self.search.facet_index, index)
+        self.assertEqual(after["escalated"], 1)
+        self.assertEqual(after.get(status, 0), before[status] - 1)
+
+    def test_kept_after_add_and_delete(self):
+        self.search.facets("tickets")
+        self.search.add_item({"_id": "new", "status": "Escalated", "tags": ["Ohio", "Quux"]}, "tickets")
+        self.search.delete_item("tickets", self.search.tickets[1]["_id"])
+        self.search.update_item("tickets", "new", {"_id": "new", "status": "hold", "tags": ["Quux"]})
+        rebuilt = FacetIndex().build(self.search.records.iter_docs())
+        for group in ["users", "tickets", "orgs"]:
+            expected = {field: rebuilt.counts(group, field) for field in rebuilt.group_fields(group)}
+            self.assertEqual(self.search.facets(group, limit=None), expected)
+        for field in ["status", "tags", "priority"]:
+            self.assertEqual(self.search.facets("tickets", limit=None)[field], scan_counts(self.search.tickets, field))
+        where = {"tags": "quux"}
+        self.assertEqual(self.search.facets("tickets", where=where, fields=["status"]), {"status": [("hold", 1)]})
+
+    def test_output_facets(self):
+        output = io.StringIO()
+        self.search.set_output(output=output)
+        self.search.output_facets({"status": [("open", 2), ("closed", 1)], "tags": []})
+        self.assertEqual(output.getvalue(), "Facets\n  status: open (2), closed (1)\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import context
+from field_index import FieldIndex
+from records import pack
+import unittest
+
+
+class TestFieldIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = FieldIndex()
+        self.user = pack(0, 1)
+        self.ticket = pack(1, 1)
+
+    def test_retrieve_scoped(self):
+        self.index.add("pending", "status", "users", self.user)
+        self.index.add("pending", "status", "tickets", self.ticket)
+
+        self.assertEqual(list(self.index.retrieve("pending", "status", "users")), [self.user])
+        self.assertEqual(list(self.index.retrieve("pending", "status", "tickets")), [self.ticket])
+
+    def test_retrieve_wrong_field(self):
+        self.index.add("pending", "status", "users", self.user)
+        self.assertEqual(self.index.retrieve("pending", "name", "users"), [])
+
+    def test_retrieve_missing(self):
+        self.assertEqual(self.index.retrieve("nothere", "status", "users"), [])
+
+    def test_add_same_value_twice(self):
+        first = pack(0, 2)
+        second = pack(3, 2)
+        self.index.add("ohio", "tags", "users", first)
+        self.index.add("ohio", "tags", "users", second)
+        self.assertEqual(list(self.index.retrieve("ohio", "tags", "users")), [first, second])
+
+    def test_discard(self):
+        postings = [pack(0, 2), pack(3, 2), pack(1, 2)]
+        for posting in postings:
+            self.index.add("ohio", "tags", "users", posting)
+        self.index.discard("ohio", "tags", "users", pack(1, 2))
+        self.index.discard("ohio", "tags", "users", pack(5, 2))
+        self.assertEqual(list(self.index.retrieve("ohio", "tags", "users")), postings[:2])
+        for posting in postings[:2]:
+            self.index.discard("ohio", "tags", "users", posting)
+        self.assertEqual(self.index.index, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
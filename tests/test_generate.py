@@ -0,0 +1,53 @@
+import context
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks")))
+from generate import generate
+from loader import iter_records
+
+
+class TestGenerate(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _generate(self, name, ndjson):
+        return generate(os.path.join(self.directory.name, name), 60, 10, 200, seed=3, ndjson=ndjson)
+
+    def test_relations_resolve(self):
+        users, tickets, orgs = (list(iter_records(path)) for path in self._generate("array", False))
+        self.assertEqual((len(users), len(tickets), len(orgs)), (60, 200, 10))
+        user_ids = {user["_id"] for user in users}
+        org_ids = {org["_id"] for org in orgs}
+        self.assertEqual(len(user_ids), 60)
+        self.assertEqual(len({ticket["_id"] for ticket in tickets}), 200)
+        for user in users:
+            if "organization_id" in user:
+                self.assertIn(user["organization_id"], org_ids)
+        for ticket in tickets:
+            self.assertIn(ticket["submitter_id"], user_ids)
+            if "assignee_id" in ticket:
+                self.assertIn(ticket["assignee_id"], user_ids)
+            if "organization_id" in ticket:
+                self.assertIn(ticket["organization_id"], org_ids)
+
+    def test_formats_round_trip(self):
+        arrays = self._generate("array", False)
+        lines = self._generate("ndjson", True)
+        for array_path, ndjson_path in zip(arrays, lines):
+            with open(array_path, "r") as f:
+                expected = json.load(f)
+            with open(ndjson_path, "r") as f:
+                self.assertEqual([json.loads(line) for line in f], expected)
+            self.assertEqual(list(iter_records(array_path)), expected)
+            self.assertEqual(list(iter_records(ndjson_path)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
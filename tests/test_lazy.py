@@ -0,0 +1,86 @@
+import context
+from context import summarise
+from lazy import LazySearch, parse_warm
+from search import Search
+from query import Query
+import unittest
+
+SOURCES = ["tests/test_data/users_data.json", "tests/test_data/tickets_data.json", "tests/test_data/orgs_data.json"]
+
+
+class TestLazySearch(unittest.TestCase):
+    def setUp(self):
+        self.lazy = LazySearch(*SOURCES)
+        self.search = Search(*SOURCES)
+        self.search.build_search()
+
+    def test_nothing_read_up_front(self):
+        self.assertEqual(self.lazy.loaded, {})
+        self.assertEqual(self.lazy.built, set())
+        self.assertEqual(len(self.lazy.users), 0)
+
+    def test_scoped_search_builds_one_field(self):
+        query = Query("pending", "status", "tickets")
+        results = self.lazy.field_and_group_search(query)
+        self.assertEqual(summarise(results), summarise(self.search.field_and_group_search(query)))
+        self.assertEqual(list(self.lazy.loaded), ["tickets"])
+        self.assertEqual(self.lazy.built, {("tickets", "status")})
+
+    def test_field_search_across_groups(self):
+        query = Query("101", "organization_id")
+        self.assertEqual(summarise(self.lazy.field_and_group_search(query)), summarise(self.search.field_and_group_search(query)))
+        self.assertEqual(self.lazy.built, {(group, "organization_id") for group in ["users", "tickets", "orgs"]})
+
+    def test_freeform_builds_everything(self):
+        self.lazy.field_and_group_search(Query("pending", "status", "tickets"))
+        for string in ["pending", "101", "1", "false"]:
+            self.assertEqual(summarise(self.lazy.freeform_search(Query(string))), summarise(self.search.freeform_search(Query(string))))
+        self.assertEqual(self.lazy.complete, {"users", "tickets", "orgs"})
+
+    def test_other_searches_match(self):
+        self.assertEqual(summarise(self.lazy.prefix_search(Query("http", "url"))), summarise(self.search.prefix_search(Query("http", "url"))))
+        query = Query("flotonic", "email", "users")
+        self.assertEqual(summarise(self.lazy.substring_search(query)), summarise(self.search.substring_search(query)))
+        self.assertEqual(summarise(self.lazy.text_search("korea")), summarise(self.search.text_search("korea")))
+        self.assertEqual(
+            summarise(self.lazy.range_search("_id", "users", 1, 4)), summarise(self.search.range_search("_id", "users", 1, 4))
+        )
+        self.assertEqual(self.lazy.facets("tickets", limit=None), self.search.facets("tickets", limit=None))
+        clause = "status=pending OR priority=high"
+        self.assertEqual(summarise(self.lazy.structured_search(clause, "tickets")), summarise(self.search.structured_search(clause, "tickets")))
+        self.assertEqual(self.lazy.explain(clause, "tickets"), self.search.explain(clause, "tickets"))
+
+    def test_related_records_read_their_groups(self):
+        ticket = self.lazy.find_item("tickets", "436bf9b0-1147-4c0a-8439-6f79833bff5b")
+        self.assertEqual(list(self.lazy.loaded), ["tickets"])
+        related = self.lazy.get_related(ticket, "tickets")
+        expected = self.search.get_related(self.search.find_item("tickets", ticket["_id"]), "tickets")
+        self.assertEqual(related, expected)
+        self.assertEqual(set(self.lazy.loaded), {"users", "tickets", "orgs"})
+
+    def test_updates(self):
+        self.lazy.field_and_group_search(Query("pending", "status", "tickets"))
+        ticket = dict(self.lazy.find_item("tickets", "436bf9b0-1147-4c0a-8439-6f79833bff5b"), status="escalated")
+        self.lazy.update_item("tickets", ticket["_id"], ticket)
+        results = self.lazy.field_and_group_search(Query("escalated", "status", "tickets"))
+        self.assertEqual([entry.data["_id"] for entry in results], [ticket["_id"]])
+        self.assertIsNone(self.lazy.field_and_group_search(Query("pending", "status", "tickets")))
+        self.lazy.add_item({"_id": 99, "name": "New Org"}, "orgs")
+        self.assertEqual(self.lazy.find_item("orgs", 99)["name"], "New Org")
+        self.lazy.delete_item("orgs", 99)
+        self.assertIsNone(self.lazy.field_and_group_search(Query("new org", "name", "orgs")))
+
+    def test_warm(self):
+        self.lazy.warm(parse_warm("tickets.status, users"))
+        self.lazy.warmer.join()
+        self.assertIn(("tickets", "status"), self.lazy.built)
+        self.assertEqual(self.lazy.complete, {"users"})
+        self.lazy.warm([("orgs", "name")], background=False)
+        self.assertIn(("orgs", "name"), self.lazy.built)
+
+    def test_parse_warm(self):
+        self.assertEqual(parse_warm("tickets.status,users"), [("tickets", "status"), ("users", None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import context
+from loader import iter_records, RecordReader
+import io
+import os
+import json
+import tempfile
+import unittest
+
+
+class TestLoader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write(self, text):
+        filepath = os.path.join(self.directory.name, "records.json")
+        with open(filepath, "w") as f:
+            f.write(text)
+        return filepath
+
+    def test_array_matches_json_load(self):
+        for filepath in ["tests/test_data/users_data.json", "tests/test_data/tickets_data.json"]:
+            with open(filepath, "r") as f:
+                expected = json.load(f)
+            for chunk_size in [1, 7, 64, 1 << 16]:
+                self.assertEqual(list(iter_records(filepath, chunk_size)), expected)
+
+    def test_newline_delimited(self):
+        records = [{"_id": 1, "name": "Ştate"}, {"_id": 2, "tags": ["a", "b"]}, {"_id": 3}]
+        filepath = self._write("\n".join(json.dumps(record) for record in records) + "\n")
+        for chunk_size in [1, 5, 1 << 16]:
+            self.assertEqual(list(iter_records(filepath, chunk_size)), records)
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_records(self._write(" [ ] \n"))), [])
+
+    def test_empty_file(self):
+        for text in ["", " \n\t\n"]:
+            self.assertRaises(json.JSONDecodeError, lambda: list(iter_records(self._write(text))))
+
+    def test_values_run_together(self):
+        filepath = self._write('{"_id": 1} {"_id": 2}\n')
+        for chunk_size in [1, 1 << 16]:
+            self.assertRaises(json.JSONDecodeError, lambda: list(iter_records(filepath, chunk_size)))
+
+    def test_scalar_cut_at_chunk_boundary(self):
+        self.assertEqual(list(iter_records(self._write("[12345, 678]"), chunk_size=3)), [12345, 678])
+
+    def test_values_cut_at_every_boundary(self):
+        text = '[12.5, 1e5, -3, "\\u00e9\\ud83d\\ude00", true, null]'
+        filepath = self._write(text)
+        for chunk_size in range(1, len(text) + 1):
+            self.assertEqual(list(iter_records(filepath, chunk_size)), json.loads(text))
+
+    def test_malformed_record_raises_before_reading_on(self):
+        f = io.StringIO('[{"_id": 1, "name": nope}, ' + ", ".join(['{"_id": 2}'] * 10000) + "]")
+        with self.assertRaises(json.JSONDecodeError):
+            list(RecordReader(f, chunk_size=64))
+        self.assertLess(f.tell(), 1024)
+
+    def test_malformed_input(self):
+        filepath = "tests/test_data/bad_input.json"
+        self.assertRaises(ValueError, lambda: list(iter_records(filepath)))
+
+    def test_unterminated_array(self):
+        filepath = self._write('[{"_id": 1}, {"_id": 2}')
+        self.assertRaises(ValueError, lambda: list(iter_records(filepath, chunk_size=4)))
+
+    def test_extra_data(self):
+        filepath = self._write('[{"_id": 1}] {"_id": 2}')
+        self.assertRaises(ValueError, lambda: list(iter_records(filepath)))
+
+    def test_file_not_found(self):
+        self.assertRaises(FileNotFoundError, lambda: list(iter_records("not_a_real_file.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
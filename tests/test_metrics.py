@@ -0,0 +1,104 @@
+import context
+from metrics import Metrics, NullMetrics, NULL_METRICS, NULL_TIMER, PrintSink, CollectSink
+from search import Search
+from query import Query
+from trie import Trie
+from entry import Entry
+import io
+import unittest
+
+
+class TestMetrics(unittest.TestCase):
+    def test_null_metrics(self):
+        metrics = NullMetrics()
+        self.assertFalse(metrics.enabled)
+        self.assertIs(metrics.timer("phase"), NULL_TIMER)
+        with metrics.timer("phase"):
+            metrics.count("things")
+        metrics.report("nothing")
+
+    def test_timers_and_counters(self):
+        sink = CollectSink()
+        metrics = Metrics(sink)
+        for _ in range(2):
+            with metrics.timer("phase"):
+                metrics.count("things", 3)
+        metrics.report("query")
+        [(label, report)] = sink.reports
+        self.assertEqual(label, "query")
+        self.assertEqual(report["timers"]["phase"]["calls"], 2)
+        self.assertGreaterEqual(report["timers"]["phase"]["seconds"], 0)
+        self.assertEqual(report["counters"], {"things": 6})
+        # reporting starts over, and nothing is sent for an empty report
+        metrics.report("empty")
+        self.assertEqual(len(sink.reports), 1)
+
+    def test_print_sink(self):
+        stream = io.StringIO()
+        PrintSink(stream)("build", {"timers": {"build": {"seconds": 0.5, "calls": 1}}, "counters": {"records": 3}})
+        self.assertEqual(stream.getvalue().splitlines()[0], "[profile] build")
+        self.assertIn("500.000ms  x1", stream.getvalue())
+        self.assertIn("records", stream.getvalue())
+
+
+class TestTrieMetrics(unittest.TestCase):
+    def test_counted_retrieve(self):
+        trie = Trie()
+        for string in ["ban", "banana", "band"]:
+            trie.add(Entry({}, string, "name", "users"))
+        sink = CollectSink()
+        trie.metrics = Metrics(sink)
+        # counting the nodes visited does not change what is found
+        for string in ["ban", "banana", "bana", "bandana", "x", ""]:
+            found = trie.retrieve(string)
+            trie.metrics = NULL_METRICS
+            self.assertEqual(found, trie.retrieve(string))
+            trie.metrics = Metrics(sink)
+        trie.retrieve("banana")
+        trie.metrics.report("lookups")
+        self.assertGreater(sink.reports[0][1]["counters"]["trie.nodes_visited"], 0)
+
+
+class TestSearchMetrics(unittest.TestCase):
+    def setUp(self):
+        self.sink = CollectSink()
+        self.search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+            output=io.StringIO(),
+            metrics=Metrics(self.sink),
+        )
+        self.search.build_search()
+
+    def test_build_report(self):
+        self.search.metrics.report("build")
+        label, report = self.sink.reports[0]
+        self.assertIn("build", report["timers"])
+        self.assertIn("build.tickets", report["timers"])
+        self.assertEqual(report["counters"]["build.records"], 16)
+
+    def test_query_report(self):
+        self.search.metrics.report("build")
+        results = self.search.field_and_group_search(Query("pending", field="status"))
+        self.search.output_results(results)
+        self.search.metrics.report("query")
+        counters = self.sink.reports[1][1]["counters"]
+        self.assertEqual(counters["entries.returned"], len(results))
+        self.assertGreaterEqual(counters["entries.scanned"], len(results))
+        self.assertEqual(counters["results.rendered"], len(results))
+        self.assertGreater(counters["related.lookups"], 0)
+        self.assertGreater(counters["trie.nodes_visited"], 0)
+
+    def test_disabled_by_default(self):
+        search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+        )
+        self.assertIs(search.metrics, NULL_METRICS)
+        self.assertIs(search.trie.metrics, NULL_METRICS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import context
+from search import Search
+from parallel import build_parallel, partition
+import unittest
+
+
+def summarise_trie(node, prefix=""):
+    # maps every string in the trie to the postings stored at it
+    strings = {}
+    if node.terminal is not None:
+        strings[prefix] = list(node.terminal.storage)
+    for child in (node.children or {}).values():
+        strings.update(summarise_trie(child, prefix + child.label))
+    return strings
+
+
+class TestParallelBuild(unittest.TestCase):
+    def setUp(self):
+        self.files = (
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+        )
+
+    def _build_both(self, chunk_size):
+        serial = Search(*self.files)
+        serial.build_search()
+        parallel = Search(*self.files)
+        # share the records so the record tables can be compared by identity
+        parallel.users, parallel.tickets, parallel.orgs = serial.users, serial.tickets, serial.orgs
+        parallel.groups = serial.groups
+        build_parallel(parallel, workers=2, chunk_size=chunk_size)
+        return serial, parallel
+
+    def test_matches_serial_build(self):
+        for chunk_size in [1, 2, 5000]:
+            serial, parallel = self._build_both(chunk_size)
+            self.assertEqual(summarise_trie(parallel.trie.root), summarise_trie(serial.trie.root))
+            self.assertEqual(parallel.field_index.index, serial.field_index.index)
+            self.assertEqual(parallel.relations.index, serial.relations.index)
+            self.assertEqual(parallel.text_index.postings, serial.text_index.postings)
+            self.assertEqual(
+                {key: list(column.postings) for key, column in parallel.range_index.columns.items()},
+                {key: list(column.postings) for key, column in serial.range_index.columns.items()},
+            )
+            self.assertEqual(list(map(id, parallel.records.records)), list(map(id, serial.records.records)))
+
+    def test_build_search_workers(self):
+        search = Search(*self.files)
+        search.build_search(workers=2)
+        results = search.field_and_group_search(query_string="104", field="organization_id", group="tickets")
+        self.assertEqual([entry.data["_id"] for entry in results], ["4cce7415-ef12-42b6-b7b5-fb00e24f9cc1"])
+
+    def test_partition(self):
+        groups = {"users": [{}] * 5, "tickets": [], "orgs": [{}] * 2}
+        self.assertEqual(
+            partition(groups, chunk_size=2),
+            [("users", 0, 2), ("users", 2, 4), ("users", 4, 5), ("orgs", 0, 2)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
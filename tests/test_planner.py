@@ -0,0 +1,111 @@
+import context
+from planner import Planner, Term, And, Not, parse_filter
+from search import Search
+from relations import normalise
+import unittest
+
+
+def matches(record, clause):
+    # evaluates the clause against the record directly, as the planner should
+    if isinstance(clause, Term):
+        value = record.get(clause.field)
+        values = value if type(value) is list else [value]
+        return clause.field in record and clause.value in (normalise(item) for item in values)
+    if isinstance(clause, Not):
+        return not matches(record, clause.clause)
+    if isinstance(clause, And):
+        return all(matches(record, inner) for inner in clause.clauses)
+    return any(matches(record, inner) for inner in clause.clauses)
+
+
+class TestParseFilter(unittest.TestCase):
+    def test_precedence(self):
+        clause = parse_filter("status=pending AND priority=high OR NOT tags=Ohio AND via=web")
+        self.assertEqual(str(clause), "((status=pending AND priority=high) OR (NOT tags=ohio AND via=web))")
+
+    def test_brackets_and_quotes(self):
+        clause = parse_filter('status = pending and (tags="New York" or not (type=task))')
+        self.assertEqual(str(clause), "(status=pending AND (tags=new york OR NOT type=task))")
+
+    def test_errors(self):
+        for text in ["", "status", "status=", "status=pending AND", "(status=pending", "status=pending)", "AND=1", 'status="open']:
+            self.assertRaises(ValueError, parse_filter, text)
+
+
+class TestPlanner(unittest.TestCase):
+    def setUp(self):
+        self.search = Search("data/users.json", "data/tickets.json", "data/organizations.json")
+        self.search.build_search()
+
+    def ids(self, results):
+        return [entry.data["_id"] for entry in results]
+
+    def scan(self, clause, group):
+        return [record["_id"] for record in self.search.groups[group] if matches(record, clause)]
+
+    def test_matches_scan(self):
+        for text, group in [
+            ("status=pending AND priority=high AND tags=Ohio", "tickets"),
+            ("status=pending OR status=hold OR via=chat", "tickets"),
+            ("(status=pending OR status=hold) AND NOT priority=high AND NOT via=web", "tickets"),
+            ("NOT active=true", "users"),
+            ("role=admin AND NOT (verified=true OR suspended=true)", "users"),
+            ("tags=nowhere AND status=open", "tickets"),
+            ("domain_names=zentix.com OR shared_tickets=true", "orgs"),
+        ]:
+            clause = parse_filter(text)
+            self.assertEqual(self.ids(self.search.structured_search(clause, group)), self.scan(clause, group), text)
+
+    def test_limit_and_offset(self):
+        results = self.ids(self.search.structured_search("status=open", "tickets"))
+        self.assertEqual(self.ids(self.search.structured_search("status=open", "tickets", limit=3, offset=2)), results[2:5])
+
+    def test_most_selective_first(self):
+        planner = Planner(self.search, "tickets")
+        step = planner.plan(parse_filter("priority=high AND NOT via=web AND tags=Ohio AND status=pending"))
+        self.assertEqual([str(inner.clause) for inner in step.steps], ["tags=ohio", "status=pending", "priority=high", "NOT via=web"])
+        self.assertEqual([inner.estimate for inner in step.steps[:3]], [14, 45, 64])
+        planner.run(step)
+        self.assertEqual([inner.kept for inner in step.steps], [14, 3, 3, 1])
+        self.assertEqual(step.actual, 1)
+
+    def test_filters_few_records(self):
+        # 3 records are left after status, far fewer than the postings of priority
+        planner = Planner(self.search, "tickets")
+        step = planner.plan(parse_filter("priority=high AND tags=Ohio AND status=pending"))
+        planner.run(step)
+        self.assertEqual([inner.operation for inner in step.steps], ["lookup", "lookup", "filter"])
+        self.assertEqual([inner.actual for inner in step.steps], [14, 45, None])
+        self.assertIn("filtered", planner.explain(step))
+        self.assertEqual(step.actual, 3)
+
+    def test_skips_after_empty(self):
+        planner = Planner(self.search, "tickets")
+        step = planner.plan(parse_filter("tags=nowhere AND status=open"))
+        planner.run(step)
+        self.assertEqual([inner.actual for inner in step.steps], [0, None])
+
+    def test_explain(self):
+        lines = self.search.explain("status=pending AND tags=Ohio", "tickets").splitlines()
+        self.assertEqual(lines[0], "tickets: (status=pending AND tags=ohio)")
+        self.assertEqual(lines[1].split(), ["AND", "estimated", "14", "actual", "3"])
+        self.assertEqual(lines[2].split(), ["tags=ohio", "estimated", "14", "actual", "14", "kept", "14"])
+        self.assertEqual(lines[3].split(), ["status=pending", "estimated", "45", "actual", "45", "kept", "3"])
+
+    def test_update(self):
+        ticket = self.search.tickets[0]
+        self.search.update_item("tickets", ticket["_id"], dict(ticket, status="escalated", priority="high"))
+        self.assertEqual(self.ids(self.search.structured_search("status=escalated AND priority=high", "tickets")), [ticket["_id"]])
+
+    def test_negation_after_writes(self):
+        # the docs of the group come from the record table, without the facet index
+        ticket = self.search.tickets[0]
+        self.search.delete_item("tickets", ticket["_id"])
+        self.search.add_item({"_id": "new", "status": "open"}, "tickets")
+        clause = parse_filter("NOT status=pending")
+        self.assertEqual(self.ids(self.search.structured_search(clause, "tickets")), self.scan(clause, "tickets"))
+        self.assertIsNone(self.search.facet_index)
+
+
+if __name__ == "__main__":
+    unittest.main()
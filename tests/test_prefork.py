@@ -0,0 +1,37 @@
+import context
+from prefork import prefork, memory_usage
+import os
+import sys
+import gc
+import unittest
+
+
+@unittest.skipUnless(hasattr(os, "fork") and os.path.exists("/proc/self/smaps_rollup"), "needs fork and /proc")
+class TestPrefork(unittest.TestCase):
+    def tearDown(self):
+        gc.unfreeze()
+
+    def test_runs_every_worker(self):
+        read_end, write_end = os.pipe()
+
+        def work(worker):
+            os.write(write_end, f"{worker}\n".encode())
+
+        self.assertEqual(prefork(3, work), [0, 0, 0])
+        os.close(write_end)
+        with os.fdopen(read_end, "r") as f:
+            self.assertEqual(sorted(f.read().split()), ["0", "1", "2"])
+
+    def test_failed_worker(self):
+        def work(worker):
+            if worker == 1:
+                sys.stderr = open(os.devnull, "w")
+                raise RuntimeError("worker failed")
+
+        self.assertEqual(prefork(2, work), [0, 1])
+
+    def test_memory_usage(self):
+        usage = memory_usage()
+        self.assertEqual(set(usage), {"rss_kib", "pss_kib", "uss_kib"})
+        self.assertLessEqual(usage["uss_kib"], usage["pss_kib"])
+        self.assertLessEqual(usage["pss_kib"], usage["rss_kib"])
@@ -0,0 +1,125 @@
+import context
+from range_index import RangeIndex, RangeColumn, parse_value, parse_bound, NUMBER, TIMESTAMP
+from records import RecordTable
+from search import Search
+from query import Query
+import unittest
+
+
+class TestParse(unittest.TestCase):
+    def test_parse_value(self):
+        self.assertEqual(parse_value(104), (NUMBER, 104.0))
+        self.assertEqual(parse_value("2016-04-15T05:19:46 -10:00"), (TIMESTAMP, 1460733586.0))
+        self.assertEqual(parse_value("2016-04-15T15:19:46Z"), (TIMESTAMP, 1460733586.0))
+        self.assertEqual(parse_value(True), None)
+        self.assertEqual(parse_value("8335-422-718"), None)
+        self.assertEqual(parse_value(["2016-04-15"]), None)
+
+    def test_parse_bound(self):
+        self.assertEqual(parse_bound(TIMESTAMP, "2016-04-15"), 1460678400.0)
+        self.assertEqual(parse_bound(NUMBER, "104"), 104.0)
+        self.assertEqual(parse_bound(NUMBER, ""), None)
+        self.assertRaises(ValueError, lambda: parse_bound(TIMESTAMP, "last tuesday"))
+        self.assertRaises(ValueError, lambda: parse_bound(NUMBER, "many"))
+
+
+class TestRangeColumn(unittest.TestCase):
+    def test_bounds_sorts_once(self):
+        column = RangeColumn(NUMBER)
+        for key, posting in [(3.0, 30), (1.0, 10), (2.0, 20), (2.0, 21)]:
+            column.add(key, posting)
+        self.assertFalse(column.ordered)
+        self.assertEqual(column.bounds(2.0, 3.0), (1, 3))
+        self.assertEqual(list(column.postings), [10, 20, 21, 30])
+        self.assertEqual(column.bounds(), (0, 4))
+        self.assertEqual(column.bounds(4.0, None), (4, 4))
+        self.assertEqual(column.bounds(3.0, 1.0), (3, 3))
+
+    def test_remove(self):
+        column = RangeColumn(NUMBER)
+        for key, posting in [(1.0, 10), (2.0, 20), (2.0, 21)]:
+            column.add(key, posting)
+        column.remove(2.0, 21)
+        self.assertEqual(list(column.postings), [10, 20])
+
+    def test_inserted_in_place_once_sorted(self):
+        column = RangeColumn(NUMBER)
+        for key, posting in [(3.0, 30), (1.0, 10)]:
+            column.add(key, posting)
+        column.bounds()
+        for key, posting in [(2.0, 20), (1.0, 11), (4.0, 40)]:
+            column.add(key, posting)
+        self.assertTrue(column.ordered)
+        self.assertEqual(list(column.keys), [1.0, 1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(list(column.postings), [10, 11, 20, 30, 40])
+        column.remove(1.0, 10)
+        self.assertEqual(list(column.postings), [11, 20, 30, 40])
+
+
+class TestRangeIndex(unittest.TestCase):
+    def setUp(self):
+        self.table = RecordTable()
+        self.index = RangeIndex()
+        self.records = [
+            {"_id": 1, "due_at": "2016-07-31T02:37:50 -10:00"},
+            {"_id": 2, "due_at": "2016-08-15T05:37:32 -10:00"},
+            {"_id": 3, "due_at": "not a date"},
+        ]
+        for record in self.records:
+            self.index.add_record(self.table, self.table.add(record, "tickets"), record, "tickets")
+
+    def ids(self, postings):
+        return [self.table.entry(posting).data["_id"] for posting in postings]
+
+    def test_search(self):
+        self.assertEqual(self.ids(self.index.search("due_at", ["tickets"], high="2016-08-01")), [1])
+        self.assertEqual(self.ids(self.index.search("due_at", ["tickets"], low="2016-08-01")), [2])
+        self.assertEqual(self.ids(self.index.search("_id", ["tickets"], 2, 4)), [2, 3])
+        self.assertEqual(self.ids(self.index.search("due_at", ["users"])), [])
+
+    def test_remove_record(self):
+        for doc, record in enumerate(self.records):
+            self.index.remove_record(self.table, doc, record, "tickets")
+        self.assertEqual(self.index.columns, {})
+
+
+class TestSearchRange(unittest.TestCase):
+    def setUp(self):
+        self.search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+        )
+        self.search.build_search()
+
+    def ids(self, results):
+        return [entry.data["_id"] for entry in results]
+
+    def test_range_search_matches_scan(self):
+        results = list(self.search.range_search("last_login_at", "users", high="2013-01-01"))
+        self.assertEqual(self.ids(results), [2, 4])
+        self.assertEqual([entry.field for entry in results], ["last_login_at", "last_login_at"])
+        self.assertEqual(results[0].string, "2012-04-12t04:03:28 -10:00")
+
+    def test_range_search_across_groups(self):
+        results = self.search.range_search("organization_id", low=116, high=119)
+        self.assertEqual([(entry.group, entry.data["organization_id"]) for entry in results], [("tickets", 116), ("tickets", 118)])
+        results = self.search.range_search("organization_id", low=119, high=120)
+        self.assertEqual([entry.group for entry in results], ["users"])
+
+    def test_range_search_match_and_limit(self):
+        match = Query("solved", field="status", group="tickets")
+        results = self.search.range_search("due_at", "tickets", low="2016-08-01", match=match)
+        self.assertEqual(self.ids(results), ["4cce7415-ef12-42b6-b7b5-fb00e24f9cc1", "87db32c5-76a3-4069-954c-7d59c6c21de0"])
+        results = self.search.range_search("due_at", "tickets", limit=2, offset=1)
+        self.assertEqual(len(list(results)), 2)
+
+    def test_update_moves_value(self):
+        ticket = self.search.tickets[0]
+        self.search.update_item("tickets", ticket["_id"], dict(ticket, due_at="2020-01-01T00:00:00 -10:00"))
+        results = list(self.search.range_search("due_at", "tickets", low="2019-01-01"))
+        self.assertEqual(self.ids(results), [ticket["_id"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
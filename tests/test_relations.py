@@ -0,0 +1,83 @@
+import context
+from relations import RelationIndex
+from records import RecordTable
+from search import Search
+import unittest
+
+
+class TestRelationIndex(unittest.TestCase):
+    def setUp(self):
+        self.table = RecordTable()
+        self.index = RelationIndex(self.table)
+        self.org = {"_id": 101, "name": "Enthaze"}
+        self.user = {"_id": 1, "name": "Francisca", "organization_id": 101}
+        self.ticket = {"_id": "abc", "submitter_id": 1, "assignee_id": 2, "organization_id": 101}
+        self.add(self.org, "orgs")
+        self.add(self.user, "users")
+        self.add(self.ticket, "tickets")
+
+    def add(self, record, group):
+        doc = self.table.add(record, group)
+        self.index.add(doc, record, group)
+        return doc
+
+    def test_related_org(self):
+        related = self.index.related(self.org, "orgs")
+        self.assertEqual(related["users"], [self.user])
+        self.assertEqual(related["tickets"], [self.ticket])
+
+    def test_related_user(self):
+        related = self.index.related(self.user, "users")
+        self.assertEqual(related["org"], [self.org])
+        self.assertEqual(related["submitted_tickets"], [self.ticket])
+        self.assertEqual(related["assigned_tickets"], [])
+
+    def test_related_ticket(self):
+        related = self.index.related(self.ticket, "tickets")
+        self.assertEqual(related["submitter"], [self.user])
+        self.assertEqual(related["assignee"], [])
+        self.assertEqual(related["org"], [self.org])
+
+    def test_related_missing_field(self):
+        user = {"_id": 7}
+        self.add(user, "users")
+        related = self.index.related(user, "users")
+        self.assertEqual(related["org"], [])
+
+    def test_lookup_normalises_value(self):
+        self.assertEqual(self.index.lookup("orgs", "_id", "101"), [self.org])
+
+    def test_remove(self):
+        self.index.remove(1, self.user, "users")
+        self.assertEqual(self.index.related(self.org, "orgs")["users"], [])
+        self.assertEqual(self.index.related(self.ticket, "tickets")["submitter"], [])
+
+
+class TestSearchRelated(unittest.TestCase):
+    def setUp(self):
+        self.search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+        )
+        self.search.build_search()
+
+    def test_get_related_org(self):
+        org = self.search.field_and_group_search(query_string="104", field="_id", group="orgs")[0]
+        related = self.search.get_related(org.data, "orgs")
+        self.assertEqual([user["_id"] for user in related["users"]], [3])
+        self.assertEqual(
+            [ticket["_id"] for ticket in related["tickets"]], ["4cce7415-ef12-42b6-b7b5-fb00e24f9cc1"]
+        )
+
+    def test_related_matches_text_search(self):
+        for ticket in self.search.tickets:
+            related = self.search.get_related(ticket, "tickets")
+            expected = self.search.field_and_group_search(
+                query_string=ticket["organization_id"], field="_id", group="orgs"
+            )
+            self.assertEqual(related["org"], [entry.data for entry in expected or []])
+
+
+if __name__ == "__main__":
+    unittest.main()
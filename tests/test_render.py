@@ -0,0 +1,77 @@
+import context
+from render import Renderer, TextRenderer, JsonRenderer, TableRenderer, YamlRenderer, related_summary
+from search import Search
+from query import Query
+import io
+import json
+import yaml
+import unittest
+
+
+class TestRenderers(unittest.TestCase):
+    def setUp(self):
+        self.record = {"_id": 1, "name": "Francisca", "active": True, "tags": ["Ohio", "Utah"], "org": ["Name: Enthaze | ID: 101"]}
+
+    def test_renderer_is_abstract(self):
+        self.assertRaises(TypeError, Renderer)
+
+    def test_text(self):
+        renderer = TextRenderer({"users": {"_id": None, "active": None, "name": None, "tags": None}})
+        self.assertEqual(
+            renderer.render("users", self.record),
+            "User\n_id: 1\nactive: true\nname: Francisca\ntags:\n  - Ohio\n  - Utah\norg:\n  - Name: Enthaze | ID: 101\n",
+        )
+
+    def test_text_new_field(self):
+        renderer = TextRenderer({"users": {"_id": None}})
+        self.assertEqual(renderer.render("users", {"_id": 1, "extra": None}), "User\n_id: 1\nextra: null\n")
+
+    def test_json(self):
+        line = JsonRenderer().render("users", self.record)
+        self.assertTrue(line.endswith("\n"))
+        self.assertEqual(json.loads(line), {"group": "users", "record": self.record})
+        self.assertEqual(JsonRenderer().start(3), "")
+
+    def test_table(self):
+        renderer = TableRenderer()
+        self.assertEqual(renderer.render("tickets", {"_id": "abc", "subject": "x" * 80}), f"{'tickets':<8}{'abc':<38}{'x' * 57}...\n")
+        self.assertTrue(renderer.start(2).startswith("2 found!\ngroup"))
+
+    def test_yaml(self):
+        rendered = YamlRenderer().render("users", self.record)
+        self.assertEqual(yaml.safe_load(rendered[len("User\n") :]), self.record)
+
+    def test_related_summary(self):
+        self.assertEqual(related_summary({"_id": "abc", "subject": "Help"}, "tickets"), "Subject: Help | ID: abc")
+        self.assertEqual(related_summary({"_id": 101}, "orgs"), "Name: None | ID: 101")
+
+
+class TestSearchOutput(unittest.TestCase):
+    def setUp(self):
+        self.output = io.StringIO()
+        self.search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+            output_format="json",
+            output=self.output,
+        )
+        self.search.build_search()
+
+    def test_output_results(self):
+        results = self.search.field_and_group_search(Query("104", field="_id", group="orgs"))
+        self.search.output_results(results)
+        lines = [json.loads(line) for line in self.output.getvalue().splitlines()]
+        self.assertEqual([line["record"]["_id"] for line in lines], [104])
+        self.assertEqual(lines[0]["record"]["users"], ["Name: Ingrid Wagner | ID: 3"])
+        # the related summaries are not written into the indexed record
+        self.assertNotIn("users", results[0].data)
+
+    def test_output_no_results(self):
+        self.search.set_output("text", self.output)
+        self.search.output_results(None)
+        self.assertEqual(self.output.getvalue(), "No Results Found!\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,6 +18,11 @@ class TestData:
         with open(filepath, "r") as f:
             return json.load(f)
 
+def summarise(entries):
+    # Entries are created for each search, so they are compared by value
+    return [(id(entry.data), entry.string, entry.field, entry.group) for entry in entries or []]
+
+
 class TestSearch(unittest.TestCase):
     test_data = TestData()
 
@@ -45,12 +50,12 @@ class TestSearch(unittest.TestCase):
             if type(value) is list:
                 for index, item in enumerate(value):
                     entry = Entry(user, item, field, "users")
-                    result = search.trie.retrieve(entry.string)[0]
+                    result = search.records.entry(search.trie.retrieve(entry.string)[0], entry.string)
                     expected = str(value[index]).lower()
                     self.assertEqual(expected, result.string)
             else:
                 entry = Entry(user, user[field], field, "users")
-                result = search.trie.retrieve(entry.string)[0]
+                result = search.records.entry(search.trie.retrieve(entry.string)[0], entry.string)
                 expected = str(value).lower()
                 self.assertEqual(expected, result.string)
 
@@ -84,5 +89,76 @@ class TestSearch(unittest.TestCase):
             if entry.group == "tickets":
                 self.assertEqual(str(entry.data["_id"]), "4cce7415-ef12-42b6-b7b5-fb00e24f9cc1")
 
+    def test_field_and_group_search_matches_filter(self):
+        search = Search(self.test_data.user, self.test_data.ticket, self.test_data.org)
+        search.build_search()
+        for string, field, group in [("104", "organization_id", "tickets"), ("true", "active", "users")]:
+            query = Query(string, field=field, group=group)
+            expected = search.filter_results(query, search.freeform_search(query))
+            self.assertEqual(summarise(search.field_and_group_search(query)), summarise(expected))
+
+    def test_field_and_group_search_no_results(self):
+        search = Search(self.test_data.user, self.test_data.ticket, self.test_data.org)
+        search.build_search()
+        results = search.field_and_group_search(query_string="104", field="name", group="orgs")
+        self.assertEqual(results, None)
+
+    def test_stream_matches_load(self):
+        search = Search(self.test_data.user, self.test_data.ticket, self.test_data.org)
+        search.build_search()
+        streamed = Search(self.test_data.user, self.test_data.ticket, self.test_data.org, stream=True)
+        streamed.build_search()
+
+        self.assertEqual(streamed.groups, search.groups)
+        self.assertEqual(streamed.user_fields, search.user_fields)
+        for string in ["104", "", "pending"]:
+            expected = [(entry.string, entry.field, entry.group) for entry in search.freeform_search(Query(string))]
+            results = [(entry.string, entry.field, entry.group) for entry in streamed.freeform_search(Query(string))]
+            self.assertEqual(results, expected)
+
+    def test_stream_malformed_input_file(self):
+        search = Search(self.test_data.user, self.test_data.malformed_json, self.test_data.org, stream=True)
+        self.assertRaises(ValueError, search.build_search)
+
+    def test_stream_file_not_found(self):
+        search = Search(self.test_data.user, self.test_data.ticket, "not_a_real_file.json", stream=True)
+        self.assertRaises(FileNotFoundError, search.build_search)
+
+    def test_prefix_search(self):
+        search = Search(self.test_data.user, self.test_data.ticket, self.test_data.org)
+        search.build_search()
+        results = list(search.prefix_search(Query("http://initech")))
+        self.assertEqual(len(results), 16)
+        self.assertTrue(all(entry.string.startswith("http://initech") for entry in results))
+
+    def test_prefix_search_field_and_group(self):
+        search = Search(self.test_data.user, self.test_data.ticket, self.test_data.org)
+        search.build_search()
+        results = list(search.prefix_search(Query("http://initech", field="url", group="users")))
+        self.assertEqual(sorted(entry.data["_id"] for entry in results), [1, 2, 3, 4, 5])
+
+    def test_prefix_search_limit_and_offset(self):
+        search = Search(self.test_data.user, self.test_data.ticket, self.test_data.org)
+        search.build_search()
+        everything = summarise(search.prefix_search(Query("http://initech")))
+        self.assertEqual(summarise(search.prefix_search(Query("http://initech"), limit=5)), everything[:5])
+        self.assertEqual(summarise(search.prefix_search(Query("http://initech"), limit=5, offset=10)), everything[10:15])
+        self.assertEqual(list(search.prefix_search(Query("nothere"), limit=5)), [])
+
+    def test_fuzzy_freeform_search(self):
+        search = Search(self.test_data.user, self.test_data.ticket, self.test_data.org)
+        search.build_search()
+        self.assertEqual(search.freeform_search(Query("rasmusen")), False)
+        results = search.freeform_search(Query("coffeyrasmusen@flotonic.com", fuzziness=1))
+        self.assertEqual([entry.data["_id"] for entry in results], [1])
+
+    def test_fuzzy_field_and_group_search(self):
+        search = Search(self.test_data.user, self.test_data.ticket, self.test_data.org)
+        search.build_search()
+        query = Query("enthase", field="name", group="orgs", fuzziness=1)
+        self.assertEqual([entry.data["_id"] for entry in search.field_and_group_search(query)], [101])
+        query = Query("enthase", field="name", group="users", fuzziness=1)
+        self.assertEqual(search.field_and_group_search(query), [])
+
 if __name__ == "__main__":
     unittest.main()
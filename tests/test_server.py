@@ -0,0 +1,126 @@
+import context
+from server import SearchServer, parse_address, MAX_BODY
+from search import Search
+import io
+import asyncio
+import json
+import contextlib
+import unittest
+
+
+async def request(port, target, method="GET", close=False):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    headers = "Connection: close\r\n" if close else ""
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode())
+    await writer.drain()
+    status, body = await read_response(reader)
+    writer.close()
+    return status, body
+
+
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+class TestSearchServer(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.search = Search("data/users.json", "data/tickets.json", "data/organizations.json")
+        cls.search.build_search()
+
+    async def asyncSetUp(self):
+        self.server = SearchServer(self.search)
+        self.listener = await self.server.start("127.0.0.1", 0)
+        self.port = self.listener.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.listener.close()
+        await self.listener.wait_closed()
+        self.server.close()
+
+    async def test_field_and_group_search(self):
+        status, body = await request(self.port, "/search?query=101&field=_id&group=orgs")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["count"], 1)
+        result = body["results"][0]
+        self.assertEqual((result["group"], result["field"]), ("orgs", "_id"))
+        self.assertEqual(result["record"]["name"], "Enthaze")
+        self.assertIn("tickets", result["record"])
+
+    async def test_freeform_search_pages(self):
+        status, body = await request(self.port, "/search?query=ohio&limit=1&offset=1")
+        self.assertEqual(status, 200)
+        self.assertGreater(body["count"], 1)
+        self.assertEqual(len(body["results"]), 1)
+
+    async def test_bad_requests(self):
+        self.assertEqual((await request(self.port, "/search"))[0], 400)
+        self.assertEqual((await request(self.port, "/search?query=1&group=nope"))[0], 400)
+        self.assertEqual((await request(self.port, "/search?query=1&limit=x"))[0], 400)
+        self.assertEqual((await request(self.port, "/search?query=1&limit=-1"))[0], 400)
+        self.assertEqual((await request(self.port, "/search?query=1&offset=-5"))[0], 400)
+        self.assertEqual((await request(self.port, "/search?query=1&fuzziness=3"))[0], 400)
+        self.assertEqual((await request(self.port, "/search?query=1&fuzziness=2"))[0], 200)
+        self.assertEqual((await request(self.port, "/nope"))[0], 404)
+        self.assertEqual((await request(self.port, "/search?query=1", method="POST"))[0], 405)
+
+    async def test_bad_content_length(self):
+        for length in ["abc", "-1"]:
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+            writer.write(f"GET /health HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+            await writer.drain()
+            status, body = await read_response(reader)
+            self.assertEqual(status, 400)
+            self.assertIn("Content-Length", body["error"])
+            writer.close()
+
+    async def test_body_too_large(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(f"GET /health HTTP/1.1\r\nContent-Length: {MAX_BODY + 1}\r\n\r\n".encode())
+        await writer.drain()
+        status, body = await read_response(reader)
+        self.assertEqual(status, 413)
+        self.assertIn("limited", body["error"])
+        writer.close()
+
+    async def test_route_error(self):
+        def fail(params):
+            raise KeyError("broken")
+
+        self.server.routes["/fail"] = fail
+        with contextlib.redirect_stderr(io.StringIO()) as log:
+            status, body = await request(self.port, "/fail")
+        self.assertEqual((status, body), (500, {"error": "Internal server error"}))
+        self.assertIn("KeyError", log.getvalue())
+        # the connection and the server are still usable afterwards
+        self.assertEqual((await request(self.port, "/health"))[0], 200)
+
+    async def test_keep_alive(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        for _ in range(3):
+            writer.write(b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            status, body = await read_response(reader)
+            self.assertEqual(status, 200)
+            self.assertEqual(body["records"], {"users": 75, "tickets": 200, "orgs": 25})
+        writer.close()
+
+    async def test_concurrent_requests(self):
+        targets = [f"/search?query={_id}&field=_id&group=users" for _id in range(1, 21)]
+        responses = await asyncio.gather(*(request(self.port, target, close=True) for target in targets))
+        self.assertEqual([body["results"][0]["record"]["_id"] for _, body in responses], list(range(1, 21)))
+
+
+class TestParseAddress(unittest.TestCase):
+    def test_parse_address(self):
+        self.assertEqual(parse_address("8080"), ("127.0.0.1", 8080))
+        self.assertEqual(parse_address("0.0.0.0:80"), ("0.0.0.0", 80))
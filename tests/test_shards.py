@@ -0,0 +1,135 @@
+import context
+from context import summarise
+from shards import ShardedSearch, shard_of
+from search import Search
+from query import Query
+import io
+import unittest
+from contextlib import redirect_stdout
+
+SOURCES = ("tests/test_data/users_data.json", "tests/test_data/tickets_data.json", "tests/test_data/orgs_data.json")
+
+
+def related_ids(related):
+    return {key: sorted(str(record["_id"]) for record in records) for key, records in related.items()}
+
+
+class TestShardedSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.search = Search(*SOURCES)
+        cls.search.build_search()
+        cls.sharded = ShardedSearch(*SOURCES, shards=3)
+        cls.sharded.build_search()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sharded.close()
+
+    def test_shard_of(self):
+        self.assertEqual(shard_of(101, 4), shard_of("101", 4))
+        self.assertEqual({shard_of(_id, 3) for _id in range(100)}, {0, 1, 2})
+
+    def test_records_are_partitioned(self):
+        for group, records in self.search.groups.items():
+            self.assertEqual(len(self.sharded.groups[group]), len(records))
+            self.assertEqual(sorted(str(record["_id"]) for record in self.sharded.groups[group]), sorted(str(record["_id"]) for record in records))
+        self.assertTrue(all(counts["tickets"] for counts in self.sharded.shard_counts))
+        self.assertEqual(self.sharded.user_fields.keys(), self.search.user_fields.keys())
+
+    def test_freeform_search(self):
+        for string in ["101", "true", "ohio", "nothere"]:
+            query = Query(string)
+            self.assertEqual(summarise(self.sharded.freeform_search(query)), summarise(self.search.freeform_search(query)))
+        results = self.sharded.freeform_search(Query("101"))
+        self.assertEqual([entry.group for entry in results], sorted((entry.group for entry in results), key=("users", "tickets", "orgs").index))
+        self.assertFalse(self.sharded.freeform_search(Query("nothere")))
+
+    def test_fuzzy_search(self):
+        query = Query("enthase", fuzziness=1)
+        self.assertEqual(summarise(self.sharded.freeform_search(query)), summarise(self.search.freeform_search(Query("enthase", fuzziness=1))))
+
+    def test_field_and_group_search(self):
+        for string, field, group in [("101", "_id", "orgs"), ("1", "_id", "users"), ("true", "active", "users"), ("101", "organization_id", None)]:
+            query = Query(string, field, group)
+            self.assertEqual(summarise(self.sharded.field_and_group_search(query)), summarise(self.search.field_and_group_search(query)))
+
+    def test_prefix_search(self):
+        query = Query("1")
+        self.assertEqual(summarise(self.sharded.prefix_search(query)), summarise(self.search.prefix_search(query)))
+        page = list(self.sharded.prefix_search(query, limit=5, offset=3))
+        self.assertEqual(summarise(page), summarise(list(self.sharded.prefix_search(query))[3:8]))
+
+    def test_substring_search(self):
+        query = Query("flotonic")
+        self.assertEqual(summarise(self.sharded.substring_search(query)), summarise(self.search.substring_search(query)))
+        page = list(self.sharded.substring_search(query, limit=2, offset=1))
+        self.assertEqual(summarise(page), summarise(list(self.sharded.substring_search(query))[1:3]))
+
+    def test_facets(self):
+        self.assertEqual(self.sharded.facets("tickets", limit=None), self.search.facets("tickets", limit=None))
+        query = Query("true", "active")
+        self.assertEqual(self.sharded.facets("users", query, limit=2), self.search.facets("users", query, limit=2))
+
+    def test_structured_search(self):
+        clause = "status=pending OR NOT priority=high"
+        self.assertEqual(summarise(self.sharded.structured_search(clause, "tickets")), summarise(self.search.structured_search(clause, "tickets")))
+        self.assertEqual(len(list(self.sharded.structured_search(clause, "tickets", limit=2))), 2)
+        self.assertEqual(self.sharded.explain(clause, "tickets").count("shard "), 3)
+
+    def test_text_search(self):
+        self.assertEqual(summarise(self.sharded.text_search("korea")), summarise(self.search.text_search("korea")))
+
+    def test_range_search(self):
+        results = list(self.sharded.range_search("_id", "users", 1, 5))
+        self.assertEqual([entry.data["_id"] for entry in results], [1, 2, 3, 4])
+        page = list(self.sharded.range_search("_id", "users", 1, 5, limit=2, offset=1))
+        self.assertEqual([entry.data["_id"] for entry in page], [2, 3])
+        self.assertEqual(sorted(self.sharded.range_fields("users")), sorted(self.search.range_fields("users")))
+        with self.assertRaises(ValueError):
+            list(self.sharded.range_search("_id", "users", "ten"))
+
+    def test_related_records_resolve_across_shards(self):
+        for group, records in self.search.groups.items():
+            for record in records:
+                self.assertEqual(related_ids(self.sharded.get_related(record, group)), related_ids(self.search.get_related(record, group)))
+
+    def test_output_results(self):
+        output = io.StringIO()
+        self.sharded.set_output("text", output)
+        self.sharded.output_results(self.sharded.field_and_group_search(Query("101", "_id", "orgs")))
+        self.assertIn("users:\n  - Name: Loraine Pittman | ID: 5\n", output.getvalue())
+
+    def test_find_item(self):
+        self.assertEqual(self.sharded.find_item("orgs", 101), self.search.find_item("orgs", 101))
+        with self.assertRaises(KeyError):
+            self.sharded.find_item("orgs", 1)
+
+
+class TestShardedUpdates(unittest.TestCase):
+    def setUp(self):
+        self.sharded = ShardedSearch(*SOURCES, shards=2)
+        self.sharded.build_search()
+
+    def tearDown(self):
+        self.sharded.close()
+
+    def test_add_update_delete(self):
+        self.sharded.add_item({"_id": 999, "name": "Zebulon"}, "users")
+        self.assertEqual(self.sharded.field_and_group_search(Query("zebulon", "name", "users"))[0].data["_id"], 999)
+        # a new _id may move the record to the other shard
+        for _id in range(1000, 1010):
+            self.sharded.update_item("users", _id - 1 if _id > 1000 else 999, {"_id": _id, "name": "Zebulon"})
+        self.assertEqual([entry.data["_id"] for entry in self.sharded.freeform_search(Query("zebulon"))], [1009])
+        self.assertEqual(len(self.sharded.users), 6)
+        self.sharded.delete_item("users", 1009)
+        self.assertFalse(self.sharded.freeform_search(Query("zebulon")))
+        self.assertEqual(len(self.sharded.users), 5)
+
+    def test_missing_file(self):
+        with redirect_stdout(io.StringIO()), self.assertRaises(FileNotFoundError):
+            ShardedSearch("not_a_real_file.json", *SOURCES[1:], shards=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
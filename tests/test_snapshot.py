@@ -0,0 +1,174 @@
+import context
+from search import Search
+from snapshot import Snapshot
+from query import Query
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.sources = []
+        for filename in ["users_data.json", "tickets_data.json", "orgs_data.json"]:
+            filepath = os.path.join(self.directory, filename)
+            shutil.copy(os.path.join("tests/test_data", filename), filepath)
+            self.sources.append(filepath)
+        self.snapshot_path = os.path.join(self.directory, "index.snapshot")
+        self.search = Search(*self.sources)
+        self.search.build_search()
+        self.search.save_snapshot(self.snapshot_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _summary(self, results):
+        if not results:
+            return results
+        return [(entry.string, entry.field, entry.group, entry.data) for entry in results]
+
+    def test_open_snapshot(self):
+        search = Search.open(*self.sources, self.snapshot_path)
+        self.assertIsInstance(search.trie, Snapshot)
+        self.assertEqual(list(search.users), self.search.users)
+        self.assertEqual(search.ticket_fields, self.search.ticket_fields)
+
+    def test_freeform_search_matches_build(self):
+        snapshot_search = Search.open(*self.sources, self.snapshot_path)
+        for string in ["104", "", "true", "pending", "ohio", "nothere"]:
+            query = Query(string)
+            self.assertEqual(
+                self._summary(snapshot_search.freeform_search(query)),
+                self._summary(self.search.freeform_search(query)),
+            )
+
+    def test_field_and_group_search_matches_build(self):
+        snapshot_search = Search.open(*self.sources, self.snapshot_path)
+        for string, field, group in [("104", "organization_id", "tickets"), ("true", "active", "users"), ("104", "_id", None)]:
+            query = Query(string, field=field, group=group)
+            self.assertEqual(
+                self._summary(snapshot_search.field_and_group_search(query)),
+                self._summary(self.search.field_and_group_search(query)),
+            )
+
+    def test_get_related_matches_build(self):
+        snapshot_search = Search.open(*self.sources, self.snapshot_path)
+        for group in ["users", "tickets", "orgs"]:
+            for record in snapshot_search.groups[group]:
+                self.assertEqual(
+                    snapshot_search.get_related(record, group), self.search.get_related(record, group)
+                )
+
+    def test_get_related_past_record_cache(self):
+        # records evicted from the snapshot's record cache are freed and their
+        # ids reused by the records decoded after them
+        with open("data/tickets.json", "r") as f:
+            tickets = json.load(f)
+        sources = ["data/users.json", os.path.join(self.directory, "tickets.json"), "data/organizations.json"]
+        with open(sources[1], "w") as f:
+            json.dump([dict(ticket, _id=f"{ticket['_id']}-{copy}") for copy in range(5) for ticket in tickets], f)
+        search = Search(*sources)
+        search.build_search()
+        search.save_snapshot(self.snapshot_path)
+        snapshot_search = Search.from_snapshot(Snapshot(self.snapshot_path, cache_size=16), sources)
+        for entry in snapshot_search.range_search("created_at", "tickets"):
+            self.assertEqual(
+                snapshot_search.get_related(entry.data, entry.group),
+                snapshot_search.relations.related(entry.data, entry.group),
+            )
+
+    def test_prefix_search_matches_build(self):
+        snapshot_search = Search.open(*self.sources, self.snapshot_path)
+        for prefix in ["http://initech.zendesk.com/api/v2/users", "1", "a", "nothere"]:
+            query = Query(prefix)
+            self.assertEqual(
+                sorted(self._summary(list(snapshot_search.prefix_search(query))), key=repr),
+                sorted(self._summary(list(self.search.prefix_search(query))), key=repr),
+            )
+
+    def test_substring_search_matches_build(self):
+        snapshot_search = Search.open(*self.sources, self.snapshot_path)
+        for fragment in ["zendesk.com/api", "flotonic", "o", "nothere"]:
+            query = Query(fragment)
+            self.assertEqual(
+                sorted(self._summary(list(snapshot_search.substring_search(query))), key=repr),
+                sorted(self._summary(list(self.search.substring_search(query))), key=repr),
+            )
+
+    def test_facets_match_build(self):
+        snapshot_search = Search.open(*self.sources, self.snapshot_path)
+        for group in ["users", "tickets", "orgs"]:
+            self.assertEqual(snapshot_search.facets(group, limit=None), self.search.facets(group, limit=None))
+
+    def test_structured_search_matches_build(self):
+        snapshot_search = Search.open(*self.sources, self.snapshot_path)
+        clause = "status=pending OR (priority=high AND NOT tags=ohio)"
+        self.assertEqual(
+            self._summary(list(snapshot_search.structured_search(clause, "tickets"))),
+            self._summary(list(self.search.structured_search(clause, "tickets"))),
+        )
+        self.assertEqual(snapshot_search.explain(clause, "tickets"), self.search.explain(clause, "tickets"))
+        clause = "NOT status=pending"
+        self.assertEqual(
+            self._summary(list(snapshot_search.structured_search(clause, "tickets"))),
+            self._summary(list(self.search.structured_search(clause, "tickets"))),
+        )
+
+    def test_text_search_matches_build(self):
+        snapshot_search = Search.open(*self.sources, self.snapshot_path)
+        self.assertEqual(
+            self._summary(snapshot_search.text_search("korea")), self._summary(self.search.text_search("korea"))
+        )
+
+    def test_fuzzy_search_matches_build(self):
+        snapshot_search = Search.open(*self.sources, self.snapshot_path)
+        for string in ["enthase", "coffeyrasmusen@flotonic.com", "10", "", "pendng"]:
+            for fuzziness in [1, 2]:
+                query = Query(string, fuzziness=fuzziness)
+                self.assertEqual(
+                    sorted(self._summary(snapshot_search.freeform_search(query)) or [], key=repr),
+                    sorted(self._summary(self.search.freeform_search(query)) or [], key=repr),
+                )
+
+    def test_freeze(self):
+        frozen = self.search.freeze()
+        self.assertIsInstance(frozen.trie, Snapshot)
+        self.assertIs(frozen.freeze(), frozen)
+        # the text and range indexes of the built search are kept
+        self.assertIs(frozen.text_index, self.search.text_index)
+        for string in ["104", "true", "ohio", "nothere"]:
+            query = Query(string)
+            self.assertEqual(
+                self._summary(frozen.freeform_search(query)), self._summary(self.search.freeform_search(query))
+            )
+        with self.assertRaises(ValueError):
+            frozen.delete_item("users", 1)
+
+    def test_freeze_to_path(self):
+        path = os.path.join(self.directory, "frozen.snapshot")
+        self.search.freeze(path)
+        self.assertIsInstance(Snapshot.open(path, self.sources), Snapshot)
+
+    def test_invalidated_when_source_changes(self):
+        stat = os.stat(self.sources[1])
+        os.utime(self.sources[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(Snapshot.open(self.snapshot_path, self.sources), None)
+
+        # opening rebuilds the search and replaces the stale snapshot
+        search = Search.open(*self.sources, self.snapshot_path)
+        self.assertNotIsInstance(search.trie, Snapshot)
+        self.assertIsInstance(Snapshot.open(self.snapshot_path, self.sources), Snapshot)
+
+    def test_missing_snapshot(self):
+        missing = os.path.join(self.directory, "missing.snapshot")
+        self.assertEqual(Snapshot.open(missing, self.sources), None)
+
+    def test_not_a_snapshot(self):
+        self.assertEqual(Snapshot.open(self.sources[0], self.sources), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import context
+import substring_index
+from substring_index import SubstringIndex, suffix_array
+from search import Search
+from query import Query
+import random
+import unittest
+
+
+class TestSuffixArray(unittest.TestCase):
+    def test_sorts_suffixes(self):
+        text = "mississippi"
+        suffixes = suffix_array([ord(char) for char in text])
+        self.assertEqual(list(suffixes), sorted(range(len(text)), key=lambda start: text[start:]))
+
+    def test_empty(self):
+        self.assertEqual(list(suffix_array([])), [])
+
+
+class TestSubstringIndex(unittest.TestCase):
+    def test_search(self):
+        index = SubstringIndex(["banana", "bandana", "cabana", "ana"])
+        self.assertEqual(sorted(index.search("ana")), ["ana", "banana", "bandana", "cabana"])
+        self.assertEqual(sorted(index.search("ban")), ["banana", "bandana", "cabana"])
+        self.assertEqual(list(index.search("nab")), [])
+        self.assertEqual(list(index.search("anab")), [])
+
+    def test_matches_do_not_cross_strings(self):
+        index = SubstringIndex(["abc", "def"])
+        self.assertEqual(list(index.search("cd")), [])
+        self.assertEqual(list(index.search("c\x00d")), [])
+
+    def test_string_at(self):
+        index = SubstringIndex(["ab", "", "cde"])
+        self.assertEqual([index.string_at(offset) for offset in range(len(index))], [0, 0, 0, 1, 2, 2, 2, 2])
+
+    def test_added_and_removed(self):
+        index = SubstringIndex(["banana", "cabana"])
+        index.add("bandana")
+        index.add("banana")
+        self.assertEqual(sorted(index.search("ban")), ["banana", "bandana", "cabana"])
+        # removed strings stay in the array, but not in the delta
+        index.discard("bandana")
+        index.discard("cabana")
+        self.assertEqual(sorted(index.search("ban")), ["banana", "cabana"])
+        self.assertEqual(index.removed, 1)
+
+    def test_stale(self):
+        minimum = substring_index.DELTA_MINIMUM
+        substring_index.DELTA_MINIMUM = 2
+        try:
+            index = SubstringIndex(["a", "b"])
+            index.add("c")
+            index.discard("a")
+            self.assertFalse(index.stale())
+            index.add("d")
+            self.assertTrue(index.stale())
+        finally:
+            substring_index.DELTA_MINIMUM = minimum
+
+    def test_matches_scan(self):
+        rng = random.Random(7)
+        strings = sorted(set("".join(rng.choice("abc") for _ in range(rng.randint(0, 8))) for _ in range(60)))
+        index = SubstringIndex(strings)
+        for pattern in ["a", "b", "ab", "cab", "abca", "ccc", ""]:
+            expected = [string for string in strings if pattern in string]
+            self.assertEqual(sorted(index.search(pattern)), expected)
+
+
+class TestSearchSubstring(unittest.TestCase):
+    def setUp(self):
+        self.search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+        )
+        self.search.build_search()
+
+    def test_email_domain(self):
+        results = list(self.search.substring_search(Query("flotonic", field="email", group="users")))
+        self.assertEqual(sorted(entry.data["_id"] for entry in results), [1, 2, 3, 4, 5])
+        self.assertEqual({entry.field for entry in results}, {"email"})
+
+    def test_url_fragment(self):
+        results = list(self.search.substring_search(Query("organizations/10", field="url")))
+        self.assertEqual(sorted(entry.data["_id"] for entry in results), [101, 102, 103, 104, 105, 106])
+        self.assertEqual({entry.group for entry in results}, {"orgs"})
+
+    def test_limit_and_offset(self):
+        query = Query("flotonic", field="email")
+        everything = [entry.data["_id"] for entry in self.search.substring_search(query)]
+        page = [entry.data["_id"] for entry in self.search.substring_search(query, limit=2, offset=1)]
+        self.assertEqual(page, everything[1:3])
+
+    def test_kept_after_update(self):
+        user = self.search.users[0]
+        email = user["email"]
+        self.assertTrue(list(self.search.substring_search(Query("flotonic", field="email"))))
+        index = self.search.substring_index
+        self.search.update_item("users", user["_id"], dict(user, email="someone@elsewhere.org"))
+        results = list(self.search.substring_search(Query("sewhere", field="email")))
+        self.assertEqual([entry.data["_id"] for entry in results], [user["_id"]])
+        self.assertIs(self.search.substring_index, index)
+        results = list(self.search.substring_search(Query(email, field="email")))
+        self.assertEqual(results, [])
+
+    def test_kept_after_add_and_delete(self):
+        list(self.search.substring_search(Query("flotonic")))
+        index = self.search.substring_index
+        self.search.add_item({"_id": 999, "name": "Quuxcorp"}, "orgs")
+        results = list(self.search.substring_search(Query("uxco", field="name")))
+        self.assertEqual([entry.data["_id"] for entry in results], [999])
+        self.search.delete_item("orgs", 999)
+        self.assertEqual(list(self.search.substring_search(Query("uxco"))), [])
+        self.assertIs(self.search.substring_index, index)
+
+    def test_built_before_freeze(self):
+        self.assertIsNone(self.search.substring_index)
+        frozen = self.search.freeze()
+        self.assertIsNotNone(frozen.substring_index)
+        self.assertIs(frozen.substring_index, self.search.substring_index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import context
+from text_index import Analyzer, InvertedIndex, intersect, union, STOPWORDS
+from records import RecordTable
+from search import Search
+from array import array
+import unittest
+
+
+class TestAnalyzer(unittest.TestCase):
+    def test_analyze(self):
+        analyzer = Analyzer()
+        self.assertEqual(analyzer.analyze("A Catastrophe in Korea (North)"), ["a", "catastrophe", "in", "korea", "north"])
+
+    def test_stopwords(self):
+        analyzer = Analyzer(STOPWORDS)
+        self.assertEqual(analyzer.analyze("A Catastrophe in Korea (North)"), ["catastrophe", "korea", "north"])
+
+    def test_accents_and_punctuation(self):
+        self.assertEqual(Analyzer().analyze("Don't Worry, Ştate!"), ["don", "t", "worry", "ştate"])
+
+
+class TestPostings(unittest.TestCase):
+    def test_intersect(self):
+        small = array("I", [3, 9, 40, 41])
+        large = array("I", range(0, 100, 3))
+        self.assertEqual(list(intersect(small, large)), [3, 9])
+        self.assertEqual(list(intersect(array("I"), large)), [])
+        self.assertEqual(list(intersect(array("I", [200]), large)), [])
+
+    def test_union(self):
+        self.assertEqual(list(union([array("I", [1, 4]), array("I", [2, 4, 6]), array("I")])), [1, 2, 4, 6])
+
+
+class TestInvertedIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.table = RecordTable()
+        self.first = {"_id": 1, "subject": "A Drama in Korea", "description": "Ipsum fugiat ipsum"}
+        self.second = {"_id": 2, "subject": "A Problem in Korea", "description": "Fugiat cupidatat"}
+        self.user = {"_id": 3, "signature": "Don't Worry Be Happy!"}
+        for record, group in [(self.first, "tickets"), (self.second, "tickets"), (self.user, "users")]:
+            self.index.add_record(self.table, self.table.add(record, group), record)
+
+    def documents(self, postings):
+        return [(entry.data, entry.field, entry.group) for entry in map(self.table.entry, postings)]
+
+    def test_search_and(self):
+        self.assertEqual(self.documents(self.index.search("fugiat CUPIDATAT")), [(self.second, "description", "tickets")])
+
+    def test_search_or(self):
+        results = self.documents(self.index.search("drama problem", operator="or"))
+        self.assertEqual(results, [(self.first, "subject", "tickets"), (self.second, "subject", "tickets")])
+
+    def test_search_repeated_token(self):
+        self.assertEqual(self.documents(self.index.search("ipsum")), [(self.first, "description", "tickets")])
+
+    def test_search_missing(self):
+        self.assertEqual(list(self.index.search("korea nothere")), [])
+        self.assertEqual(list(self.index.search("")), [])
+
+    def test_remove_record(self):
+        self.index.remove_record(self.table, 1, self.second)
+        self.assertEqual(self.documents(self.index.search("korea")), [(self.first, "subject", "tickets")])
+        self.assertNotIn("cupidatat", self.index.postings)
+
+
+class TestSearchText(unittest.TestCase):
+    def setUp(self):
+        self.search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+        )
+        self.search.build_search()
+
+    def test_text_search(self):
+        results = self.search.text_search("cupidatat")
+        self.assertTrue(results)
+        for entry in results:
+            self.assertIn("cupidatat", entry.data[entry.field].lower())
+
+    def test_text_search_field_and_group(self):
+        results = self.search.text_search("korea", field="subject", group="tickets")
+        self.assertEqual([entry.data["_id"] for entry in results], ["436bf9b0-1147-4c0a-8439-6f79833bff5b"])
+        self.assertEqual(self.search.text_search("korea", group="users"), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
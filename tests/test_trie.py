@@ -124,6 +124,106 @@ class TestTrie(unittest.TestCase):
         for index, result in enumerate(results):
             self.assertEqual(result[0].string,  test_cases[index].string)
 
+    def test_retrieve_after_edge_split(self):
+        words = ["banana", "band", "ban", "bandana", "b"]
+        test_cases = list(map(TestCase, words))
+        list(map(self.test_trie.add, test_cases))
+        for test_case in test_cases:
+            self.assertEqual(self.test_trie.retrieve(test_case.string), [test_case])
+        for word in ["ba", "bana", "bandanas", "an"]:
+            self.assertEqual(self.test_trie.retrieve(word), False)
+
+    def test_compressed_edges(self):
+        words = ["testing", "tester"]
+        list(map(self.test_trie.add, map(TestCase, words)))
+        node = self.test_trie.root.get_child("t")
+        self.assertEqual(node.label, "test")
+        self.assertEqual(sorted(child.label for child in node.children.values()), ["er", "ing"])
+
+    def test_add_empty_string_and_word(self):
+        test_cases = list(map(TestCase, ["", "word"]))
+        list(map(self.test_trie.add, test_cases))
+        self.assertEqual(self.test_trie.retrieve(""), [test_cases[0]])
+        self.assertEqual(self.test_trie.retrieve("word"), [test_cases[1]])
+
+    def test_iter_prefix(self):
+        test_cases = list(map(TestCase, ["banana", "band", "ban", "bandana", "apple"]))
+        list(map(self.test_trie.add, test_cases))
+
+        self.assertEqual(
+            sorted(case.string for case in self.test_trie.iter_prefix("ban")),
+            ["ban", "banana", "band", "bandana"],
+        )
+        # prefix ending part way along an edge
+        self.assertEqual(sorted(case.string for case in self.test_trie.iter_prefix("bana")), ["banana"])
+        self.assertEqual(len(list(self.test_trie.iter_prefix(""))), 5)
+        self.assertEqual(list(self.test_trie.iter_prefix("bandanas")), [])
+        self.assertEqual(list(self.test_trie.iter_prefix("c")), [])
+
+    def test_iter_prefix_is_lazy(self):
+        list(map(self.test_trie.add, map(TestCase, ["ab", "abc", "abd"])))
+        results = self.test_trie.iter_prefix("ab")
+        self.assertEqual(next(results).string, "ab")
+
+    def test_fuzzy_retrieve(self):
+        test_cases = list(map(TestCase, ["rasmussen", "rasmusen", "rassmussen", "hansen", "ras"]))
+        list(map(self.test_trie.add, test_cases))
+
+        results = [case.string for case in self.test_trie.fuzzy_retrieve("rasmussen", 1)]
+        self.assertEqual(results[0], "rasmussen")
+        self.assertEqual(sorted(results), ["rasmusen", "rasmussen", "rassmussen"])
+
+        results = [case.string for case in self.test_trie.fuzzy_retrieve("rasmusen", 0)]
+        self.assertEqual(results, ["rasmusen"])
+        self.assertEqual(self.test_trie.fuzzy_retrieve("nothere", 2), [])
+
+    def test_fuzzy_retrieve_matches_brute_force(self):
+        def distance(first, second):
+            row = list(range(len(second) + 1))
+            for index, char in enumerate(first, 1):
+                previous, row[0] = row[0], index
+                for column in range(1, len(second) + 1):
+                    previous, row[column] = row[column], min(
+                        row[column] + 1, row[column - 1] + 1, previous + (char != second[column - 1])
+                    )
+            return row[-1]
+
+        words = ["he", "her", "hers", "hi", "his", "she", "shell", "", "a", "hello", "help"]
+        list(map(self.test_trie.add, map(TestCase, words)))
+        for query in ["he", "hel", "sh", "", "xyz", "hers"]:
+            for max_distance in [0, 1, 2]:
+                expected = sorted(word for word in words if distance(word, query) <= max_distance)
+                results = sorted(case.string for case in self.test_trie.fuzzy_retrieve(query, max_distance))
+                self.assertEqual(results, expected)
+
+    def test_discard(self):
+        for item, word in enumerate(["he", "her", "hers", "hi"]):
+            self.test_trie.insert(word, item)
+
+        self.assertTrue(self.test_trie.discard("her", 1))
+        self.assertEqual(self.test_trie.retrieve("her"), False)
+        self.assertEqual(self.test_trie.retrieve("hers"), [2])
+        # "r" and "s" are merged back into a single edge
+        self.assertEqual(self.test_trie.root.get_child("h").get_child("e").get_child("r").label, "rs")
+
+        self.assertFalse(self.test_trie.discard("nothere", 1))
+        self.assertFalse(self.test_trie.discard("hers", 1))
+
+    def test_discard_one_item_only(self):
+        self.test_trie.insert("same", 1)
+        self.test_trie.insert("same", 2)
+        self.test_trie.discard("same", 1)
+        self.assertEqual(self.test_trie.retrieve("same"), [2])
+
+    def test_discard_everything(self):
+        words = ["banana", "band", "ban", "bandana", "b", ""]
+        for item, word in enumerate(words):
+            self.test_trie.insert(word, item)
+        for item, word in enumerate(words):
+            self.test_trie.discard(word, item)
+        self.assertEqual(self.test_trie.root.children, None)
+        self.assertEqual(self.test_trie.root.terminal, None)
+
 if __name__ == "__main__":
     unittest.main()
     
@@ -0,0 +1,139 @@
+import context
+from search import Search
+from query import Query
+import os
+import tempfile
+import unittest
+
+
+def trie_strings(search):
+    # updated records are re-added at the end, so order is not compared
+    strings = {}
+    for string, postings in search.trie.iter_terminals(""):
+        entries = [search.records.entry(posting, string) for posting in postings]
+        strings[string] = sorted((id(entry.data), entry.field, entry.group) for entry in entries)
+    return strings
+
+
+def node_count(node):
+    return 1 + sum(node_count(child) for child in (node.children or {}).values())
+
+
+class TestUpdateDelete(unittest.TestCase):
+    def setUp(self):
+        self.search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+        )
+        self.search.build_search()
+
+    def _rebuilt(self):
+        # a search built from scratch over the current records
+        search = Search(
+            "tests/test_data/users_data.json",
+            "tests/test_data/tickets_data.json",
+            "tests/test_data/orgs_data.json",
+        )
+        search.users, search.tickets, search.orgs = self.search.users, self.search.tickets, self.search.orgs
+        search.groups = self.search.groups
+        search.build_search()
+        return search
+
+    def test_update_item(self):
+        ticket = self.search.tickets[0]
+        updated = dict(ticket, status="solved", tags=["Ohio", "Utah"], subject="A Drama in Utah")
+        record = self.search.update_item("tickets", ticket["_id"], updated)
+
+        self.assertIs(record, ticket)
+        self.assertEqual(self.search.field_and_group_search(query_string="pending", field="status", group="tickets"), None)
+        results = self.search.field_and_group_search(query_string="solved", field="status", group="tickets")
+        self.assertIn(ticket, [entry.data for entry in results])
+        self.assertEqual(self.search.freeform_search(Query("pennsylvania")), False)
+        self.assertEqual([entry.data for entry in self.search.text_search("utah")], [ticket])
+        self.assertEqual(self.search.text_search("korea"), None)
+
+    def test_update_matches_rebuild(self):
+        ticket = self.search.tickets[2]
+        self.search.update_item("tickets", ticket["_id"], dict(ticket, organization_id=101, new_field="value"))
+        rebuilt = self._rebuilt()
+        self.assertEqual(trie_strings(self.search), trie_strings(rebuilt))
+        self.assertEqual(node_count(self.search.trie.root), node_count(rebuilt.trie.root))
+        self.assertIn("new_field", self.search.ticket_fields)
+        org = self.search.find_item("orgs", 101)
+        self.assertIn(ticket, self.search.get_related(org, "orgs")["tickets"])
+
+    def test_delete_item(self):
+        user = self.search.find_item("users", 3)
+        self.search.delete_item("users", 3)
+
+        self.assertNotIn(user, self.search.users)
+        self.assertRaises(KeyError, lambda: self.search.find_item("users", 3))
+        org = self.search.find_item("orgs", 104)
+        self.assertEqual(self.search.get_related(org, "orgs")["users"], [])
+        rebuilt = self._rebuilt()
+        self.assertEqual(trie_strings(self.search), trie_strings(rebuilt))
+        self.assertEqual(node_count(self.search.trie.root), node_count(rebuilt.trie.root))
+
+    def test_delete_after_updates_and_adds(self):
+        self.search.add_item({"_id": 999, "name": "New Org"}, "orgs")
+        self.search.delete_item("orgs", 999)
+        self.assertRaises(KeyError, lambda: self.search.find_item("orgs", 999))
+        for ticket in list(self.search.tickets[:3]):
+            self.search.update_item("tickets", ticket["_id"], dict(ticket, status="solved"))
+        for ticket in list(self.search.tickets[1:4]):
+            self.search.delete_item("tickets", ticket["_id"])
+            self.assertNotIn(ticket["_id"], [other["_id"] for other in self.search.tickets])
+        rebuilt = self._rebuilt()
+        self.assertEqual(trie_strings(self.search), trie_strings(rebuilt))
+        self.assertEqual(self.search.field_index.index.keys(), rebuilt.field_index.index.keys())
+
+    def test_groups_follow_live_docs(self):
+        self.search.add_item({"_id": 999, "name": "New Org"}, "orgs")
+        for org_id in [103, 999, 101, 106]:
+            self.search.delete_item("orgs", org_id)
+        for group, records in self.search.groups.items():
+            docs = self.search.records.docs(group)
+            self.assertEqual(len(docs), len(records))
+            for doc, record in zip(docs, records):
+                self.assertIs(self.search.records.record(doc), record)
+
+    def test_added_item_kept_by_freeze(self):
+        self.search.add_item({"_id": 999, "name": "Quuxcorp", "motto": "quux"}, "orgs")
+        self.assertEqual(self.search.orgs[-1]["_id"], 999)
+        self.assertIn("motto", self.search.org_fields)
+        frozen = self.search.freeze()
+        self.assertEqual(frozen.find_item("orgs", 999), {"_id": 999, "name": "Quuxcorp", "motto": "quux"})
+        self.assertEqual(len(frozen.orgs), len(self.search.orgs))
+        self.assertIn("motto", frozen.org_fields)
+        self.search.delete_item("orgs", 999)
+        self.assertNotIn(999, [org["_id"] for org in self.search.orgs])
+
+    def test_delete_everything_prunes_trie(self):
+        for group in ["users", "tickets", "orgs"]:
+            for record in list(self.search.groups[group]):
+                self.search.delete_item(group, record["_id"])
+        self.assertEqual(self.search.trie.root.children, None)
+        self.assertEqual(self.search.trie.root.terminal, None)
+        self.assertEqual(self.search.field_index.index, {})
+        self.assertEqual(self.search.relations.index, {})
+        self.assertEqual(self.search.text_index.postings, {})
+        self.assertEqual(self.search.range_index.columns, {})
+
+    def test_missing_item(self):
+        self.assertRaises(KeyError, lambda: self.search.update_item("users", 999, {"_id": 999}))
+        self.assertRaises(KeyError, lambda: self.search.delete_item("orgs", 999))
+
+    def test_snapshot_read_only(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index.snapshot")
+            self.search.save_snapshot(path)
+            search = Search.open(*self.search.sources, path)
+            self.assertRaises(ValueError, lambda: search.delete_item("users", 1))
+            self.assertRaises(ValueError, lambda: search.update_item("users", 1, {"_id": 1}))
+            self.assertRaises(ValueError, lambda: search.add_item({"_id": 999}, "users"))
+            search.trie.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+from query import Query
+from relations import RELATIONS, normalise
+import json
+
+# the fields shown for related records of each group
+SUMMARY_FIELDS = {"users": ("_id", "name"), "orgs": ("_id", "name"), "tickets": ("_id", "subject")}
+
+
+def parse_query(line):
+    # a line is either a JSON object with query, field, group and fuzziness
+    # keys or the text to search for
+    line = line.strip()
+    try:
+        spec = json.loads(line)
+    except ValueError:
+        spec = None
+    if not isinstance(spec, dict):
+        return Query(line)
+    return Query(spec.get("query", ""), spec.get("field"), spec.get("group"), spec.get("fuzziness", 0))
+
+
+class BatchSearch:
+    """
+    Runs many queries against one Search. Repeated queries are searched
+    once, and the related records of a result are resolved once however
+    many queries return it. Results are streamed as NDJSON.
+    """
+
+    def __init__(self, search):
+        self.search = search
+        self.results = {}
+        self.summaries = {}
+
+    def search_query(self, query):
+        key = (query.string, query.field, query.group, query.fuzziness)
+        if key not in self.results:
+            self.results[key] = self.search.field_and_group_search(query) or []
+        return self.results[key]
+
+    def summarise(self, record, group):
+        # keyed by _id, as records decoded from a snapshot are new dicts whose
+        # ids are reused once they are freed
+        if "_id" not in record:
+            return self.make_summary(record, group)
+        key = (group, normalise(record["_id"]))
+        summary = self.summaries.get(key)
+        if summary is None:
+            summary = self.summaries[key] = self.make_summary(record, group)
+        return summary
+
+    def make_summary(self, record, group):
+        summary = dict(record)
+        for name, records in self.search.get_related(record, group).items():
+            related_group = RELATIONS[group][name][1]
+            fields = SUMMARY_FIELDS[related_group]
+            summary[name] = [{field: related.get(field) for field in fields} for related in records]
+        return summary
+
+    def run(self, queries):
+        for query in queries:
+            results = [
+                {"group": entry.group, "field": entry.field, "record": self.summarise(entry.data, entry.group)}
+                for entry in self.search_query(query)
+            ]
+            yield {
+                "query": query.string,
+                "field": query.field,
+                "group": query.group,
+                "count": len(results),
+                "results": results,
+            }
+
+    def write(self, lines, stream):
+        # repeated queries reuse the line written for their first occurrence
+        written = {}
+        for line in lines:
+            if not line.strip():
+                continue
+            query = parse_query(line)
+            key = (query.string, query.field, query.group, query.fuzziness)
+            if key not in written:
+                result = next(self.run([query]))
+                written[key] = json.dumps(result, ensure_ascii=False) + "\n"
+            stream.write(written[key])
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+import time
+
+MISSING = object()
+
+
+class QueryCache:
+    """
+    Bounded least recently used cache with an optional time to live
+    in seconds. Counts hits, misses and evictions so that the cache
+    can be sized. A maxsize of 0 disables caching.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        item = self.entries.get(key, MISSING)
+        if item is not MISSING:
+            value, expires = item
+            if expires is None or expires > self.clock():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self.entries[key]
+        self.misses += 1
+        return MISSING
+
+    def put(self, key, value):
+        if not self.maxsize:
+            return
+        expires = self.clock() + self.ttl if self.ttl is not None else None
+        self.entries[key] = (value, expires)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def cached(self, key, compute):
+        value = self.get(key)
+        if value is MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
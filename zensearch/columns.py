@@ -0,0 +1,509 @@
+from search import Search, FACET_LIMIT
+from records import RecordTable, discard
+from relations import RelationIndex, normalise
+from facet_index import FACET_FIELDS
+from collections import Counter
+from array import array
+
+# a string column keeps one copy of each distinct value until it holds more
+# than this many, and more than one for every other row, from when its
+# values are mostly unique and the text of each row is stored instead
+DICTIONARY_LIMIT = 1024
+
+# the value of a row that lacks the field
+MISSING = object()
+
+
+class Column:
+    """
+    The values of one field of one group, a row per record of the group.
+    The present bitmap has the bit of each row holding the field set, rows
+    without it keep a blank value in the column. Subclasses store the
+    values with push(value), put(row, value) and fetch(row), where a
+    MISSING value stores a blank.
+    """
+
+    def __init__(self):
+        self.present = bytearray()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def has(self, row):
+        return self.present[row >> 3] >> (row & 7) & 1
+
+    def mark(self, row, present):
+        if present:
+            self.present[row >> 3] |= 1 << (row & 7)
+        else:
+            self.present[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+
+    def append(self, value=MISSING):
+        if not self.size & 7:
+            self.present.append(0)
+        self.push(value)
+        self.size += 1
+        if value is not MISSING:
+            self.mark(self.size - 1, True)
+
+    def set(self, row, value):
+        self.put(row, value)
+        self.mark(row, value is not MISSING)
+
+    def get(self, row):
+        return self.fetch(row) if self.has(row) else MISSING
+
+    def absent(self):
+        # the number of rows without the field
+        return self.size - int.from_bytes(self.present, "little").bit_count()
+
+    def counts(self):
+        # the number of rows holding each value, or each item of list values
+        counts = Counter()
+        for row in range(self.size):
+            value = self.get(row)
+            if value is not MISSING:
+                counts.update(value if type(value) is list else [value])
+        return counts
+
+
+class IntColumn(Column):
+    """Ints stored unboxed as 64 bit signed integers."""
+
+    def __init__(self):
+        super().__init__()
+        self.values = array("q")
+
+    def accepts(self, value):
+        return type(value) is int and -(1 << 63) <= value < 1 << 63
+
+    def push(self, value):
+        self.values.append(0 if value is MISSING else value)
+
+    def put(self, row, value):
+        self.values[row] = 0 if value is MISSING else value
+
+    def fetch(self, row):
+        return self.values[row]
+
+    def counts(self):
+        # rows without the field hold a blank 0
+        counts = Counter(self.values)
+        counts[0] -= self.absent()
+        return +counts
+
+
+class BoolColumn(Column):
+    """Booleans stored as a byte each."""
+
+    def __init__(self):
+        super().__init__()
+        self.values = array("B")
+
+    def accepts(self, value):
+        return type(value) is bool
+
+    def push(self, value):
+        self.values.append(value is True)
+
+    def put(self, row, value):
+        self.values[row] = value is True
+
+    def fetch(self, row):
+        return self.values[row] == 1
+
+    def counts(self):
+        true = sum(self.values)
+        return +Counter({True: true, False: self.size - self.absent() - true})
+
+
+class DictionaryColumn(Column):
+    """
+    Strings stored once each, with a code per row. Code 0 is the blank of
+    rows without the field, so counting the codes counts the values.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.codes = array("I")
+        self.values = [None]
+        self.value_codes = {}
+
+    def accepts(self, value):
+        return type(value) is str
+
+    def code(self, value):
+        if value is MISSING:
+            return 0
+        code = self.value_codes.get(value)
+        if code is None:
+            code = self.value_codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def push(self, value):
+        self.codes.append(self.code(value))
+
+    def put(self, row, value):
+        self.codes[row] = self.code(value)
+
+    def fetch(self, row):
+        return self.values[self.codes[row]]
+
+    def crowded(self):
+        distinct = len(self.values) - 1
+        return distinct > DICTIONARY_LIMIT and distinct * 2 > self.size
+
+    def counts(self):
+        counts = Counter(self.codes)
+        counts.pop(0, None)
+        return Counter({self.values[code]: count for code, count in counts.items()})
+
+
+class TextColumn(Column):
+    """
+    Strings stored end to end as UTF-8, with the start and length of each
+    row, for values that are mostly unique. A changed row's text is added
+    at the end, leaving the old text unused.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.text = bytearray()
+        self.starts = array("Q")
+        self.lengths = array("I")
+
+    def accepts(self, value):
+        return type(value) is str
+
+    def encode(self, value):
+        encoded = b"" if value is MISSING else value.encode()
+        start = len(self.text)
+        self.text += encoded
+        return start, len(encoded)
+
+    def push(self, value):
+        start, length = self.encode(value)
+        self.starts.append(start)
+        self.lengths.append(length)
+
+    def put(self, row, value):
+        self.starts[row], self.lengths[row] = self.encode(value)
+
+    def fetch(self, row):
+        start = self.starts[row]
+        return self.text[start : start + self.lengths[row]].decode()
+
+
+class ListColumn(Column):
+    """
+    Lists stored as the offset and length of each row's run of items in a
+    column of its own. A changed row's items are added at the end.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.starts = array("Q")
+        self.lengths = array("I")
+        self.items = None
+
+    def accepts(self, value):
+        return type(value) is list
+
+    def extend(self, value):
+        start = self.items.size if self.items else 0
+        if value is MISSING:
+            return start, 0
+        for item in value:
+            self.items = appended(self.items, item)
+        return start, len(value)
+
+    def push(self, value):
+        start, length = self.extend(value)
+        self.starts.append(start)
+        self.lengths.append(length)
+
+    def put(self, row, value):
+        self.starts[row], self.lengths[row] = self.extend(value)
+
+    def fetch(self, row):
+        start = self.starts[row]
+        return [self.items.get(item) for item in range(start, start + self.lengths[row])]
+
+    def counts(self):
+        # the items column is counted as a whole unless changed rows have
+        # left items unused
+        if self.items is None:
+            return Counter()
+        if sum(self.lengths) == self.items.size:
+            return self.items.counts()
+        return super().counts()
+
+
+class ObjectColumn(Column):
+    """Any other values, or a field whose values are of mixed types, kept as they are."""
+
+    def __init__(self):
+        super().__init__()
+        self.values = []
+
+    def accepts(self, value):
+        return True
+
+    def push(self, value):
+        self.values.append(None if value is MISSING else value)
+
+    def put(self, row, value):
+        self.values[row] = None if value is MISSING else value
+
+    def fetch(self, row):
+        return self.values[row]
+
+
+def column_type(value):
+    # bool is checked before int, as True is an int too
+    if type(value) is bool:
+        return BoolColumn
+    if type(value) is int:
+        return IntColumn
+    if type(value) is str:
+        return DictionaryColumn
+    if type(value) is list:
+        return ListColumn
+    return ObjectColumn
+
+
+def converted(column, kind):
+    # a column of the kind holding the same rows
+    new = kind()
+    for row in range(column.size):
+        new.append(column.get(row))
+    return new
+
+
+def fitted(column, value):
+    # the column, or a copy of it that can hold the value as well
+    if column is None:
+        return column_type(value)()
+    if value is MISSING or column.accepts(value):
+        return column
+    return converted(column, ObjectColumn)
+
+
+def appended(column, value):
+    # adds a row, returning the column to use from then on
+    column = fitted(column, value)
+    column.append(value)
+    if isinstance(column, DictionaryColumn) and column.crowded():
+        column = converted(column, TextColumn)
+    return column
+
+
+def facet_counts(counts, limit=None):
+    # column counts merged by normalised value, as the facet index keeps
+    # them, most common first
+    merged = Counter()
+    for value, count in counts.items():
+        if value is not None and count > 0:
+            merged[normalise(value)] += count
+    pairs = sorted(merged.items(), key=lambda pair: (-pair[1], pair[0]))
+    return pairs[:limit] if limit is not None else pairs
+
+
+class ColumnTable(RecordTable):
+    """
+    Records stored by column rather than as a dict each, so that field
+    names are stored once per group instead of once per record, ints and
+    booleans are unboxed and repeated strings are stored once. A record is
+    only made into a dict when it is read, with its fields in the order
+    the group first had them. Doc ids and postings are the same as for a
+    RecordTable, each doc maps to a row of its group's columns.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # the row of each doc within its group, the doc of each row and
+        # the columns of each group by field
+        self.rows = array("Q")
+        self.group_docs = {}
+        self.columns = {}
+        # the docs removed
+        self.deleted = set()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, record, group):
+        doc = len(self.rows)
+        self.record_groups.append(self.intern(self.groups, self.group_ids, group))
+        docs = self.group_docs.setdefault(group, array("Q"))
+        row = len(docs)
+        docs.append(doc)
+        self.live.setdefault(group, array("Q")).append(doc)
+        self.rows.append(row)
+        columns = self.columns.setdefault(group, {})
+        self.add_fields(columns, record, row)
+        for field, column in columns.items():
+            columns[field] = appended(column, record.get(field, MISSING))
+        return doc
+
+    def add_fields(self, columns, record, rows):
+        # columns for the fields the group has not had yet, blank for the
+        # rows before
+        for field, value in record.items():
+            if field not in columns:
+                column = columns[field] = column_type(value)()
+                for _ in range(rows):
+                    column.append()
+
+    def update(self, doc, record):
+        row = self.rows[doc]
+        columns = self.columns[self.group(doc)]
+        self.add_fields(columns, record, len(self.group_docs[self.group(doc)]))
+        for field, column in columns.items():
+            value = record.get(field, MISSING)
+            column = columns[field] = fitted(column, value)
+            column.set(row, value)
+
+    def remove(self, doc):
+        # doc ids and rows are not reused, the row is left blank
+        self.deleted.add(doc)
+        discard(self.live[self.group(doc)], doc)
+        row = self.rows[doc]
+        for column in self.columns[self.group(doc)].values():
+            column.set(row, MISSING)
+
+    def record(self, doc):
+        if doc in self.deleted:
+            return None
+        row = self.rows[doc]
+        record = {}
+        for field, column in self.columns[self.group(doc)].items():
+            value = column.get(row)
+            if value is not MISSING:
+                record[field] = value
+        return record
+
+    def value(self, doc, field):
+        # one field of a record, without making the rest of it
+        column = self.columns[self.group(doc)].get(field)
+        return MISSING if column is None or doc in self.deleted else column.get(self.rows[doc])
+
+    def iter_docs(self):
+        for doc in range(len(self.rows)):
+            if doc not in self.deleted:
+                yield doc, self.record(doc), self.group(doc)
+
+    def counts(self, group, field):
+        # the number of records of the group holding each value of the
+        # field, counted over its column
+        column = self.columns.get(group, {}).get(field)
+        return column.counts() if column is not None else Counter()
+
+
+class ColumnRecords:
+    """
+    The records of one group of a ColumnTable, as a read only sequence
+    that makes each record into a dict as it is read.
+    """
+
+    def __init__(self, table, group):
+        self.table = table
+        self.group = group
+
+    def __len__(self):
+        return len(self.table.docs(self.group))
+
+    def __iter__(self):
+        for doc in self.table.docs(self.group):
+            yield self.table.record(doc)
+
+    def __getitem__(self, index):
+        docs = self.table.docs(self.group)
+        if isinstance(index, slice):
+            return [self.table.record(doc) for doc in docs[index]]
+        return self.table.record(docs[index])
+
+
+class ColumnarSearch(Search):
+    """
+    Search whose records are held in a ColumnTable. Records are read,
+    stored in the columns and indexed one at a time, so they are never all
+    held as dicts, and the groups are ColumnRecords. Counting the values of
+    a field scans its column rather than every record.
+    """
+
+    def __init__(
+        self,
+        users_filepath,
+        tickets_filepath,
+        orgs_filepath,
+        cache_size=1024,
+        cache_ttl=None,
+        output_format="text",
+        output=None,
+        metrics=None,
+    ):
+        super().__init__(
+            users_filepath,
+            tickets_filepath,
+            orgs_filepath,
+            stream=True,
+            cache_size=cache_size,
+            cache_ttl=cache_ttl,
+            output_format=output_format,
+            output=output,
+            metrics=metrics,
+        )
+        self.records = ColumnTable()
+        self.relations = RelationIndex(self.records)
+        self.users, self.tickets, self.orgs = (ColumnRecords(self.records, group) for group in self.groups)
+        self.groups = {"users": self.users, "tickets": self.tickets, "orgs": self.orgs}
+
+    def build_groups(self, workers=None):
+        # records are always stored and indexed as they are read
+        for group, filepath in zip(self.groups, self.sources):
+            with self.metrics.timer(f"build.{group}"):
+                for item in self.read_file(filepath):
+                    self.add_fields(item, group)
+                    self.add_record(item, group)
+            self.metrics.count("build.records", len(self.groups[group]))
+
+    def add_item(self, item_data, group_name):
+        # the group is a view of the table, so storing the record adds it
+        self.check_writable()
+        self.add_fields(item_data, group_name)
+        self.add_record(item_data, group_name)
+
+    def delete_item(self, group_name, item_id):
+        # the group is a view of the table, so removing the doc removes the
+        # record from it
+        self.check_writable()
+        doc = self.find_doc(group_name, item_id)
+        record = self.records.record(doc)
+        self.remove_entries(doc, record, group_name)
+        self.records.remove(doc)
+        return record
+
+    def facets(self, group, query=None, where=None, fields=None, limit=FACET_LIMIT):
+        # the values of the whole group are counted over its columns, without
+        # building the facet index. Counts among the records a query or
+        # where finds are left to it
+        if query is not None or where:
+            return super().facets(group, query, where, fields, limit)
+        with self.metrics.timer("facets"):
+            columns = self.records.columns.get(group, {})
+            if fields is None:
+                # the facet fields held by any record of the group
+                fields = [
+                    field for field in FACET_FIELDS if field in columns and columns[field].absent() < len(columns[field])
+                ]
+            return {field: facet_counts(self.records.counts(group, field), limit) for field in fields}
+
+    def value_counts(self, group, field, limit=FACET_LIMIT):
+        # the most common values of the field among the records of the group,
+        # as (value, count) pairs, most common first
+        with self.metrics.timer("columns.counts"):
+            counts = self.records.counts(group, field)
+        return counts.most_common(limit)
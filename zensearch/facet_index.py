@@ -0,0 +1,143 @@
+from relations import normalise
+from array import array
+from bisect import bisect_left
+
+# the fields counted by value, those with a handful of values shared by many
+# records. Each value takes a bit per record of its group, so fields whose
+# values are mostly unique, such as _id or url, would cost far more than
+# counting them by scanning
+FACET_FIELDS = (
+    "status",
+    "priority",
+    "type",
+    "via",
+    "has_incidents",
+    "tags",
+    "organization_id",
+    "submitter_id",
+    "assignee_id",
+    "role",
+    "active",
+    "verified",
+    "shared",
+    "suspended",
+    "locale",
+    "details",
+    "shared_tickets",
+)
+
+
+def bitset(slots, size):
+    # an int with the bit of each slot set, made in one go as setting the bits
+    # one at a time would copy the int each time
+    bits = bytearray((size + 7) // 8)
+    for slot in slots:
+        bits[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(bits, "little")
+
+
+class FacetIndex:
+    """
+    Bitsets of the records of each group holding each value of the facet
+    fields. The records of a group are numbered by slot, in doc order, and
+    a value's bitset is a Python int with the bit of each of its records
+    set. Counting a value among a set of records is an and and a popcount.
+    Values are normalised as they are for searching. Records changed after
+    the build set and clear their own bits.
+    """
+
+    def __init__(self, fields=FACET_FIELDS):
+        self.fields = fields
+        # the docs of each group, sorted, a doc's slot is its position
+        self.docs = {}
+        self.bitsets = {}
+
+    def build(self, docs):
+        # docs yields (doc, record, group) in doc order
+        slots = {}
+        for doc, record, group in docs:
+            group_docs = self.docs.setdefault(group, array("Q"))
+            slot = len(group_docs)
+            group_docs.append(doc)
+            for field in self.fields:
+                value = record.get(field)
+                if value is None:
+                    continue
+                values = slots.setdefault((group, field), {})
+                for item in value if type(value) is list else [value]:
+                    values.setdefault(normalise(item), []).append(slot)
+        for (group, field), values in slots.items():
+            size = len(self.docs[group])
+            self.bitsets[(group, field)] = {value: bitset(value_slots, size) for value, value_slots in values.items()}
+        return self
+
+    def add(self, doc, record, group):
+        # sets the bit of a new or updated record for each of its values.
+        # Doc ids only grow, so a new doc takes the next slot
+        group_docs = self.docs.setdefault(group, array("Q"))
+        slot = bisect_left(group_docs, doc)
+        if slot == len(group_docs):
+            group_docs.append(doc)
+        for field in self.fields:
+            value = record.get(field)
+            if value is None:
+                continue
+            values = self.bitsets.setdefault((group, field), {})
+            for item in value if type(value) is list else [value]:
+                item = normalise(item)
+                values[item] = values.get(item, 0) | 1 << slot
+
+    def remove(self, doc, record, group):
+        # clears the bits of a record, whose slot is left empty so that the
+        # slots after it stay where they are
+        group_docs = self.docs.get(group, ())
+        slot = bisect_left(group_docs, doc)
+        if slot == len(group_docs) or group_docs[slot] != doc:
+            return
+        for field in self.fields:
+            value = record.get(field)
+            values = self.bitsets.get((group, field))
+            if value is None or values is None:
+                continue
+            for item in value if type(value) is list else [value]:
+                item = normalise(item)
+                bits = values.get(item, 0) & ~(1 << slot)
+                if bits:
+                    values[item] = bits
+                else:
+                    values.pop(item, None)
+            if not values:
+                del self.bitsets[(group, field)]
+
+    def everything(self, group):
+        return (1 << len(self.docs.get(group, ()))) - 1
+
+    def select(self, group, docs):
+        # the bitset of the docs of the group among docs
+        group_docs = self.docs.get(group, ())
+        slots = []
+        for doc in docs:
+            slot = bisect_left(group_docs, doc)
+            if slot < len(group_docs) and group_docs[slot] == doc:
+                slots.append(slot)
+        return bitset(slots, len(group_docs))
+
+    def has_field(self, group, field):
+        return (group, field) in self.bitsets
+
+    def value(self, group, field, value):
+        return self.bitsets.get((group, field), {}).get(normalise(value), 0)
+
+    def counts(self, group, field, bits=None, limit=None):
+        # the values of the field among the records of bits, or of the
+        # whole group, with their counts, most common first
+        counts = []
+        for value, value_bits in self.bitsets.get((group, field), {}).items():
+            count = (value_bits if bits is None else value_bits & bits).bit_count()
+            if count:
+                counts.append((value, count))
+        counts.sort(key=lambda pair: (-pair[1], pair[0]))
+        return counts[:limit] if limit is not None else counts
+
+    def group_fields(self, group):
+        return [field for field in self.fields if (group, field) in self.bitsets]
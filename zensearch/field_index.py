@@ -0,0 +1,29 @@
+from records import postings, discard
+
+
+class FieldIndex:
+    """
+    Hash index of postings keyed by (group, field, string).
+    Answers field and group scoped searches with a single lookup
+    instead of filtering every posting that shares the string.
+    """
+
+    def __init__(self):
+        self.index = {}
+
+    def add(self, string, field, group, posting):
+        key = (group, field, string)
+        stored = self.index.get(key)
+        if stored is None:
+            self.index[key] = postings([posting])
+        else:
+            stored.append(posting)
+
+    def discard(self, string, field, group, posting):
+        key = (group, field, string)
+        stored = self.index.get(key)
+        if stored is not None and discard(stored, posting) and not stored:
+            del self.index[key]
+
+    def retrieve(self, string, field, group):
+        return self.index.get((group, field, string), [])
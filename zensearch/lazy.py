@@ -0,0 +1,261 @@
+from search import Search, FACET_LIMIT
+from relations import RELATIONS, normalise
+from array import array
+import threading
+
+
+def parse_warm(text):
+    # "tickets.status,users._id" names the fields to warm up, a group
+    # on its own names all of its fields
+    fields = []
+    for name in text.split(","):
+        group, _, field = name.strip().partition(".")
+        fields.append((group, field or None))
+    return fields
+
+
+class LazySearch(Search):
+    """
+    Search that reads the file of a group on the first query touching the
+    group, and indexes a field of a group on the first query touching the
+    field, so the first query waits only for what it searches. Queries
+    scoped to a field and group build that field alone, while freeform
+    queries build everything. The fields expected to be hot can be warmed
+    up in a background thread, which builds them one at a time under the
+    lock every query takes, as the trie is not safe to read while it is
+    being changed.
+    """
+
+    def __init__(
+        self,
+        users_filepath,
+        tickets_filepath,
+        orgs_filepath,
+        cache_size=1024,
+        cache_ttl=None,
+        output_format="text",
+        output=None,
+        metrics=None,
+    ):
+        # streaming leaves the groups empty until they are read
+        super().__init__(
+            users_filepath,
+            tickets_filepath,
+            orgs_filepath,
+            stream=True,
+            cache_size=cache_size,
+            cache_ttl=cache_ttl,
+            output_format=output_format,
+            output=output,
+            metrics=metrics,
+        )
+        self.group_sources = dict(zip(self.groups, self.sources))
+        self.lock = threading.RLock()
+        # the docs of each group read so far, and the fields indexed
+        self.loaded = {}
+        self.built = set()
+        self.complete = set()
+        self.warmer = None
+
+    def load_group(self, group):
+        with self.lock:
+            if group in self.loaded:
+                return
+            records = self.groups[group]
+            fields = self.get_group_fields(group)
+            docs = array("Q")
+            with self.metrics.timer(f"load.{group}"):
+                for record in self.read_file(self.group_sources[group]):
+                    records.append(record)
+                    for field in record:
+                        fields.setdefault(field, None)
+                    doc = self.records.add(record, group)
+                    docs.append(doc)
+                    self.relations.add(doc, record, group)
+            self.loaded[group] = docs
+            # the indexes over whole records are rebuilt from them on next use
+            self.text_index = None
+            self.range_index = None
+            self.facet_index = None
+            self.cache.clear()
+
+    def build_field(self, group, field):
+        with self.lock:
+            self.load_group(group)
+            if group in self.complete or (group, field) in self.built:
+                return
+            with self.metrics.timer(f"build.{group}.{field}"):
+                for doc in self.loaded[group]:
+                    record = self.records.record(doc)
+                    if record is None or field not in record:
+                        continue
+                    posting = self.records.posting(doc, field)
+                    value = record[field]
+                    for item in value if type(value) is list else [value]:
+                        string = normalise(item)
+                        self.trie.insert(string, posting)
+                        self.field_index.add(string, field, group, posting)
+                        if self.substring_index is not None:
+                            self.substring_index.add(string)
+            self.built.add((group, field))
+            self.cache.clear()
+
+    def build_group(self, group):
+        with self.lock:
+            self.load_group(group)
+            if group in self.complete:
+                return
+            for field in list(self.get_group_fields(group)):
+                self.build_field(group, field)
+            self.complete.add(group)
+
+    def prepare(self, field=None, group=None):
+        # builds what a query scoped to the field and group searches
+        for name in [group] if group else list(self.groups):
+            if field:
+                self.build_field(name, field)
+            else:
+                self.build_group(name)
+
+    def build_search(self, workers=None):
+        # builds every field of every group up front, as Search does
+        with self.metrics.timer("build"):
+            for group in self.groups:
+                self.build_group(group)
+
+    def warm(self, fields, background=True):
+        # builds the (group, field) pairs, or whole groups where the field is
+        # None, in a daemon thread unless background is False
+        def run():
+            for group, field in fields:
+                if field:
+                    self.build_field(group, field)
+                else:
+                    self.build_group(group)
+
+        if not background:
+            run()
+            return
+        self.warmer = threading.Thread(target=run, name="warm", daemon=True)
+        self.warmer.start()
+
+    def locked(self, results):
+        # steps through lazy results under the lock, so a warm up never
+        # changes the index half way through reading it
+        while True:
+            with self.lock:
+                try:
+                    result = next(results)
+                except StopIteration:
+                    return
+            yield result
+
+    def freeform_search(self, query):
+        # also reached by field and group searches that are not scoped to both
+        with self.lock:
+            self.prepare(query.field, query.group)
+            return super().freeform_search(query)
+
+    def scoped_search(self, query):
+        with self.lock:
+            self.prepare(query.field, query.group)
+            return super().scoped_search(query)
+
+    def prefix_search(self, query, limit=None, offset=0):
+        with self.lock:
+            self.prepare(query.field, query.group)
+            return self.locked(super().prefix_search(query, limit, offset))
+
+    def substring_search(self, query, limit=None, offset=0):
+        with self.lock:
+            self.prepare(query.field, query.group)
+            return self.locked(super().substring_search(query, limit, offset))
+
+    def text_search(self, text, operator="and", field=None, group=None):
+        with self.lock:
+            for name in [group] if group else list(self.groups):
+                self.load_group(name)
+            return super().text_search(text, operator, field, group)
+
+    def range_search(self, field, group=None, low=None, high=None, match=None, limit=None, offset=0):
+        with self.lock:
+            for name in [group] if group else list(self.groups):
+                self.load_group(name)
+            if match is not None:
+                self.prepare(match.field, match.group or group)
+            return self.locked(super().range_search(field, group, low, high, match, limit, offset))
+
+    def range_fields(self, group):
+        with self.lock:
+            self.load_group(group)
+            return super().range_fields(group)
+
+    def facets(self, group, query=None, where=None, fields=None, limit=FACET_LIMIT):
+        with self.lock:
+            self.load_group(group)
+            if query is not None:
+                self.prepare(query.field, group)
+            for field in where or ():
+                self.build_field(group, field)
+            return super().facets(group, query, where, fields, limit)
+
+    def structured_search(self, clause, group, limit=None, offset=0):
+        with self.lock:
+            self.load_group(group)
+            return super().structured_search(clause, group, limit, offset)
+
+    def explain(self, clause, group):
+        with self.lock:
+            self.load_group(group)
+            return super().explain(clause, group)
+
+    def cardinality(self, group, field, value):
+        self.build_field(group, field)
+        return super().cardinality(group, field, value)
+
+    def term_docs(self, group, field, value):
+        self.build_field(group, field)
+        return super().term_docs(group, field, value)
+
+    def resolve_related(self, record, group):
+        with self.lock:
+            for _, related_group, related_field in RELATIONS[group].values():
+                self.load_group(related_group)
+            return super().resolve_related(record, group)
+
+    def find_item(self, group_name, item_id):
+        with self.lock:
+            self.build_field(group_name, "_id")
+            return super().find_item(group_name, item_id)
+
+    def add_item(self, item_data, group_name):
+        # changes need every field of the group indexed, so that the
+        # postings of the record are all added and removed together
+        with self.lock:
+            self.build_group(group_name)
+            super().add_item(item_data, group_name)
+
+    def add_record(self, item_data, group_name):
+        doc = super().add_record(item_data, group_name)
+        self.loaded[group_name].append(doc)
+        return doc
+
+    def update_item(self, group_name, item_id, item_data):
+        with self.lock:
+            self.build_group(group_name)
+            return super().update_item(group_name, item_id, item_data)
+
+    def delete_item(self, group_name, item_id):
+        with self.lock:
+            self.build_group(group_name)
+            return super().delete_item(group_name, item_id)
+
+    def save_snapshot(self, path):
+        with self.lock:
+            self.build_search()
+            super().save_snapshot(path)
+
+    def prompt_group(self, group, group_fields):
+        # the fields of a group are only known once its file is read
+        self.load_group(group)
+        super().prompt_group(group, self.get_group_fields(group))
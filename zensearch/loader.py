@@ -0,0 +1,126 @@
+import sys
+import json
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = " \t\n\r"
+# a value ending, or an error found, within this many characters of the end
+# of the buffer may come from a value cut short there: a literal, a number's
+# fraction or exponent, or a surrogate pair of \uXXXX escapes
+TAIL = 12
+
+
+def intern_keys(pairs):
+    # json.load shares the key strings of one document between its objects,
+    # interning gives records decoded one at a time the same saving
+    return {sys.intern(key): value for key, value in pairs}
+
+
+def skip_whitespace(buffer, position):
+    while position < len(buffer) and buffer[position] in WHITESPACE:
+        position += 1
+    return position
+
+
+class RecordReader:
+    """
+    Reads the records of a top level JSON array, or of newline delimited
+    JSON, one at a time. The file is read in chunks so only the record
+    being decoded is held as text, never the whole document.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder(object_pairs_hook=intern_keys)
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self):
+        # drops the consumed text and reads the next chunk
+        chunk = self.f.read(self.chunk_size)
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        self.eof = not chunk
+
+    def next_char(self):
+        # returns the next non whitespace character without consuming it
+        self.position = skip_whitespace(self.buffer, self.position)
+        while self.position == len(self.buffer) and not self.eof:
+            self.fill()
+            self.position = skip_whitespace(self.buffer, self.position)
+        if self.position == len(self.buffer):
+            return None
+        return self.buffer[self.position]
+
+    def decode(self):
+        self.next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # a value running to the end of the buffer may be cut short
+                if end < len(self.buffer) - TAIL or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError as err:
+                # only an error the rest of the file could mend reads more,
+                # a malformed record raises without buffering what follows
+                if self.eof or not self.cut_short(err):
+                    raise
+            self.fill()
+
+    def cut_short(self, err):
+        # a string cut short is reported from where it starts
+        return err.pos >= len(self.buffer) - TAIL or err.msg == "Unterminated string starting at"
+
+    def expect(self, char):
+        if self.next_char() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.position)
+        self.position += 1
+
+    def __iter__(self):
+        first = self.next_char()
+        if first is None:
+            # as json.load, a file without any value is an error
+            raise json.JSONDecodeError("Expecting value", self.buffer, self.position)
+        if first == "[":
+            yield from self.read_array()
+        else:
+            yield from self.read_lines()
+
+    def read_array(self):
+        self.expect("[")
+        if self.next_char() == "]":
+            self.position += 1
+        else:
+            while True:
+                yield self.decode()
+                if self.next_char() == ",":
+                    self.position += 1
+                    continue
+                self.expect("]")
+                break
+        if self.next_char() is not None:
+            raise json.JSONDecodeError("Extra data", self.buffer, self.position)
+
+    def read_lines(self):
+        while self.next_char() is not None:
+            yield self.decode()
+            self.end_line()
+
+    def end_line(self):
+        # a value must be the last thing on its line, values run together
+        # are not newline delimited
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r":
+                self.position += 1
+            if self.position < len(self.buffer) or self.eof:
+                break
+            self.fill()
+        if self.position < len(self.buffer) and self.buffer[self.position] != "\n":
+            raise json.JSONDecodeError("Extra data", self.buffer, self.position)
+
+
+def iter_records(filepath, chunk_size=CHUNK_SIZE):
+    with open(filepath, "r") as f:
+        yield from RecordReader(f, chunk_size)
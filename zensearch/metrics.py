@@ -0,0 +1,134 @@
+import sys
+import time
+
+
+class NullTimer:
+    """
+    Timer of NullMetrics, which does nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class NullMetrics:
+    """
+    Metrics that are switched off. Every call returns at once, and hot
+    paths check enabled before doing any work just to count something.
+    """
+
+    enabled = False
+
+    def timer(self, name):
+        return NULL_TIMER
+
+    def count(self, name, amount=1):
+        pass
+
+    def report(self, label):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class Timer:
+    """
+    Adds the time spent inside a with block to a timer of Metrics.
+    """
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """
+    Per phase timers and counters of a Search. report hands what has been
+    recorded since the last report to the sink, a callable taking a label
+    and the recorded timers and counters, and starts over.
+    """
+
+    enabled = True
+
+    def __init__(self, sink=None):
+        self.sink = sink or PrintSink()
+        self.timers = {}
+        self.counters = {}
+
+    def timer(self, name):
+        return Timer(self, name)
+
+    def add_time(self, name, seconds):
+        total, calls = self.timers.get(name, (0.0, 0))
+        self.timers[name] = (total + seconds, calls + 1)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        # the timers are copied in one step first, as a background thread
+        # may be adding to them
+        timers = dict(self.timers)
+        return {
+            "timers": {name: {"seconds": total, "calls": calls} for name, (total, calls) in timers.items()},
+            "counters": dict(self.counters),
+        }
+
+    def reset(self):
+        self.timers = {}
+        self.counters = {}
+
+    def report(self, label):
+        if self.timers or self.counters:
+            self.sink(label, self.snapshot())
+        self.reset()
+
+
+class PrintSink:
+    """
+    Writes each report as a breakdown of its timers, slowest first,
+    followed by its counters.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def __call__(self, label, report):
+        stream = self.stream or sys.stderr
+        lines = [f"[profile] {label}\n"]
+        timers = sorted(report["timers"].items(), key=lambda item: -item[1]["seconds"])
+        for name, timer in timers:
+            lines.append(f"  {name:<24} {timer['seconds'] * 1e3:>10.3f}ms  x{timer['calls']}\n")
+        for name, value in sorted(report["counters"].items()):
+            lines.append(f"  {name:<24} {value:>10}\n")
+        stream.write("".join(lines))
+        stream.flush()
+
+
+class CollectSink:
+    """
+    Keeps every report, for tests and for tools reading the reports back.
+    """
+
+    def __init__(self):
+        self.reports = []
+
+    def __call__(self, label, report):
+        self.reports.append((label, report))
@@ -0,0 +1,146 @@
+from records import postings, pack
+from relations import JOIN_KEYS, normalise
+from range_index import RangeColumn, parse_value
+from text_index import InvertedIndex, Analyzer, STOPWORDS
+from multiprocessing import Pool
+from array import array
+
+GROUPS = ("users", "tickets", "orgs")
+CHUNK_SIZE = 5000
+
+# records of each group, the field ids and the doc id of the first record
+# of each group, set in every worker by the pool initializer
+worker_groups = None
+worker_field_ids = None
+worker_first_docs = None
+
+
+def set_worker_groups(groups, field_ids, first_docs):
+    global worker_groups, worker_field_ids, worker_first_docs
+    worker_groups = groups
+    worker_field_ids = field_ids
+    worker_first_docs = first_docs
+
+
+class ChunkTable:
+    """Postings of a worker's records, packed with the field ids of the parent's table."""
+
+    def posting(self, doc, field):
+        return pack(doc, worker_field_ids[field])
+
+
+class Partial:
+    """
+    The indexes of a slice of a group, built by a worker. Every part holds
+    arrays in doc order, and the docs of a slice come after those of the
+    slices before it, so the parent merges each part by concatenation.
+    """
+
+    def __init__(self):
+        # normalised string -> postings, for the trie
+        self.strings = {}
+        # (group, field, string) -> postings, for the field index
+        self.fields = {}
+        # (group, field, value) -> docs, for the relation index
+        self.relations = {}
+        # token -> sorted postings, for the text index
+        self.text = InvertedIndex(Analyzer(STOPWORDS))
+        # (group, field) -> {kind: RangeColumn}, kinds in the order seen
+        self.ranges = {}
+
+    def add(self, table, doc, item_data, group_name):
+        for field, value in item_data.items():
+            posting = table.posting(doc, field)
+            values = value if type(value) is list else [value]
+            for search_term in values:
+                string = normalise(search_term)
+                append(self.strings, string, posting)
+                append(self.fields, (group_name, field, string), posting)
+            if (group_name, field) in JOIN_KEYS:
+                key = (group_name, field, normalise(value))
+                self.relations.setdefault(key, array("I")).append(doc)
+            parsed = parse_value(value)
+            if parsed is not None:
+                kind, key = parsed
+                kinds = self.ranges.setdefault((group_name, field), {})
+                column = kinds.get(kind)
+                if column is None:
+                    column = kinds[kind] = RangeColumn(kind)
+                column.add(key, posting)
+        self.text.add_record(table, doc, item_data)
+
+
+def append(index, key, posting):
+    stored = index.get(key)
+    if stored is None:
+        index[key] = postings([posting])
+    else:
+        stored.append(posting)
+
+
+def index_chunk(chunk):
+    # builds the partial indexes of a slice of a group
+    group_name, start, end = chunk
+    partial = Partial()
+    table = ChunkTable()
+    first_doc = worker_first_docs[group_name] + start
+    for offset, item_data in enumerate(worker_groups[group_name][start:end]):
+        partial.add(table, first_doc + offset, item_data, group_name)
+    return chunk, partial
+
+
+def partition(groups, chunk_size=CHUNK_SIZE):
+    chunks = []
+    for group_name in GROUPS:
+        for start in range(0, len(groups[group_name]), chunk_size):
+            chunks.append((group_name, start, min(start + chunk_size, len(groups[group_name]))))
+    return chunks
+
+
+def build_parallel(search, workers, chunk_size=CHUNK_SIZE):
+    """
+    Builds the index of the search across a pool of worker processes.
+    Doc and field ids are assigned up front, then each worker indexes slices
+    of the records into partial indexes, which are merged in record order
+    so the result matches a serial build.
+    """
+    first_docs = {}
+    for group_name in GROUPS:
+        first_docs[group_name] = len(search.records)
+        for field in search.get_group_fields(group_name):
+            search.records.field_id(field)
+        for item_data in search.groups[group_name]:
+            search.records.add(item_data, group_name)
+    chunks = partition(search.groups, chunk_size)
+    initargs = (search.groups, search.records.field_ids, first_docs)
+    with Pool(workers, initializer=set_worker_groups, initargs=initargs) as pool:
+        for _, partial in pool.imap(index_chunk, chunks):
+            merge(search, partial)
+
+
+def extend(index, partial):
+    for key, stored in partial.items():
+        existing = index.get(key)
+        if existing is None:
+            index[key] = stored
+        else:
+            existing.extend(stored)
+
+
+def merge(search, partial):
+    # the parent only concatenates arrays, and inserts each distinct
+    # string of the slice into the trie once
+    for string, stored in partial.strings.items():
+        search.trie.extend(string, stored)
+    extend(search.field_index.index, partial.fields)
+    extend(search.relations.index, partial.relations)
+    if search.text_index is not None:
+        extend(search.text_index.postings, partial.text.postings)
+    if search.range_index is not None:
+        for key, kinds in partial.ranges.items():
+            column = search.range_index.columns.get(key)
+            if column is None:
+                # as in a serial build, the first value fixes the kind
+                search.range_index.columns[key] = next(iter(kinds.values()))
+            elif column.kind in kinds:
+                column.extend(kinds[column.kind])
@@ -0,0 +1,233 @@
+from relations import normalise
+from text_index import intersect, union
+from array import array
+import re
+
+TOKEN = re.compile(r'\s*(\(|\)|=|"[^"]*"|[^\s()="]+)')
+KEYWORDS = ("and", "or", "not")
+# an And checks the records it has left against a Term rather than reading
+# the Term's postings once they are this many times fewer than the postings
+FILTER_RATIO = 8
+
+
+class Term:
+    """
+    Matches the records of a group with the value in the field,
+    or among the items of a list field.
+    """
+
+    def __init__(self, field, value):
+        self.field = field
+        self.value = normalise(value)
+
+    def __str__(self):
+        return f"{self.field}={self.value}"
+
+    def matches(self, record):
+        value = record.get(self.field)
+        if value is None:
+            return False
+        return any(normalise(item) == self.value for item in (value if type(value) is list else [value]))
+
+
+class And:
+    """
+    Matches the records matched by every clause.
+    """
+
+    def __init__(self, *clauses):
+        self.clauses = clauses
+
+    def __str__(self):
+        return "(" + " AND ".join(str(clause) for clause in self.clauses) + ")"
+
+
+class Or:
+    """
+    Matches the records matched by any clause.
+    """
+
+    def __init__(self, *clauses):
+        self.clauses = clauses
+
+    def __str__(self):
+        return "(" + " OR ".join(str(clause) for clause in self.clauses) + ")"
+
+
+class Not:
+    """
+    Matches the records of the group the clause does not match.
+    """
+
+    def __init__(self, clause):
+        self.clause = clause
+
+    def __str__(self):
+        return f"NOT {self.clause}"
+
+
+def tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"Unexpected {text[position:].strip()!r}")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+def parse_filter(text):
+    """
+    Parses a filter such as 'status=pending AND (priority=high OR NOT
+    tags="New York")'. NOT binds tighter than AND, and AND tighter than OR.
+    Values with spaces or brackets are quoted.
+    """
+    tokens = tokenize(text)
+    position = 0
+
+    def peek():
+        return tokens[position].lower() if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        if position == len(tokens):
+            raise ValueError("Unexpected end of filter")
+        position += 1
+        return tokens[position - 1]
+
+    def either():
+        clauses = [both()]
+        while peek() == "or":
+            take()
+            clauses.append(both())
+        return clauses[0] if len(clauses) == 1 else Or(*clauses)
+
+    def both():
+        clauses = [negated()]
+        while peek() == "and":
+            take()
+            clauses.append(negated())
+        return clauses[0] if len(clauses) == 1 else And(*clauses)
+
+    def negated():
+        if peek() == "not":
+            take()
+            return Not(negated())
+        return term()
+
+    def term():
+        token = take()
+        if token == "(":
+            clause = either()
+            if take() != ")":
+                raise ValueError("Expected )")
+            return clause
+        if token in ("(", ")", "=") or token.lower() in KEYWORDS or token.startswith('"'):
+            raise ValueError(f"Expected a field, found {token!r}")
+        if take() != "=":
+            raise ValueError(f"Expected = after {token}")
+        value = take()
+        if value in ("(", ")", "="):
+            raise ValueError(f"Expected a value for {token}")
+        return Term(token, value[1:-1] if value.startswith('"') else value)
+
+    clause = either()
+    if position != len(tokens):
+        raise ValueError(f"Unexpected {tokens[position]!r}")
+    return clause
+
+
+def difference(docs, excluded):
+    excluded = set(excluded)
+    return array("Q", (doc for doc in docs if doc not in excluded))
+
+
+class Step:
+    """
+    One operation of a plan, with the rows it was estimated to return and,
+    once run, the rows it did return. The steps of an And also keep the
+    rows left once each has been intersected with those before it. Steps
+    skipped because an earlier step of an And left nothing keep an actual
+    of None.
+    """
+
+    def __init__(self, clause, operation, estimate, steps=()):
+        self.clause = clause
+        self.operation = operation
+        self.estimate = estimate
+        self.steps = list(steps)
+        self.actual = None
+        self.kept = None
+
+    def lines(self, depth=0):
+        label = "  " * depth + (str(self.clause) if isinstance(self.clause, Term) else self.operation.upper())
+        actual = {"filter": "filtered"}.get(self.operation, "skipped") if self.actual is None else self.actual
+        kept = "" if self.kept is None else f"  kept {self.kept:>8}"
+        yield f"{label:<40} estimated {self.estimate:>8}  actual {actual:>8}{kept}"
+        for step in self.steps:
+            yield from step.lines(depth + 1)
+
+
+class Planner:
+    """
+    Plans and runs the filters of one group against the field index. The
+    number of postings of each (group, field, value) in the field index,
+    kept up to date as records are added and removed, estimates the rows
+    of each Term. The clauses of an And run most selective first, and each
+    result is intersected into the postings of the next, so the work is
+    bounded by the smallest list rather than the largest. Once few records
+    are left, the rest of the Terms are checked against those records
+    instead. Negated clauses are subtracted last.
+    """
+
+    def __init__(self, search, group):
+        self.search = search
+        self.group = group
+        self.size = len(search.group_docs(group))
+
+    def plan(self, clause):
+        if isinstance(clause, Term):
+            return Step(clause, "lookup", self.search.cardinality(self.group, clause.field, clause.value))
+        if isinstance(clause, Not):
+            step = self.plan(clause.clause)
+            return Step(clause, "not", max(self.size - step.estimate, 0), [step])
+        steps = [self.plan(inner) for inner in clause.clauses]
+        if isinstance(clause, Or):
+            return Step(clause, "or", min(sum(step.estimate for step in steps), self.size), steps)
+        included = sorted((step for step in steps if step.operation != "not"), key=lambda step: step.estimate)
+        excluded = sorted((step for step in steps if step.operation == "not"), key=lambda step: step.estimate)
+        estimate = included[0].estimate if included else self.size
+        return Step(clause, "and", estimate, included + excluded)
+
+    def run(self, step):
+        # returns the sorted docs of the records matching the step
+        if step.operation == "lookup":
+            docs = self.search.term_docs(self.group, step.clause.field, step.clause.value)
+        elif step.operation == "not":
+            docs = difference(self.search.group_docs(self.group), self.run(step.steps[0]))
+        elif step.operation == "or":
+            docs = union([self.run(inner) for inner in step.steps]) if step.steps else array("Q")
+        else:
+            docs = None
+            for inner in step.steps:
+                if docs is not None and not docs:
+                    break
+                if inner.operation == "not":
+                    excluded = self.run(inner.steps[0])
+                    inner.actual = self.size - len(excluded)
+                    docs = difference(self.search.group_docs(self.group) if docs is None else docs, excluded)
+                elif docs is not None and inner.operation == "lookup" and len(docs) * FILTER_RATIO < inner.estimate:
+                    inner.operation = "filter"
+                    records = self.search.records
+                    docs = array("Q", (doc for doc in docs if inner.clause.matches(records.record(doc))))
+                else:
+                    docs = self.run(inner) if docs is None else intersect(docs, self.run(inner))
+                inner.kept = len(docs)
+        step.actual = len(docs)
+        return docs
+
+    def explain(self, step):
+        return "\n".join(step.lines()) + "\n"
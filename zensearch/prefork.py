@@ -0,0 +1,63 @@
+import os
+import gc
+import sys
+import signal
+
+
+def prepare_fork():
+    # moves every object alive now out of reach of the garbage collector, so
+    # collections in the workers never write to the pages holding them
+    gc.collect()
+    gc.freeze()
+
+
+def prefork(workers, target):
+    """
+    Forks workers processes, each running target(worker) with the state
+    of this process, and waits for all of them. Stopping the parent stops
+    the workers. Returns the exit codes of the workers, in order.
+    """
+    prepare_fork()
+    pids = []
+    for worker in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                target(worker)
+            except KeyboardInterrupt:
+                pass
+            except BaseException:
+                sys.excepthook(*sys.exc_info())
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            os._exit(code)
+        pids.append(pid)
+    try:
+        return [os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) for pid in pids]
+    except KeyboardInterrupt:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        return [os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) for pid in pids]
+
+
+def memory_usage(pid="self"):
+    # resident, proportional and unique set sizes of a process in KiB, from
+    # /proc on Linux. pss splits shared pages between the processes sharing
+    # them and uss counts the pages of the process alone
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                usage[name] = int(value.split()[0])
+    return {
+        "rss_kib": usage["Rss"],
+        "pss_kib": usage["Pss"],
+        "uss_kib": usage["Private_Clean"] + usage["Private_Dirty"],
+    }
@@ -1,11 +1,17 @@
+# the most typos a query may allow
+MAX_FUZZINESS = 2
+
+
 class Query:
     """
-    Encapsulates the user's search choices
+    Encapsulates the user's search choices,
+    fuzziness is the number of typos to allow
     """
-    def __init__(self, user_query, field=None, group=None):
+    def __init__(self, user_query, field=None, group=None, fuzziness=0):
         self.string = self.process(user_query)
         self.field = field
         self.group = group
+        self.fuzziness = fuzziness
     
     def process(self, user_query):
         query_string = str(user_query).lower()
@@ -0,0 +1,169 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from heapq import merge
+import re
+
+NUMBER = "number"
+TIMESTAMP = "timestamp"
+DATE = re.compile(r"\d{4}-\d{2}-\d{2}(?:[T ]|$)")
+
+
+def parse_timestamp(value):
+    # the data writes times as "2016-04-28T11:19:34 -10:00", times without
+    # an offset and plain dates are taken to be UTC
+    try:
+        moment = datetime.fromisoformat(value.replace(" ", ""))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def parse_value(value):
+    # returns the kind and sort key of a value, or None for values
+    # that are not range indexed
+    if type(value) is int or type(value) is float:
+        return NUMBER, float(value)
+    if type(value) is str and DATE.match(value):
+        key = parse_timestamp(value)
+        if key is not None:
+            return TIMESTAMP, key
+    return None
+
+
+def parse_bound(kind, value):
+    # bounds may be given as text, from the command line, or as numbers
+    if value is None or value == "":
+        return None
+    if kind == TIMESTAMP and type(value) is str:
+        key = parse_timestamp(value)
+        if key is None:
+            raise ValueError(f"{value} is not a date or time")
+        return key
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{value} is not a number")
+
+
+class RangeColumn:
+    """
+    The values of one field of one group, as sort keys in a sorted array
+    with the posting of each key in a parallel array. While the column is
+    built, keys added out of order are appended and sorted once, when the
+    column is next searched. From then on each key is inserted in its
+    place, so updates never sort the column again.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.keys = array("d")
+        self.postings = array("Q")
+        self.ordered = True
+        self.sorted = False
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, posting):
+        if self.keys and key < self.keys[-1]:
+            if self.sorted:
+                # after equal keys, as appending would have put it
+                index = bisect_right(self.keys, key)
+                self.keys.insert(index, key)
+                self.postings.insert(index, posting)
+                return
+            self.ordered = False
+        self.keys.append(key)
+        self.postings.append(posting)
+
+    def extend(self, other):
+        # adds the keys of another column after those of this one
+        if other.keys and (not other.ordered or (self.keys and other.keys[0] < self.keys[-1])):
+            self.ordered = False
+        self.keys.extend(other.keys)
+        self.postings.extend(other.postings)
+
+    def sort(self):
+        self.sorted = True
+        if self.ordered:
+            return
+        # a stable sort keeps postings with equal keys in insertion order
+        order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.keys = array("d", [self.keys[index] for index in order])
+        self.postings = array("Q", [self.postings[index] for index in order])
+        self.ordered = True
+
+    def remove(self, key, posting):
+        self.sort()
+        for index in range(bisect_left(self.keys, key), bisect_right(self.keys, key)):
+            if self.postings[index] == posting:
+                del self.keys[index]
+                del self.postings[index]
+                return
+
+    def bounds(self, low=None, high=None):
+        # index range of the keys in [low, high), either bound may be open
+        self.sort()
+        start = 0 if low is None else bisect_left(self.keys, low)
+        end = len(self.keys) if high is None else bisect_left(self.keys, high)
+        return start, max(start, end)
+
+    def iter_slice(self, start, end):
+        keys, postings = self.keys, self.postings
+        for index in range(start, end):
+            yield keys[index], postings[index]
+
+
+class RangeIndex:
+    """
+    Sorted range indexes of the numeric and timestamp fields of each group,
+    keyed by (group, field). Timestamps are parsed once, when the record is
+    added, and range lookups are two binary searches.
+    """
+
+    def __init__(self):
+        self.columns = {}
+
+    def add_record(self, table, doc, record, group):
+        for field, value in record.items():
+            parsed = parse_value(value)
+            if parsed is None:
+                continue
+            kind, key = parsed
+            column = self.columns.get((group, field))
+            if column is None:
+                column = self.columns[(group, field)] = RangeColumn(kind)
+            elif column.kind != kind:
+                continue
+            column.add(key, table.posting(doc, field))
+
+    def remove_record(self, table, doc, record, group):
+        for field, value in record.items():
+            parsed = parse_value(value)
+            column = self.columns.get((group, field))
+            if parsed is None or column is None or column.kind != parsed[0]:
+                continue
+            column.remove(parsed[1], table.posting(doc, field))
+            if not column:
+                del self.columns[(group, field)]
+
+    def fields(self, group):
+        return [field for column_group, field in self.columns if column_group == group]
+
+    def search(self, field, groups, low=None, high=None):
+        # yields the postings of the field's values in [low, high) in value order.
+        # The bounds are parsed as numbers or times to match the field, and the
+        # arrays are read lazily so only the hits consumed are visited
+        slices = []
+        for group in groups:
+            column = self.columns.get((group, field))
+            if column is None:
+                continue
+            start, end = column.bounds(parse_bound(column.kind, low), parse_bound(column.kind, high))
+            slices.append(column.iter_slice(start, end))
+        if len(slices) == 1:
+            return (posting for _, posting in slices[0])
+        return (posting for _, posting in merge(*slices, key=lambda pair: pair[0]))
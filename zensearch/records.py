@@ -0,0 +1,121 @@
+from entry import Entry
+from array import array
+from bisect import bisect_left
+from functools import partial
+
+# a posting packs the doc id of a record and the id of one of its fields
+FIELD_BITS = 16
+FIELD_MASK = (1 << FIELD_BITS) - 1
+
+# storage of the postings of one string
+postings = partial(array, "Q")
+
+
+def discard(stored, item):
+    # removes one occurrence of the item, found by binary search as postings
+    # are in doc order after a build, or by a scan in C once updates have
+    # added some out of order. Returns whether the item was there
+    index = bisect_left(stored, item)
+    if index == len(stored) or stored[index] != item:
+        try:
+            index = stored.index(item)
+        except ValueError:
+            return False
+    del stored[index]
+    return True
+
+
+def pack(doc, field_id):
+    return doc << FIELD_BITS | field_id
+
+
+def unpack(posting):
+    return posting >> FIELD_BITS, posting & FIELD_MASK
+
+
+class PostingTable:
+    """
+    Turns the packed postings of a table back into Entries.
+    Tables provide record(doc), group(doc) and their field names by id.
+    """
+
+    def entry(self, posting, string=None):
+        # the string defaults to the value of the field, as for free text
+        doc, field_id = unpack(posting)
+        record = self.record(doc)
+        field = self.fields[field_id]
+        return Entry(record, record[field] if string is None else string, field, self.group(doc))
+
+    def matches(self, posting, field=None, group=None):
+        doc, field_id = unpack(posting)
+        if field and self.fields[field_id] != field:
+            return False
+        return not group or self.group(doc) == group
+
+
+class RecordTable(PostingTable):
+    """
+    Records addressed by integer doc id, with group and field names
+    interned to small integers. The indexes store packed postings
+    and Entries are only created for the results being returned.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.record_groups = array("B")
+        self.groups = []
+        self.group_ids = {}
+        self.fields = []
+        self.field_ids = {}
+        # the docs of each group that have not been removed, in order
+        self.live = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def intern(self, names, ids, name):
+        name_id = ids.get(name)
+        if name_id is None:
+            name_id = ids[name] = len(names)
+            names.append(name)
+        return name_id
+
+    def field_id(self, field):
+        return self.intern(self.fields, self.field_ids, field)
+
+    def add(self, record, group):
+        doc = len(self.records)
+        self.records.append(record)
+        self.record_groups.append(self.intern(self.groups, self.group_ids, group))
+        self.live.setdefault(group, array("Q")).append(doc)
+        return doc
+
+    def update(self, doc, record):
+        self.records[doc] = record
+
+    def remove(self, doc):
+        # doc ids are not reused, the slot is left empty
+        self.records[doc] = None
+        discard(self.live[self.group(doc)], doc)
+
+    def record(self, doc):
+        return self.records[doc]
+
+    def group(self, doc):
+        return self.groups[self.record_groups[doc]]
+
+    def docs(self, group):
+        return self.live.get(group, ())
+
+    def position(self, doc):
+        # the position of the record among the live records of its group,
+        # which is its position in the list of the group
+        return bisect_left(self.live[self.group(doc)], doc)
+
+    def posting(self, doc, field):
+        return pack(doc, self.field_id(field))
+
+    def iter_docs(self):
+        for doc, record in enumerate(self.records):
+            if record is not None:
+                yield doc, record, self.group(doc)
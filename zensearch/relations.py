@@ -0,0 +1,87 @@
+from array import array
+from records import discard
+
+# How each group links to the others:
+# related key -> (field on the record, related group, field on the related record)
+RELATIONS = {
+    "users": {
+        "org": ("organization_id", "orgs", "_id"),
+        "submitted_tickets": ("_id", "tickets", "submitter_id"),
+        "assigned_tickets": ("_id", "tickets", "assignee_id"),
+    },
+    "orgs": {
+        "users": ("_id", "users", "organization_id"),
+        "tickets": ("_id", "tickets", "organization_id"),
+    },
+    "tickets": {
+        "submitter": ("submitter_id", "users", "_id"),
+        "assignee": ("assignee_id", "users", "_id"),
+        "org": ("organization_id", "orgs", "_id"),
+    },
+}
+
+# every (group, field) pair that records are joined on
+JOIN_KEYS = {
+    (related_group, related_field)
+    for relations in RELATIONS.values()
+    for _, related_group, related_field in relations.values()
+}
+
+
+def normalise(value):
+    return str(value).lower()
+
+
+def join_values(record, group):
+    # the values the related records of the record are looked up by, so the
+    # same values always find the same related records
+    return tuple(normalise(record[field]) if field in record else None for field, _, _ in RELATIONS[group].values())
+
+
+def related_records(lookup, record, group):
+    # returns the related records of the record keyed by relationship name,
+    # relationships the record has no field for resolve to an empty list
+    related = {}
+    for key, (field, related_group, related_field) in RELATIONS[group].items():
+        if field in record:
+            related[key] = lookup(related_group, related_field, record[field])
+        else:
+            related[key] = []
+    return related
+
+
+class RelationIndex:
+    """
+    Foreign key join index between users, tickets and orgs.
+    Built once at load time so that the records related to a
+    result are resolved with dictionary lookups. Records are held
+    by their doc id in the table.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.index = {}
+
+    def add(self, doc, record, group):
+        for join_group, join_field in JOIN_KEYS:
+            if join_group == group and join_field in record:
+                key = (group, join_field, normalise(record[join_field]))
+                docs = self.index.get(key)
+                if docs is None:
+                    self.index[key] = array("I", [doc])
+                else:
+                    docs.append(doc)
+
+    def remove(self, doc, record, group):
+        for join_group, join_field in JOIN_KEYS:
+            if join_group == group and join_field in record:
+                key = (group, join_field, normalise(record[join_field]))
+                docs = self.index.get(key)
+                if docs is not None and discard(docs, doc) and not docs:
+                    del self.index[key]
+
+    def lookup(self, group, field, value):
+        return [self.table.record(doc) for doc in self.index.get((group, field, normalise(value)), ())]
+
+    def related(self, record, group):
+        return related_records(self.lookup, record, group)
@@ -0,0 +1,145 @@
+from batch import SUMMARY_FIELDS
+from relations import RELATIONS
+from abc import ABC, abstractmethod
+import json
+import yaml
+
+
+def related_summary(record, group):
+    # the one line summary shown in place of a related record
+    if group == "tickets":
+        return f"Subject: {record.get('subject')} | ID: {record.get('_id')}"
+    return f"Name: {record.get('name')} | ID: {record.get('_id')}"
+
+
+def format_value(value):
+    if type(value) is list:
+        return "".join(f"\n  - {format_value(item)}" for item in value)
+    if type(value) is bool:
+        return "true" if value else "false"
+    if value is None:
+        return "null"
+    return str(value)
+
+
+def format_line(label, value):
+    # lists start on the line after their label
+    if type(value) is list:
+        return f"{label}{format_value(value)}\n"
+    return f"{label} {format_value(value)}\n"
+
+
+class Renderer(ABC):
+    """
+    Turns results into text for a stream. start, heading and empty give
+    the lines written before a set of results, before each page of them
+    and in place of none.
+    """
+
+    def __init__(self, group_fields=None):
+        pass
+
+    def start(self, count):
+        return f"{count} found!\n" + self.heading()
+
+    def heading(self):
+        return ""
+
+    def empty(self):
+        return "No Results Found!\n"
+
+    def facets(self, facets):
+        # the counts of the most common values of each facet field
+        lines = ["Facets\n"]
+        for field, counts in facets.items():
+            if counts:
+                lines.append(f"  {field}: {', '.join(f'{value} ({count})' for value, count in counts)}\n")
+        return "".join(lines)
+
+    @abstractmethod
+    def render(self, group, record):
+        pass
+
+
+class TextRenderer(Renderer):
+    """
+    Renders a result as "field: value" lines. The heading and field labels
+    of each group are compiled into a template once, from the group's
+    fields and relationships, rather than formatted for every result.
+    """
+
+    def __init__(self, group_fields=None):
+        self.group_fields = group_fields or {}
+        self.templates = {}
+
+    def compile(self, group, record):
+        # the fields of a group are only known once its records are loaded
+        fields = list(self.group_fields.get(group) or record) + list(RELATIONS.get(group, ()))
+        heading = f"{group[0].upper()}{group[1:-1]}\n"
+        labels = tuple((field, f"{field}:") for field in fields)
+        self.templates[group] = (heading, labels, frozenset(fields))
+        return self.templates[group]
+
+    def render(self, group, record):
+        heading, labels, known = self.templates.get(group) or self.compile(group, record)
+        lines = [heading]
+        matched = 0
+        for field, label in labels:
+            if field in record:
+                lines.append(format_line(label, record[field]))
+                matched += 1
+        if matched < len(record):
+            # fields added since the template was compiled, and related records
+            for field, value in record.items():
+                if field not in known:
+                    lines.append(format_line(f"{field}:", value))
+        return "".join(lines)
+
+
+class JsonRenderer(Renderer):
+    """
+    Renders each result as one line of JSON, so the output is NDJSON.
+    """
+
+    def start(self, count):
+        return ""
+
+    def empty(self):
+        return ""
+
+    def facets(self, facets):
+        return json.dumps({"facets": facets}, ensure_ascii=False) + "\n"
+
+    def render(self, group, record):
+        return json.dumps({"group": group, "record": record}, ensure_ascii=False) + "\n"
+
+
+class TableRenderer(Renderer):
+    """
+    Renders each result as one row of a table of its group,
+    _id and name or subject.
+    """
+
+    WIDTH = 60
+
+    def heading(self):
+        return f"{'group':<8}{'_id':<38}name/subject\n"
+
+    def render(self, group, record):
+        label = str(record.get(SUMMARY_FIELDS[group][1], ""))
+        if len(label) > self.WIDTH:
+            label = label[: self.WIDTH - 3] + "..."
+        return f"{group:<8}{str(record.get('_id', '')):<38}{label}\n"
+
+
+class YamlRenderer(Renderer):
+    """
+    Renders a result as YAML. Much slower than the text template,
+    so only used when asked for.
+    """
+
+    def render(self, group, record):
+        return f"{group[0].upper()}{group[1:-1]}\n" + yaml.dump(record, allow_unicode=True)
+
+
+RENDERERS = {"text": TextRenderer, "json": JsonRenderer, "table": TableRenderer, "yaml": YamlRenderer}
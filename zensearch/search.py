@@ -1,8 +1,32 @@
 from trie import Trie
+from field_index import FieldIndex
+from relations import RelationIndex, RELATIONS, join_values, normalise
+from snapshot import Snapshot, write_snapshot
+from loader import iter_records
+from parallel import build_parallel
+from text_index import InvertedIndex, Analyzer, STOPWORDS
+from range_index import RangeIndex
+from substring_index import SubstringIndex
+from facet_index import FacetIndex
+from planner import Planner, parse_filter
+from batch import BatchSearch
+from cache import QueryCache
+from render import RENDERERS, related_summary
+from metrics import NULL_METRICS, Metrics, PrintSink
+from server import serve
+from records import RecordTable, postings, unpack
 from entry import Entry
-from query import Query
+from query import Query, MAX_FUZZINESS
+from itertools import islice
+from array import array
+import os
 import sys
-import json
+import argparse
+import tempfile
+
+PAGE_SIZE = 10
+# values shown for each facet field
+FACET_LIMIT = 10
 
 
 class Search:
@@ -13,20 +37,145 @@ class Search:
     Groups: "users", "tickets", "orgs"
     """
 
-    def __init__(self, users_filepath, tickets_filepath, orgs_filepath):
-        self.users = self.load_file(users_filepath)
-        self.tickets = self.load_file(tickets_filepath)
-        self.orgs = self.load_file(orgs_filepath)
+    def __init__(
+        self,
+        users_filepath,
+        tickets_filepath,
+        orgs_filepath,
+        stream=False,
+        cache_size=1024,
+        cache_ttl=None,
+        output_format="text",
+        output=None,
+        metrics=None,
+    ):
+        self.sources = [users_filepath, tickets_filepath, orgs_filepath]
+        self.stream = stream
+        # timers and counters of each phase, switched off unless given
+        self.metrics = metrics or NULL_METRICS
+        if stream:
+            # records are read and indexed one at a time by build_search
+            self.users, self.tickets, self.orgs = [], [], []
+        else:
+            with self.metrics.timer("load"):
+                self.users = self.load_file(users_filepath)
+                self.tickets = self.load_file(tickets_filepath)
+                self.orgs = self.load_file(orgs_filepath)
         self.groups = {"users": self.users, "tickets": self.tickets, "orgs": self.orgs}
         self.user_fields = self.get_fields(self.users)
         self.org_fields = self.get_fields(self.orgs)
         self.ticket_fields = self.get_fields(self.tickets)
-        self.trie = Trie()
+        # records are addressed by doc id and the indexes hold packed
+        # (doc, field) postings, Entries are created for results only
+        self.records = RecordTable()
+        self.trie = Trie(postings)
+        self.field_index = FieldIndex()
+        self.relations = RelationIndex(self.records)
+        self.text_index = InvertedIndex(Analyzer(STOPWORDS))
+        self.range_index = RangeIndex()
+        # built on the first substring search and facet count, then kept up
+        # to date as records change
+        self.substring_index = None
+        self.facet_index = None
+        # query results and related records, cleared whenever the index changes
+        self.cache = QueryCache(cache_size, cache_ttl)
+        self.set_output(output_format, output)
+        self.set_metrics(self.metrics)
+
+    @classmethod
+    def open(cls, users_filepath, tickets_filepath, orgs_filepath, snapshot_path, workers=None, metrics=None):
+        # reopens the snapshot if it was built from the same files, otherwise
+        # builds the search from the files and saves a new snapshot
+        sources = [users_filepath, tickets_filepath, orgs_filepath]
+        with (metrics or NULL_METRICS).timer("snapshot.open"):
+            snapshot = Snapshot.open(snapshot_path, sources)
+        if snapshot:
+            search = cls.from_snapshot(snapshot, sources)
+            search.set_metrics(metrics or NULL_METRICS)
+            return search
+        search = cls(*sources, metrics=metrics)
+        search.build_search(workers)
+        with search.metrics.timer("snapshot.save"):
+            search.save_snapshot(snapshot_path)
+        return search
+
+    @classmethod
+    def from_snapshot(cls, snapshot, sources):
+        # the memory mapped snapshot stands in for the trie, field index and
+        # relation index, records are only decoded when a query returns them
+        search = cls.__new__(cls)
+        search.sources = sources
+        search.stream = False
+        search.users = snapshot.group_records("users")
+        search.tickets = snapshot.group_records("tickets")
+        search.orgs = snapshot.group_records("orgs")
+        search.groups = {"users": search.users, "tickets": search.tickets, "orgs": search.orgs}
+        search.user_fields = snapshot.group_fields("users")
+        search.org_fields = snapshot.group_fields("orgs")
+        search.ticket_fields = snapshot.group_fields("tickets")
+        search.records = snapshot
+        search.trie = snapshot
+        search.field_index = snapshot
+        search.relations = snapshot
+        # the text and range indexes are not part of the snapshot, they are
+        # built on first use
+        search.text_index = None
+        search.range_index = None
+        search.substring_index = None
+        search.facet_index = None
+        search.cache = QueryCache()
+        search.set_output()
+        search.set_metrics(NULL_METRICS)
+        return search
+
+    def set_metrics(self, metrics):
+        self.metrics = metrics
+        self.trie.metrics = metrics
+
+    def save_snapshot(self, path):
+        group_fields = {group: self.get_group_fields(group) for group in self.groups}
+        write_snapshot(path, self.groups, group_fields, self.sources)
+
+    def freeze(self, path=None):
+        # returns a read only copy of the search served from a memory mapped
+        # snapshot, written to path or to a temporary file that is unlinked
+        # once mapped. Processes forked from it share the pages of one copy
+        # of the index, where a built index is copied page by page as soon
+        # as they touch the reference counts of its objects
+        if isinstance(self.records, Snapshot):
+            return self
+        temporary = path is None
+        if temporary:
+            fd, path = tempfile.mkstemp(suffix=".snapshot")
+            os.close(fd)
+        try:
+            self.save_snapshot(path)
+            snapshot = Snapshot(path)
+        finally:
+            if temporary:
+                os.unlink(path)
+        frozen = self.from_snapshot(snapshot, self.sources)
+        # the text and range indexes are flat arrays, kept rather than rebuilt.
+        # The suffix array is sorted before freezing, so that processes forked
+        # from the frozen search share it rather than each sorting their own
+        frozen.text_index = self.text_index
+        frozen.range_index = self.range_index
+        frozen.substring_index = self.get_substring_index()
+        frozen.facet_index = self.facet_index
+        frozen.cache = QueryCache(self.cache.maxsize, self.cache.ttl)
+        frozen.renderer = self.renderer
+        frozen.output = self.output
+        frozen.set_metrics(self.metrics)
+        return frozen
 
     def load_file(self, filepath):
+        return list(self.read_file(filepath))
+
+    def read_file(self, filepath):
+        # parses the records of a JSON array or newline delimited JSON file
+        # one at a time rather than reading the whole document into memory
         try:
-            with open(filepath, "r") as f:
-                return json.load(f)
+            yield from iter_records(filepath)
         except FileNotFoundError as err:
             print(f"File: {filepath}, not found!")
             raise (err)
@@ -34,35 +183,314 @@ class Search:
             print(f"File: {filepath}, could not be loaded!")
             raise (err)
 
-    def build_search(self):
+    def build_search(self, workers=None):
+        with self.metrics.timer("build"):
+            self.build_groups(workers)
+
+    def build_groups(self, workers=None):
+        # workers > 1 indexes loaded records across a process pool,
+        # streamed records are always indexed as they are read
+        if workers and workers > 1 and not self.stream:
+            with self.metrics.timer("build.parallel"):
+                build_parallel(self, workers)
+            self.metrics.count("build.records", len(self.records))
+            self.cache.clear()
+            return
+        if self.stream:
+            self.stream_group(self.sources[0], "users")
+            self.stream_group(self.sources[1], "tickets")
+            self.stream_group(self.sources[2], "orgs")
+            return
         self.add_group(self.users, "users")
         self.add_group(self.tickets, "tickets")
         self.add_group(self.orgs, "orgs")
 
     def add_group(self, group, group_name):
-        for item in group:
-            self.add_item(item, group_name)
+        with self.metrics.timer(f"build.{group_name}"):
+            for item in group:
+                self.add_record(item, group_name)
+        self.metrics.count("build.records", len(group))
+
+    def stream_group(self, filepath, group_name):
+        # indexes each record as soon as it has been parsed
+        records = self.groups[group_name]
+        with self.metrics.timer(f"build.{group_name}"):
+            for item in self.read_file(filepath):
+                records.append(item)
+                self.add_fields(item, group_name)
+                self.add_record(item, group_name)
+        self.metrics.count("build.records", len(records))
 
     def add_item(self, item_data, group_name):
-        # creates Entry for all the field values in each user, ticket and org
-        # this is then inserted into the trie
+        # a new record joins the records of its group and adds its fields to
+        # theirs, so that it is kept by snapshots as well as indexed
+        self.check_writable()
+        self.groups[group_name].append(item_data)
+        self.add_fields(item_data, group_name)
+        self.add_record(item_data, group_name)
+
+    def check_writable(self):
+        if isinstance(self.trie, Snapshot):
+            raise ValueError("A search opened from a snapshot is read only")
+
+    def add_record(self, item_data, group_name):
+        # stores and indexes a record already in the list of its group
+        doc = self.records.add(item_data, group_name)
+        self.index_item(doc, item_data, group_name)
+        return doc
+
+    def add_fields(self, item_data, group_name):
+        fields = self.get_group_fields(group_name)
+        for field in item_data:
+            fields.setdefault(field, None)
+
+    def index_item(self, doc, item_data, group_name):
+        # posts the doc id and field of all the field values in each user,
+        # ticket and org into the trie and the field index
+        self.cache.clear()
+        self.relations.add(doc, item_data, group_name)
         for field, value in item_data.items():
-            if type(value) is list:
-                for search_term in value:
-                    new_entry = Entry(item_data, search_term, field, group_name)
-                    self.trie.add(new_entry)
-            else:
-                new_entry = Entry(item_data, value, field, group_name)
-                self.trie.add(new_entry)
+            posting = self.records.posting(doc, field)
+            values = value if type(value) is list else [value]
+            for search_term in values:
+                string = normalise(search_term)
+                self.trie.insert(string, posting)
+                self.field_index.add(string, field, group_name, posting)
+                if self.substring_index is not None:
+                    self.substring_index.add(string)
+        # indexes that are not built yet are built from the records on first use
+        if self.text_index is not None:
+            self.text_index.add_record(self.records, doc, item_data)
+        if self.range_index is not None:
+            self.range_index.add_record(self.records, doc, item_data, group_name)
+        if self.facet_index is not None:
+            self.facet_index.add(doc, item_data, group_name)
+
+    def entries(self, string, postings):
+        with self.metrics.timer("entries.create"):
+            entries = [self.records.entry(posting, string) for posting in postings]
+        self.metrics.count("entries.created", len(entries))
+        return entries
+
+    def find_doc(self, group_name, item_id):
+        postings = self.field_index.retrieve(normalise(item_id), "_id", group_name)
+        if not postings:
+            raise KeyError(f"No {group_name} record with _id {item_id}")
+        return unpack(postings[0])[0]
+
+    def find_item(self, group_name, item_id):
+        return self.records.record(self.find_doc(group_name, item_id))
+
+    def update_item(self, group_name, item_id, item_data):
+        # replaces the contents of the record in place, so only the entries
+        # of the old and new values are touched
+        self.check_writable()
+        doc = self.find_doc(group_name, item_id)
+        record = self.records.record(doc)
+        self.remove_entries(doc, record, group_name)
+        record.clear()
+        record.update(item_data)
+        self.add_fields(record, group_name)
+        self.records.update(doc, record)
+        self.index_item(doc, record, group_name)
+        return record
+
+    def delete_item(self, group_name, item_id):
+        self.check_writable()
+        doc = self.find_doc(group_name, item_id)
+        record = self.records.record(doc)
+        position = self.records.position(doc)
+        self.remove_entries(doc, record, group_name)
+        self.records.remove(doc)
+        del self.groups[group_name][position]
+        return record
+
+    def remove_entries(self, doc, record, group_name):
+        # removes every posting of the record from the trie and the indexes
+        self.cache.clear()
+        self.relations.remove(doc, record, group_name)
+        if self.text_index is not None:
+            self.text_index.remove_record(self.records, doc, record)
+        if self.range_index is not None:
+            self.range_index.remove_record(self.records, doc, record, group_name)
+        if self.facet_index is not None:
+            self.facet_index.remove(doc, record, group_name)
+        # each value's posting is taken out of its list where it is, rather
+        # than the list being rebuilt without the doc
+        for field, value in record.items():
+            posting = self.records.posting(doc, field)
+            values = value if type(value) is list else [value]
+            for search_term in values:
+                string = normalise(search_term)
+                self.trie.discard(string, posting)
+                self.field_index.discard(string, field, group_name, posting)
+                if self.substring_index is not None and not self.trie.retrieve(string):
+                    self.substring_index.discard(string)
 
     # search across all groups
     def freeform_search(self, query):
-        return self.trie.retrieve(query.string)
+        key = ("freeform", query.string, query.fuzziness)
+        return self.cache.cached(key, lambda: self.retrieve(query))
+
+    def retrieve(self, query):
+        if query.fuzziness:
+            with self.metrics.timer("trie.fuzzy"):
+                matches = self.trie.fuzzy_matches(query.string, query.fuzziness)
+            return [entry for _, string, postings in matches for entry in self.entries(string, postings)] or False
+        with self.metrics.timer("trie.retrieve"):
+            postings = self.trie.retrieve(query.string)
+        return self.entries(query.string, postings) if postings else False
+
+    # lazily searches for strings starting with the query, filtered by the
+    # query's field and group when set. Only offset + limit hits are visited.
+    def prefix_search(self, query, limit=None, offset=0):
+        hits = (
+            (string, posting)
+            for string, postings in self.trie.iter_terminals(query.string)
+            for posting in postings
+            if self.records.matches(posting, query.field, query.group)
+        )
+        stop = offset + limit if limit is not None else None
+        return (self.records.entry(posting, string) for string, posting in islice(hits, offset, stop))
+
+    # lazily searches for values containing the query anywhere in them,
+    # filtered by the query's field and group when set. Strings removed since
+    # the suffix array was built have no postings left and are skipped
+    def substring_search(self, query, limit=None, offset=0):
+        hits = (
+            (string, posting)
+            for string in self.get_substring_index().search(query.string)
+            for posting in self.trie.retrieve(string) or ()
+            if self.records.matches(posting, query.field, query.group)
+        )
+        stop = offset + limit if limit is not None else None
+        return (self.records.entry(posting, string) for string, posting in islice(hits, offset, stop))
+
+    def get_substring_index(self):
+        # built on first use, then kept up to date by writes until enough
+        # strings have changed for it to be rebuilt
+        if self.substring_index is None or self.substring_index.stale():
+            with self.metrics.timer("substring.build"):
+                self.substring_index = SubstringIndex(string for string, _ in self.trie.iter_terminals(""))
+        return self.substring_index
+
+    # finds records whose subject, description or signature contain every word
+    # of the text, or any of them when operator is "or"
+    def text_search(self, text, operator="and", field=None, group=None):
+        if self.text_index is None:
+            self.text_index = InvertedIndex(Analyzer(STOPWORDS))
+            for doc, record, _ in self.records.iter_docs():
+                self.text_index.add_record(self.records, doc, record)
+        results = [
+            self.records.entry(posting)
+            for posting in self.text_index.search(text, operator)
+            if self.records.matches(posting, field, group)
+        ]
+        return results or None
+
+    # lazily searches for records whose numeric or timestamp field is at least
+    # low and before high, in value order. Either bound may be left open, and
+    # match narrows the results to the records a scoped query finds.
+    def range_search(self, field, group=None, low=None, high=None, match=None, limit=None, offset=0):
+        groups = [group] if group else list(self.groups)
+        hits = self.get_range_index().search(field, groups, low, high)
+        if match is not None:
+            docs = {unpack(posting)[0] for posting in self.match_postings(match)}
+            hits = (posting for posting in hits if unpack(posting)[0] in docs)
+        stop = offset + limit if limit is not None else None
+        return (self.records.entry(posting) for posting in islice(hits, offset, stop))
+
+    def match_postings(self, query):
+        if query.field and query.group:
+            return self.field_index.retrieve(query.string, query.field, query.group)
+        postings = self.trie.retrieve(query.string) or []
+        return [posting for posting in postings if self.records.matches(posting, query.field, query.group)]
+
+    def range_fields(self, group):
+        return self.get_range_index().fields(group)
+
+    def get_range_index(self):
+        if self.range_index is None:
+            self.range_index = RangeIndex()
+            for doc, record, group_name in self.records.iter_docs():
+                self.range_index.add_record(self.records, doc, record, group_name)
+        return self.range_index
+
+    # counts the values of the facet fields among the records of the group
+    # that the query finds, or among all of them, narrowed to the records
+    # holding every value of where, e.g. {"status": "pending"}. Returns the
+    # most common values of each field with their counts, keyed by field
+    def facets(self, group, query=None, where=None, fields=None, limit=FACET_LIMIT):
+        index = self.get_facet_index()
+        with self.metrics.timer("facets"):
+            bits = index.everything(group)
+            if query is not None:
+                bits &= self.select(index, group, self.match_postings(Query(query.string, query.field, group)))
+            for field, value in (where or {}).items():
+                if index.has_field(group, field):
+                    bits &= index.value(group, field, value)
+                else:
+                    bits &= self.select(index, group, self.field_index.retrieve(normalise(value), field, group))
+            return {field: index.counts(group, field, bits, limit) for field in fields or index.group_fields(group)}
+
+    def select(self, index, group, postings):
+        return index.select(group, (unpack(posting)[0] for posting in postings))
+
+    def get_facet_index(self):
+        if self.facet_index is None:
+            with self.metrics.timer("facets.build"):
+                self.facet_index = FacetIndex().build(self.records.iter_docs())
+        return self.facet_index
+
+    # lazily finds the records of the group matching a filter of several
+    # fields, such as "status=pending AND priority=high", given as text or
+    # as Term, And, Or and Not clauses
+    def structured_search(self, clause, group, limit=None, offset=0):
+        planner = Planner(self, group)
+        with self.metrics.timer("structured"):
+            docs = planner.run(planner.plan(self.parse_clause(clause)))
+        stop = offset + limit if limit is not None else None
+        return (self.group_entry(doc, group) for doc in islice(docs, offset, stop))
+
+    # the plan of a filter, with the rows each step was estimated to
+    # return and the rows it did return
+    def explain(self, clause, group):
+        planner = Planner(self, group)
+        step = planner.plan(self.parse_clause(clause))
+        planner.run(step)
+        return f"{group}: {self.parse_clause(clause)}\n" + planner.explain(step)
+
+    def parse_clause(self, clause):
+        return parse_filter(clause) if isinstance(clause, str) else clause
+
+    def group_entry(self, doc, group):
+        record = self.records.record(doc)
+        return Entry(record, record.get("_id"), "_id", group)
+
+    def cardinality(self, group, field, value):
+        return len(self.field_index.retrieve(normalise(value), field, group))
+
+    def term_docs(self, group, field, value):
+        postings = self.field_index.retrieve(normalise(value), field, group)
+        return array("Q", sorted({unpack(posting)[0] for posting in postings}))
+
+    def group_docs(self, group):
+        # the live docs of the group in order, kept by the record table
+        return self.records.docs(group)
 
     # filters a freeform search by group and field
     def field_and_group_search(self, query=None, query_string=None, field=None, group=None):
         if not query:
             query = Query(query_string, field, group)
+        key = ("search", query.string, query.field, query.group, query.fuzziness)
+        return self.cache.cached(key, lambda: self.scoped_search(query))
+
+    def scoped_search(self, query):
+        if query.field and query.group and not query.fuzziness:
+            # scoped searches go straight to the field index
+            with self.metrics.timer("field_index.retrieve"):
+                postings = self.field_index.retrieve(query.string, query.field, query.group)
+            return self.entries(query.string, postings) or None
         unfiltered_results = self.freeform_search(query)
         if not unfiltered_results:
             return None
@@ -70,28 +498,72 @@ class Search:
             return self.filter_results(query, unfiltered_results)
 
     def filter_results(self, query, results):
-        if query.field:
-            results = list(filter(lambda entry: entry.field == query.field, results))
-        if query.group:
-            results = list(filter(lambda entry: entry.group == query.group, results))
+        self.metrics.count("entries.scanned", len(results))
+        with self.metrics.timer("filter_results"):
+            if query.field:
+                results = list(filter(lambda entry: entry.field == query.field, results))
+            if query.group:
+                results = list(filter(lambda entry: entry.group == query.group, results))
+        self.metrics.count("entries.returned", len(results))
         return results
 
+    def get_related(self, record, group):
+        # records linked to the record through organization_id, submitter_id
+        # and assignee_id, keyed by relationship name. They are cached by the
+        # values they are looked up by rather than by the identity of the
+        # record, as records decoded from a snapshot are new dicts whose ids
+        # are reused once they are freed
+        key = ("related", group, join_values(record, group))
+        return self.cache.cached(key, lambda: self.resolve_related(record, group))
+
+    def resolve_related(self, record, group):
+        self.metrics.count("related.lookups", len(RELATIONS[group]))
+        with self.metrics.timer("related"):
+            return self.relations.related(record, group)
+
+    def set_output(self, output_format="text", output=None):
+        # results are rendered as text, json (NDJSON), table or yaml and written
+        # to output, stdout by default, which is flushed after each set of results
+        group_fields = {group: self.get_group_fields(group) for group in self.groups}
+        self.renderer = RENDERERS[output_format](group_fields)
+        self.output = output
+
+    def get_output(self):
+        return self.output or sys.stdout
+
+    def result_view(self, result):
+        # the record with summaries of its related records in place of them,
+        # the record itself is left unchanged
+        view = dict(result.data)
+        for key, records in self.get_related(result.data, result.group).items():
+            if records:
+                related_group = RELATIONS[result.group][key][1]
+                view[key] = [related_summary(record, related_group) for record in records]
+        return view
+
+    def render_result(self, result):
+        view = self.result_view(result)
+        self.metrics.count("results.rendered")
+        with self.metrics.timer("render"):
+            return self.renderer.render(result.group, view)
+
     def output_result(self, result):
-        queries = result.get_related_queries()
-        for key, query in queries.items():
-            result.related_results[key] = self.field_and_group_search(query)
-        result.save_related_results()
-        print(f"{result.group[0].upper()}{result.group[1:-1]}")
-        print(result.format())
+        self.get_output().write(self.render_result(result))
 
     def output_results(self, results):
+        output = self.get_output()
         if not results:
-            print("No Results Found!")
-            return
+            output.write(self.renderer.empty())
+        else:
+            output.write(self.renderer.start(len(results)))
+            for result in results:
+                output.write(self.render_result(result))
+        output.flush()
 
-        print(f"{len(results)} found!")
-        for result in results:
-            self.output_result(result)
+    def output_facets(self, facets):
+        output = self.get_output()
+        output.write(self.renderer.facets(facets))
+        output.flush()
 
     def get_fields(self, group_data):
         fields = {}
@@ -100,6 +572,9 @@ class Search:
                 fields.setdefault(field, None)
         return fields
 
+    def get_group_fields(self, group_name):
+        return {"users": self.user_fields, "tickets": self.ticket_fields, "orgs": self.org_fields}[group_name]
+
     def format_fields(self, fields):
         for field in fields:
             print(field)
@@ -110,40 +585,201 @@ class Search:
         chosen_field = input("Please enter the name of the field you wish to search on\n >>>> ")
         if chosen_field in group_fields:
             user_query = input("Please enter a search query\n >>>> ")
-            results = self.field_and_group_search(
-                query_string=user_query, field=chosen_field, group=group
+            query = Query(user_query, field=chosen_field, group=group)
+            results = self.field_and_group_search(query) or self.fuzzy_fallback(
+                query, self.field_and_group_search
             )
             self.output_results(results)
+            if results and not query.fuzziness:
+                self.output_facets(self.facets(group, query))
         else:
             print("Please enter a correct field")
 
+    def fuzzy_fallback(self, query, search):
+        # retries a search that found nothing, allowing one more typo each time
+        for fuzziness in range(1, MAX_FUZZINESS + 1):
+            query.fuzziness = fuzziness
+            results = search(query)
+            if results:
+                print(f"No exact matches, showing matches within {fuzziness} typo(s)")
+                return results
+        return None
+
+    def prompt_prefix(self, page_size=PAGE_SIZE):
+        user_query = input("Please enter the start of a search query\n >>>> ")
+        self.output_pages(self.prefix_search(Query(user_query)), page_size)
+
+    def output_pages(self, results, page_size=PAGE_SIZE):
+        output = self.get_output()
+        page_number = 0
+        while True:
+            page = list(islice(results, page_size))
+            if not page:
+                if not page_number:
+                    output.write(self.renderer.empty())
+                    output.flush()
+                break
+            page_number += 1
+            output.write(f"Page {page_number}\n{self.renderer.heading()}")
+            for result in page:
+                output.write(self.render_result(result))
+            output.flush()
+            if len(page) < page_size:
+                break
+            if input("Press enter for the next page or type stop\n >>>> ").lower() == "stop":
+                break
+
+    def prompt_substring(self, page_size=PAGE_SIZE):
+        user_query = input("Please enter part of a value to search for\n >>>> ")
+        self.output_pages(self.substring_search(Query(user_query)), page_size)
+
+    def prompt_structured(self, page_size=PAGE_SIZE):
+        choice = input("Please enter the group to search: Users, Organizations or Tickets\n >>>> ").lower()
+        group = {"users": "users", "organizations": "orgs", "tickets": "tickets"}.get(choice)
+        if group is None:
+            print("Please enter a correct group")
+            return
+        text = input(
+            "Please enter a filter such as status=pending AND (priority=high OR NOT tags=Ohio),"
+            " starting with explain to see its plan\n >>>> "
+        )
+        explain = text.lower().startswith("explain ")
+        try:
+            clause = parse_filter(text[len("explain ") :] if explain else text)
+        except ValueError as err:
+            print(err)
+            return
+        if explain:
+            self.get_output().write(self.explain(clause, group))
+        else:
+            self.output_pages(self.structured_search(clause, group), page_size)
+
+    def prompt_range(self, page_size=PAGE_SIZE):
+        choice = input("Please enter the group to search: Users, Organizations or Tickets\n >>>> ").lower()
+        group = {"users": "users", "organizations": "orgs", "tickets": "tickets"}.get(choice)
+        if group is None:
+            print("Please enter a correct group")
+            return
+        range_fields = self.range_fields(group)
+        print("The following fields can be searched by range")
+        self.format_fields(range_fields)
+        field = input("Please enter the name of the field you wish to search on\n >>>> ")
+        if field not in range_fields:
+            print("Please enter a correct field")
+            return
+        low = input("Please enter the lowest value, or leave blank for no lower limit\n >>>> ")
+        high = input("Please enter the value to stop before, or leave blank for no upper limit\n >>>> ")
+        try:
+            self.output_pages(self.range_search(field, group, low, high), page_size)
+        except ValueError as err:
+            print(err)
+
+    def prompt_text(self):
+        text = input("Please enter the words to search subjects, descriptions and signatures for\n >>>> ")
+        operator = input("Match all of the words or any of them? (all/any)\n >>>> ").lower()
+        results = self.text_search(text, operator="or" if operator == "any" else "and")
+        self.output_results(results)
+
     def prompt(self):
         choice = None
         while choice != "quit":
             print(
-                "\n\nHi Welcome to Zendesk Search. Please enter one of the following options\nFreeform, Users, Organizations, Tickets"
+                "\n\nHi Welcome to Zendesk Search. Please enter one of the following options\nFreeform, Prefix, Substring, Text, Range, Filter, Users, Organizations, Tickets"
             )
             choice = input(" >>>> ").lower()
             if choice == "freeform":
                 user_query = input("Please enter a search query: \n >>>> ")
                 query = Query(user_query)
-                results = self.freeform_search(query)
+                results = self.freeform_search(query) or self.fuzzy_fallback(query, self.freeform_search)
                 self.output_results(results)
+            if choice == "prefix":
+                self.prompt_prefix()
+            if choice == "substring":
+                self.prompt_substring()
+            if choice == "text":
+                self.prompt_text()
+            if choice == "range":
+                self.prompt_range()
+            if choice == "filter":
+                self.prompt_structured()
             if choice == "users":
                 self.prompt_group("users", self.user_fields)
             if choice == "tickets":
                 self.prompt_group("tickets", self.ticket_fields)
             if choice == "organizations":
                 self.prompt_group("orgs", self.org_fields)
+            # the timers and counters of the choice, when profiling
+            self.metrics.report(choice)
             if choice == "quit":
                 sys.exit()
 
 
 if __name__ == "__main__":
-    s = Search(
-        users_filepath="data/users.json",
-        tickets_filepath="data/tickets.json",
-        orgs_filepath="data/organizations.json",
+    parser = argparse.ArgumentParser(description="Search CLI for Zendesk")
+    parser.add_argument("--snapshot", help="load the index from this snapshot, rebuilding it when the data changes")
+    parser.add_argument("--workers", type=int, help="build the index across this many processes")
+    parser.add_argument("--batch", help="run the queries in this file (- for stdin), one per line, and write NDJSON")
+    parser.add_argument("--format", choices=sorted(RENDERERS), default="text", help="how results are written")
+    parser.add_argument("--profile", action="store_true", help="print timers and counters for the build and each query")
+    parser.add_argument("--serve", metavar="[HOST:]PORT", help="serve queries over HTTP on this address")
+    parser.add_argument("--unix-socket", help="serve queries over HTTP on this Unix socket")
+    parser.add_argument("--processes", type=int, default=1, help="serve from this many forked processes sharing one index")
+    parser.add_argument("--shards", type=int, help="partition the records by _id across this many processes")
+    parser.add_argument("--lazy", action="store_true", help="read each group and index each field on first use")
+    parser.add_argument(
+        "--warm", metavar="GROUP[.FIELD],...", help="with --lazy, index these fields or groups in the background"
     )
-    s.build_search()
-    s.prompt()
+    parser.add_argument("--columnar", action="store_true", help="hold the records by column rather than as dicts")
+    args = parser.parse_args()
+    if args.shards and (args.snapshot or args.processes > 1):
+        parser.error("--shards cannot be combined with --snapshot or --processes")
+    if args.lazy and (args.snapshot or args.shards):
+        parser.error("--lazy cannot be combined with --snapshot or --shards")
+    if args.warm and not args.lazy:
+        parser.error("--warm needs --lazy")
+    if args.columnar and (args.snapshot or args.shards or args.lazy):
+        parser.error("--columnar cannot be combined with --snapshot, --shards or --lazy")
+    # results are flushed once per set of results rather than once per line
+    sys.stdout.reconfigure(line_buffering=False)
+
+    files = {
+        "users_filepath": "data/users.json",
+        "tickets_filepath": "data/tickets.json",
+        "orgs_filepath": "data/organizations.json",
+    }
+    metrics = Metrics(PrintSink(sys.stderr)) if args.profile else None
+    if args.snapshot:
+        s = Search.open(snapshot_path=args.snapshot, workers=args.workers, metrics=metrics, **files)
+    elif args.shards:
+        # imported here, as shards builds on this module
+        from shards import ShardedSearch
+
+        s = ShardedSearch(shards=args.shards, metrics=metrics, **files)
+        s.build_search(workers=args.workers)
+    elif args.lazy:
+        # imported here, as lazy builds on this module
+        from lazy import LazySearch, parse_warm
+
+        s = LazySearch(metrics=metrics, **files)
+        if args.warm:
+            s.warm(parse_warm(args.warm))
+    elif args.columnar:
+        # imported here, as columns builds on this module
+        from columns import ColumnarSearch
+
+        s = ColumnarSearch(metrics=metrics, **files)
+        s.build_search()
+    else:
+        s = Search(metrics=metrics, **files)
+        s.build_search(workers=args.workers)
+    s.metrics.report("index build")
+
+    s.set_output(args.format)
+    if args.batch:
+        with (sys.stdin if args.batch == "-" else open(args.batch, "r")) as lines:
+            BatchSearch(s).write(lines, sys.stdout)
+        s.metrics.report("batch")
+    elif args.serve or args.unix_socket:
+        serve(s, args.serve, args.unix_socket, args.processes)
+    else:
+        s.prompt()
@@ -0,0 +1,241 @@
+from query import Query, MAX_FUZZINESS
+from prefork import prefork
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from http import HTTPStatus
+import os
+import sys
+import json
+import stat
+import socket
+import asyncio
+import traceback
+
+DEFAULT_LIMIT = 100
+MAX_HEADERS = 100
+# bodies are not used by any route, so only small ones are read past
+MAX_BODY = 64 * 1024
+
+
+class BadRequest(ValueError):
+    status = HTTPStatus.BAD_REQUEST
+
+
+class TooLarge(BadRequest):
+    status = HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+async def read_request(reader):
+    # returns the method, target and headers of the next request on the
+    # connection, or None once the client has closed it
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise BadRequest("Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) == MAX_HEADERS:
+            raise BadRequest("Too many headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    # bodies are not used by any route, but are read so the next request parses
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise BadRequest("Content-Length must be an integer")
+    if length < 0:
+        raise BadRequest("Content-Length must not be negative")
+    if length > MAX_BODY:
+        raise TooLarge(f"Bodies are limited to {MAX_BODY} bytes")
+    if length:
+        await reader.readexactly(length)
+    return method, target, headers
+
+
+def format_response(status, body, keep_alive=True):
+    status = HTTPStatus(status)
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def error_body(message):
+    return json.dumps({"error": message}).encode()
+
+
+def single(params, name, default=None):
+    values = params.get(name)
+    return values[0] if values else default
+
+
+def integer(params, name, default, maximum=None):
+    value = single(params, name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if number < 0:
+        raise BadRequest(f"{name} must not be negative")
+    if maximum is not None and number > maximum:
+        raise BadRequest(f"{name} must be at most {maximum}")
+    return number
+
+
+class SearchServer:
+    """
+    Serves freeform, field and group searches of one built Search over
+    HTTP, on a TCP port or a Unix socket. The event loop only reads
+    requests and writes responses, so a slow client holds up nobody but
+    itself. Searching and rendering run on a single worker thread, as
+    Search and its cache are not safe to share between threads.
+
+      GET /search?query=...&field=...&group=...&fuzziness=N&limit=N&offset=N
+      GET /health
+      GET /stats
+    """
+
+    def __init__(self, search, limit=DEFAULT_LIMIT):
+        self.search = search
+        self.limit = limit
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        self.routes = {"/search": self.search_body, "/health": self.health_body, "/stats": self.stats_body}
+
+    def search_body(self, params):
+        string = single(params, "query")
+        if string is None:
+            raise BadRequest("query is required")
+        query = Query(string, single(params, "field"), single(params, "group"), integer(params, "fuzziness", 0, MAX_FUZZINESS))
+        if query.group and query.group not in self.search.groups:
+            raise BadRequest(f"group must be one of {', '.join(self.search.groups)}")
+        limit = integer(params, "limit", self.limit)
+        offset = integer(params, "offset", 0)
+        results = self.search.field_and_group_search(query) or []
+        page = results[offset : offset + limit]
+        body = {
+            "query": query.string,
+            "field": query.field,
+            "group": query.group,
+            "count": len(results),
+            "results": [
+                {"group": entry.group, "field": entry.field, "record": self.search.result_view(entry)} for entry in page
+            ],
+        }
+        return json.dumps(body, ensure_ascii=False).encode()
+
+    def health_body(self, params):
+        records = {group: len(records) for group, records in self.search.groups.items()}
+        return json.dumps({"status": "ok", "records": records}).encode()
+
+    def stats_body(self, params):
+        return json.dumps({"cache": self.search.cache.stats()}).encode()
+
+    async def respond(self, method, target):
+        url = urlsplit(target)
+        route = self.routes.get(url.path)
+        if route is None:
+            return HTTPStatus.NOT_FOUND, error_body(f"No route {url.path}")
+        if method != "GET":
+            return HTTPStatus.METHOD_NOT_ALLOWED, error_body("Only GET is supported")
+        params = parse_qs(url.query)
+        loop = asyncio.get_running_loop()
+        try:
+            return HTTPStatus.OK, await loop.run_in_executor(self.executor, route, params)
+        except BadRequest as err:
+            return err.status, error_body(str(err))
+        except Exception:
+            # a failing route answers with an error rather than dropping
+            # the connection, and is logged for the operator
+            traceback.print_exc(file=sys.stderr)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, error_body("Internal server error")
+
+    async def handle(self, reader, writer):
+        # serves the requests of one connection, kept alive unless the client
+        # asks for it to be closed
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except BadRequest as err:
+                    writer.write(format_response(err.status, error_body(str(err)), keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers = request
+                status, body = await self.respond(method, target)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(format_response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=None, port=None, path=None, sock=None):
+        if path or (sock is not None and sock.family == socket.AF_UNIX):
+            return await asyncio.start_unix_server(self.handle, path, sock=sock)
+        return await asyncio.start_server(self.handle, host, port, sock=sock)
+
+    async def serve(self, sock):
+        async with await self.start(sock=sock) as server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+def parse_address(address):
+    # "8080", ":8080" and "127.0.0.1:8080" all name a TCP address
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def listen(address=None, path=None):
+    # the listening socket is made before any worker is forked, so that
+    # every worker accepts connections from the same one
+    if path:
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+        sock.listen(socket.SOMAXCONN)
+        return sock
+    return socket.create_server(parse_address(address), backlog=socket.SOMAXCONN)
+
+
+def run_server(search, sock):
+    server = SearchServer(search)
+    try:
+        asyncio.run(server.serve(sock))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+def serve(search, address=None, path=None, processes=1):
+    # with several processes the index is frozen into a memory mapped
+    # snapshot first, so that the workers share one copy of it
+    sock = listen(address, path)
+    where = path or "{}:{}".format(*sock.getsockname()[:2])
+    print(f"Serving on {where} with {processes} process{'es' if processes > 1 else ''}", file=sys.stderr, flush=True)
+    if processes > 1:
+        search = search.freeze()
+        prefork(processes, lambda worker: run_server(search, sock))
+    else:
+        run_server(search, sock)
+    sock.close()
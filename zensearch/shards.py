@@ -0,0 +1,341 @@
+from search import Search, FACET_LIMIT
+from relations import RELATIONS, normalise
+from range_index import parse_value
+from metrics import NULL_METRICS
+from cache import QueryCache
+from trie import next_row
+from collections.abc import Iterator
+from multiprocessing import Pipe, Process
+from itertools import chain, islice
+from heapq import merge
+import zlib
+
+GROUPS = ("users", "tickets", "orgs")
+# results fetched from a shard at a time when paging through all of them
+FETCH_SIZE = 1000
+
+
+def shard_of(item_id, shards):
+    # a stable hash, as hash() of a string differs between processes
+    return zlib.crc32(normalise(item_id).encode()) % shards
+
+
+def edit_distance(string, other):
+    row = list(range(len(string) + 1))
+    for char in other:
+        row = next_row(row, string, char)
+    return row[-1]
+
+
+def group_order(entry):
+    return GROUPS.index(entry.group)
+
+
+class ShardSearch(Search):
+    """
+    The Search of one shard, holding only the records whose _id hashes to it.
+    """
+
+    def __init__(self, shard, shards, *sources, **options):
+        self.shard = shard
+        self.shards = shards
+        super().__init__(*sources, **options)
+
+    def read_file(self, filepath):
+        for record in super().read_file(filepath):
+            if shard_of(record.get("_id"), self.shards) == self.shard:
+                yield record
+
+    def describe(self):
+        return {
+            "counts": {group: len(self.groups[group]) for group in GROUPS},
+            "fields": {group: self.get_group_fields(group) for group in GROUPS},
+        }
+
+    def group_slice(self, group, start, stop):
+        return self.groups[group][start:stop]
+
+
+def run_shard(connection, sources, shard, shards, stream):
+    # loads and indexes a shard, then answers the method calls of the
+    # coordinator until it sends None or goes away
+    try:
+        search = ShardSearch(shard, shards, *sources, stream=stream, cache_size=0)
+        connection.send((True, search.describe()))
+    except Exception as err:
+        connection.send((False, err))
+        return
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        method, args, kwargs = request
+        try:
+            result = getattr(search, method)(*args, **kwargs)
+            if isinstance(result, Iterator):
+                result = list(result)
+            connection.send((True, result))
+        except Exception as err:
+            connection.send((False, err))
+
+
+class ShardedRecords:
+    """
+    Read only sequence of the records of one group across the shards,
+    fetched from them a page at a time.
+    """
+
+    def __init__(self, search, group):
+        self.search = search
+        self.group = group
+
+    def __len__(self):
+        return sum(counts[self.group] for counts in self.search.shard_counts)
+
+    def __iter__(self):
+        for shard, counts in enumerate(self.search.shard_counts):
+            for start in range(0, counts[self.group], FETCH_SIZE):
+                yield from self.search.call(shard, "group_slice", self.group, start, start + FETCH_SIZE)
+
+
+class ShardedSearch(Search):
+    """
+    Coordinator of a search partitioned into shards by the hash of each
+    record's _id. Every shard loads, indexes and searches its own records
+    in a process of its own. Queries are sent to all of the shards at once
+    and their results merged, and related records are looked up on every
+    shard, so links between records of different shards resolve. Lookups
+    by _id go to the one shard holding the record.
+    """
+
+    def __init__(
+        self,
+        users_filepath,
+        tickets_filepath,
+        orgs_filepath,
+        shards=2,
+        stream=False,
+        cache_size=1024,
+        cache_ttl=None,
+        output_format="text",
+        output=None,
+        metrics=None,
+    ):
+        self.sources = [users_filepath, tickets_filepath, orgs_filepath]
+        self.stream = stream
+        self.metrics = metrics or NULL_METRICS
+        self.connections = []
+        self.processes = []
+        for shard in range(shards):
+            connection, shard_connection = Pipe()
+            process = Process(target=run_shard, args=(shard_connection, self.sources, shard, shards, stream), daemon=True)
+            process.start()
+            shard_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+        with self.metrics.timer("load"):
+            self.set_groups(self.receive_all())
+        self.groups = {group: ShardedRecords(self, group) for group in GROUPS}
+        self.users, self.tickets, self.orgs = (self.groups[group] for group in GROUPS)
+        self.cache = QueryCache(cache_size, cache_ttl)
+        self.set_output(output_format, output)
+
+    def set_groups(self, descriptions):
+        # the record counts of each shard and the fields of each group
+        # across the shards
+        self.shard_counts = [description["counts"] for description in descriptions]
+        fields = {group: {} for group in GROUPS}
+        for description in descriptions:
+            for group in GROUPS:
+                fields[group].update(description["fields"][group])
+        self.user_fields, self.ticket_fields, self.org_fields = (fields[group] for group in GROUPS)
+
+    def set_metrics(self, metrics):
+        self.metrics = metrics
+
+    def receive(self, shard):
+        ok, result = self.connections[shard].recv()
+        if not ok:
+            raise result
+        return result
+
+    def receive_all(self):
+        # every reply is read before an error is raised, so no shard is
+        # left with an unread reply
+        replies = [connection.recv() for connection in self.connections]
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return [result for _, result in replies]
+
+    def call(self, shard, method, *args, **kwargs):
+        with self.metrics.timer(f"shards.{method}"):
+            self.connections[shard].send((method, args, kwargs))
+            return self.receive(shard)
+
+    def scatter(self, method, *args, **kwargs):
+        # sends the call to every shard before waiting for any, so the
+        # shards work on it at the same time
+        with self.metrics.timer(f"shards.{method}"):
+            for connection in self.connections:
+                connection.send((method, args, kwargs))
+            return self.receive_all()
+
+    def iter_shard(self, shard, method, *args, **kwargs):
+        # the results of a lazy search of one shard, fetched a page at a time
+        offset = 0
+        while True:
+            page = self.call(shard, method, *args, limit=FETCH_SIZE, offset=offset, **kwargs)
+            yield from page
+            if len(page) < FETCH_SIZE:
+                return
+            offset += FETCH_SIZE
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(None)
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+    def build_search(self, workers=None):
+        with self.metrics.timer("build"):
+            self.scatter("build_search", workers)
+        self.set_groups(self.scatter("describe"))
+        self.cache.clear()
+
+    def save_snapshot(self, path):
+        raise ValueError("A sharded search cannot be saved as a snapshot")
+
+    def freeze(self, path=None):
+        raise ValueError("A sharded search cannot be frozen")
+
+    def add_item(self, item_data, group_name):
+        self.cache.clear()
+        shard = shard_of(item_data.get("_id"), len(self.connections))
+        self.call(shard, "add_item", item_data, group_name)
+        self.shard_counts[shard][group_name] += 1
+        self.add_fields(item_data, group_name)
+
+    def find_item(self, group_name, item_id):
+        return self.call(shard_of(item_id, len(self.connections)), "find_item", group_name, item_id)
+
+    def update_item(self, group_name, item_id, item_data):
+        # the record moves to another shard when its _id changes
+        self.cache.clear()
+        shards = len(self.connections)
+        shard = shard_of(item_id, shards)
+        if shard_of(item_data.get("_id"), shards) != shard:
+            self.delete_item(group_name, item_id)
+            self.add_item(item_data, group_name)
+            return item_data
+        self.add_fields(item_data, group_name)
+        return self.call(shard, "update_item", group_name, item_id, item_data)
+
+    def delete_item(self, group_name, item_id):
+        self.cache.clear()
+        shard = shard_of(item_id, len(self.connections))
+        record = self.call(shard, "delete_item", group_name, item_id)
+        self.shard_counts[shard][group_name] -= 1
+        return record
+
+    def retrieve(self, query):
+        results = [entry for entries in self.scatter("retrieve", query) if entries for entry in entries]
+        if query.fuzziness:
+            results.sort(key=lambda entry: edit_distance(query.string, entry.string))
+        else:
+            results.sort(key=group_order)
+        return results or False
+
+    def scoped_search(self, query):
+        if query.field == "_id" and not query.fuzziness:
+            # only the shard the _id hashes to can hold it
+            return self.call(shard_of(query.string, len(self.connections)), "scoped_search", query)
+        results = [entry for entries in self.scatter("scoped_search", query) if entries for entry in entries]
+        if not query.fuzziness:
+            results.sort(key=group_order)
+        return results or None
+
+    def prefix_search(self, query, limit=None, offset=0):
+        # the hits of each shard in turn. A page is fetched from every shard
+        # at once, otherwise shards are paged through as the hits are consumed
+        if limit is not None:
+            pages = self.scatter("prefix_search", query, limit=offset + limit)
+            return islice(chain.from_iterable(pages), offset, offset + limit)
+        shards = range(len(self.connections))
+        hits = chain.from_iterable(self.iter_shard(shard, "prefix_search", query) for shard in shards)
+        return islice(hits, offset, None)
+
+    def substring_search(self, query, limit=None, offset=0):
+        # as prefix_search, with each shard searching its own suffix array
+        if limit is not None:
+            pages = self.scatter("substring_search", query, limit=offset + limit)
+            return islice(chain.from_iterable(pages), offset, offset + limit)
+        shards = range(len(self.connections))
+        hits = chain.from_iterable(self.iter_shard(shard, "substring_search", query) for shard in shards)
+        return islice(hits, offset, None)
+
+    def structured_search(self, clause, group, limit=None, offset=0):
+        # each shard plans the filter against its own statistics
+        clause = self.parse_clause(clause)
+        if limit is not None:
+            pages = self.scatter("structured_search", clause, group, limit=offset + limit)
+            return islice(chain.from_iterable(pages), offset, offset + limit)
+        shards = range(len(self.connections))
+        hits = chain.from_iterable(self.iter_shard(shard, "structured_search", clause, group) for shard in shards)
+        return islice(hits, offset, None)
+
+    def explain(self, clause, group):
+        plans = self.scatter("explain", self.parse_clause(clause), group)
+        return "".join(f"shard {shard}\n{plan}" for shard, plan in enumerate(plans))
+
+    def text_search(self, text, operator="and", field=None, group=None):
+        results = self.scatter("text_search", text, operator, field, group)
+        results = sorted((entry for entries in results if entries for entry in entries), key=group_order)
+        return results or None
+
+    def range_search(self, field, group=None, low=None, high=None, match=None, limit=None, offset=0):
+        # the hits of every shard are in value order, and merged on it
+        def value(entry):
+            return parse_value(entry.data[field])[1]
+
+        if limit is not None:
+            pages = self.scatter("range_search", field, group, low, high, match, limit=offset + limit)
+            return islice(merge(*pages, key=value), offset, offset + limit)
+        shards = range(len(self.connections))
+        hits = merge(*(self.iter_shard(shard, "range_search", field, group, low, high, match) for shard in shards), key=value)
+        return islice(hits, offset, None)
+
+    def facets(self, group, query=None, where=None, fields=None, limit=FACET_LIMIT):
+        # the counts of every value on each shard, added up before the most
+        # common are picked
+        totals = {}
+        for shard_facets in self.scatter("facets", group, query, where, fields, limit=None):
+            for field, counts in shard_facets.items():
+                field_totals = totals.setdefault(field, {})
+                for value, count in counts:
+                    field_totals[value] = field_totals.get(value, 0) + count
+        facets = {}
+        for field, field_totals in totals.items():
+            counts = sorted(field_totals.items(), key=lambda pair: (-pair[1], pair[0]))
+            facets[field] = counts[:limit] if limit is not None else counts
+        return facets
+
+    def range_fields(self, group):
+        fields = {}
+        for shard_fields in self.scatter("range_fields", group):
+            fields.update(dict.fromkeys(shard_fields))
+        return list(fields)
+
+    def resolve_related(self, record, group):
+        self.metrics.count("related.lookups", len(RELATIONS[group]))
+        related = {key: [] for key in RELATIONS[group]}
+        for shard_related in self.scatter("resolve_related", record, group):
+            for key, records in shard_related.items():
+                related[key].extend(records)
+        return related
@@ -0,0 +1,329 @@
+from records import PostingTable, pack, unpack
+from relations import normalise, related_records
+from trie import next_row
+from array import array
+from collections import OrderedDict
+import os
+import json
+import mmap
+import struct
+import hashlib
+
+MAGIC = b"ZSNAPSHT"
+VERSION = 1
+# magic, version, source fingerprint, metadata offset, metadata length
+# sections are written in native byte order as snapshots are a local cache
+HEADER = struct.Struct("=8sI32sQQ")
+GROUPS = ("users", "tickets", "orgs")
+# decoded records kept by each process reading a snapshot
+RECORD_CACHE_SIZE = 1024
+
+
+def fingerprint(filepaths):
+    # identifies the source files by path, size and modification time so that
+    # a snapshot is discarded as soon as any of them changes
+    digest = hashlib.sha256()
+    for filepath in filepaths:
+        stat = os.stat(filepath)
+        digest.update(f"{os.path.abspath(filepath)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.digest()
+
+
+def item_values(value):
+    return value if type(value) is list else [value]
+
+
+def write_snapshot(path, groups, group_fields, sources):
+    """
+    Writes the records of each group and the postings of every indexed string
+    to path. Sections are 8 byte aligned arrays so they can be read in place
+    from a memory map.
+      records: group id (B) and byte offset (Q) of each JSON encoded record
+      keys: byte offsets (Q) into the UTF-8 blob of sorted index strings
+      postings: offsets (Q) per key into the doc id (I) and field id (H) arrays
+    """
+    fields = {}
+    record_groups = bytearray()
+    record_offsets = array("Q", [0])
+    record_blob = bytearray()
+    postings = {}
+
+    doc = 0
+    for group_id, group in enumerate(GROUPS):
+        for record in groups[group]:
+            record_blob += json.dumps(record, ensure_ascii=False).encode()
+            record_offsets.append(len(record_blob))
+            record_groups.append(group_id)
+            for field, value in record.items():
+                field_id = fields.setdefault(field, len(fields))
+                for item in item_values(value):
+                    key = normalise(item)
+                    postings.setdefault(key, []).append((doc, field_id))
+            doc += 1
+
+    keys = sorted(postings, key=lambda key: key.encode())
+    key_offsets = array("Q", [0])
+    key_blob = bytearray()
+    posting_offsets = array("Q", [0])
+    posting_docs = array("I")
+    posting_fields = array("H")
+    for key in keys:
+        key_blob += key.encode()
+        key_offsets.append(len(key_blob))
+        for posting_doc, field_id in postings[key]:
+            posting_docs.append(posting_doc)
+            posting_fields.append(field_id)
+        posting_offsets.append(len(posting_docs))
+
+    sections = [
+        ("record_groups", bytes(record_groups)),
+        ("record_offsets", record_offsets.tobytes()),
+        ("record_blob", bytes(record_blob)),
+        ("key_offsets", key_offsets.tobytes()),
+        ("key_blob", bytes(key_blob)),
+        ("posting_offsets", posting_offsets.tobytes()),
+        ("posting_docs", posting_docs.tobytes()),
+        ("posting_fields", posting_fields.tobytes()),
+    ]
+    meta = {
+        "groups": list(GROUPS),
+        "group_counts": [len(groups[group]) for group in GROUPS],
+        "group_fields": {group: list(group_fields[group]) for group in GROUPS},
+        "fields": list(fields),
+        "records": doc,
+        "keys": len(keys),
+        "sections": {},
+    }
+
+    body = bytearray()
+    offset = HEADER.size
+    for name, data in sections:
+        padding = -offset % 8
+        body += bytes(padding)
+        offset += padding
+        meta["sections"][name] = [offset, len(data)]
+        body += data
+        offset += len(data)
+    meta_blob = json.dumps(meta).encode()
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, fingerprint(sources), offset, len(meta_blob)))
+        f.write(body)
+        f.write(meta_blob)
+    os.replace(temporary_path, path)
+
+
+class SnapshotRecords:
+    """
+    Read only sequence of the records of one group in a Snapshot.
+    """
+
+    def __init__(self, snapshot, start, count):
+        self.snapshot = snapshot
+        self.start = start
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self.snapshot.record(self.start + index)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.snapshot.record(self.start + index)
+
+
+class Snapshot(PostingTable):
+    """
+    Memory mapped view of a snapshot written by write_snapshot.
+    Lookups binary search the sorted keys in place and only decode
+    the records of the postings they return. Serves as the record
+    table, trie, field index and relation index of a Search.
+    """
+
+    def __init__(self, path, cache_size=RECORD_CACHE_SIZE):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, self.fingerprint, meta_offset, meta_length = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"File: {path}, is not a snapshot!")
+        self.meta = json.loads(self.map[meta_offset : meta_offset + meta_length])
+        self.groups = self.meta["groups"]
+        self.fields = self.meta["fields"]
+        self.field_ids = {field: field_id for field_id, field in enumerate(self.fields)}
+        self.group_starts = {}
+        start = 0
+        for group, count in zip(self.groups, self.meta["group_counts"]):
+            self.group_starts[group] = (start, count)
+            start += count
+
+        view = memoryview(self.map)
+        self.record_groups = self.section(view, "record_groups", "B")
+        self.record_offsets = self.section(view, "record_offsets", "Q")
+        self.record_blob = self.section(view, "record_blob", "B")
+        self.key_offsets = self.section(view, "key_offsets", "Q")
+        self.key_blob = self.section(view, "key_blob", "B")
+        self.posting_offsets = self.section(view, "posting_offsets", "Q")
+        self.posting_docs = self.section(view, "posting_docs", "I")
+        self.posting_fields = self.section(view, "posting_fields", "H")
+        self.records = OrderedDict()
+        self.cache_size = cache_size
+
+    @classmethod
+    def open(cls, path, sources):
+        # returns None when the snapshot is missing, from another version
+        # or was built from different source files
+        try:
+            snapshot = cls(path)
+        except (FileNotFoundError, ValueError, struct.error):
+            return None
+        if snapshot.version != VERSION or snapshot.fingerprint != fingerprint(sources):
+            snapshot.close()
+            return None
+        return snapshot
+
+    def section(self, view, name, format):
+        offset, length = self.meta["sections"][name]
+        return view[offset : offset + length].cast(format)
+
+    def close(self):
+        for name in list(vars(self)):
+            if isinstance(getattr(self, name), memoryview):
+                getattr(self, name).release()
+        self.map.close()
+
+    def group_records(self, group):
+        start, count = self.group_starts[group]
+        return SnapshotRecords(self, start, count)
+
+    def docs(self, group):
+        # the records of a group are stored together, in doc order
+        start, count = self.group_starts.get(group, (0, 0))
+        return range(start, start + count)
+
+    def group_fields(self, group):
+        return dict.fromkeys(self.meta["group_fields"][group])
+
+    def record(self, doc):
+        # recently decoded records are cached so the Entries of a record share
+        # its dict. The cache is bounded, as it is private to each process
+        # while the snapshot itself is shared
+        record = self.records.get(doc)
+        if record is None:
+            start, end = self.record_offsets[doc], self.record_offsets[doc + 1]
+            record = json.loads(bytes(self.record_blob[start:end]))
+            self.records[doc] = record
+            if len(self.records) > self.cache_size:
+                self.records.popitem(last=False)
+        else:
+            self.records.move_to_end(doc)
+        return record
+
+    def group(self, doc):
+        return self.groups[self.record_groups[doc]]
+
+    def posting(self, doc, field):
+        return pack(doc, self.field_ids[field])
+
+    def iter_docs(self):
+        for doc in range(self.meta["records"]):
+            yield doc, self.record(doc), self.group(doc)
+
+    def key(self, index):
+        return bytes(self.key_blob[self.key_offsets[index] : self.key_offsets[index + 1]])
+
+    def lower_bound(self, target):
+        # index of the first key not less than the encoded target
+        low, high = 0, self.meta["keys"]
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find_key(self, string):
+        target = string.encode()
+        index = self.lower_bound(target)
+        if index < self.meta["keys"] and self.key(index) == target:
+            return index
+        return None
+
+    def iter_terminals(self, prefix):
+        # keys are sorted, so the strings starting with prefix are adjacent
+        target = prefix.encode()
+        for index in range(self.lower_bound(target), self.meta["keys"]):
+            string = self.key(index)
+            if not string.startswith(target):
+                return
+            yield string.decode(), list(self.key_postings(index))
+
+    def fuzzy_matches(self, string, max_distance):
+        # walks the sorted keys as if they were a trie: the Levenshtein rows of the
+        # prefix shared with the previous key are reused, and the keys under a
+        # prefix that is already too far from the string are skipped over
+        matches = []
+        rows = [list(range(len(string) + 1))]
+        previous = ""
+        index = 0
+        while index < self.meta["keys"]:
+            key = self.key(index).decode()
+            common = 0
+            limit = min(len(previous), len(key), len(rows) - 1)
+            while common < limit and previous[common] == key[common]:
+                common += 1
+            del rows[common + 1 :]
+            previous = key
+
+            for char in key[common:]:
+                rows.append(next_row(rows[-1], string, char))
+                if min(rows[-1]) > max_distance:
+                    prefix = key[: len(rows) - 1].encode()
+                    index = self.lower_bound(prefix[:-1] + bytes([prefix[-1] + 1]))
+                    break
+            else:
+                if rows[-1][-1] <= max_distance:
+                    matches.append((rows[-1][-1], key, index))
+                index += 1
+
+        matches.sort(key=lambda match: match[0])
+        return [(distance, key, list(self.key_postings(index))) for distance, key, index in matches]
+
+    def key_postings(self, key):
+        for index in range(self.posting_offsets[key], self.posting_offsets[key + 1]):
+            yield pack(self.posting_docs[index], self.posting_fields[index])
+
+    def postings(self, string, field=None, group=None):
+        key = self.find_key(string)
+        if key is None:
+            return
+        field_id = self.field_ids.get(field)
+        if field is not None and field_id is None:
+            return
+        if group is not None:
+            group_start, group_count = self.group_starts[group]
+        for index in range(self.posting_offsets[key], self.posting_offsets[key + 1]):
+            doc = self.posting_docs[index]
+            if field is not None and self.posting_fields[index] != field_id:
+                continue
+            if group is not None and not group_start <= doc < group_start + group_count:
+                continue
+            yield pack(doc, self.posting_fields[index])
+
+    def retrieve(self, string, field=None, group=None):
+        # matches Trie.retrieve when unscoped and FieldIndex.retrieve otherwise
+        results = list(self.postings(string, field, group))
+        if field is None and group is None and not results:
+            return False
+        return results
+
+    def lookup(self, group, field, value):
+        return [self.record(unpack(posting)[0]) for posting in self.postings(normalise(value), field, group)]
+
+    def related(self, record, group):
+        return related_records(self.lookup, record, group)
@@ -0,0 +1,129 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+SEPARATOR = "\x00"
+# strings added or removed since the suffix array was sorted, past which it
+# is rebuilt: at least DELTA_MINIMUM, or one in DELTA_FRACTION of its strings
+DELTA_MINIMUM = 1024
+DELTA_FRACTION = 32
+
+
+def dense_ranks(suffixes, keys):
+    # ranks the suffixes 0, 1, ... in sorted order, equal keys sharing a rank
+    ranks = [0] * len(suffixes)
+    rank = 0
+    previous = keys[suffixes[0]]
+    for suffix in suffixes:
+        key = keys[suffix]
+        if key != previous:
+            rank += 1
+            previous = key
+        ranks[suffix] = rank
+    return ranks
+
+
+def suffix_array(ranks):
+    """
+    Sorts the suffixes of a text, given as the initial rank of each of its
+    characters, by prefix doubling: each round sorts on the ranks of the
+    first k characters and of the k that follow, doubling k until every
+    suffix has a rank of its own.
+    """
+    size = len(ranks)
+    if not size:
+        return array("I")
+    suffixes = sorted(range(size), key=ranks.__getitem__)
+    ranks = dense_ranks(suffixes, ranks)
+    span = 1
+    while ranks[suffixes[-1]] < size - 1:
+        following = ranks[span:] + [-1] * min(span, size)
+        keys = [rank * (size + 1) + after + 1 for rank, after in zip(ranks, following)]
+        suffixes.sort(key=keys.__getitem__)
+        ranks = dense_ranks(suffixes, keys)
+        span *= 2
+    return array("I", suffixes)
+
+
+class SubstringIndex:
+    """
+    Suffix array over the distinct indexed strings, joined by separators.
+    Every separator ranks below all characters and below the separators
+    after it, so suffixes never compare equal past the end of their string
+    and sorting takes as many rounds as the longest string needs. Takes the
+    text, an offset per string and four bytes per character, where a suffix
+    trie would hold every suffix of every string.
+
+    Strings added afterwards are kept in a small delta that is scanned
+    directly, and removed strings are left in the array for the caller to
+    skip, until there are enough of either for a rebuild to be worth it.
+    """
+
+    def __init__(self, strings):
+        self.strings = list(strings)
+        self.known = set(self.strings)
+        # strings added since the build, in the order added
+        self.added = {}
+        self.removed = 0
+        self.starts = array("Q")
+        ranks = []
+        offset = 0
+        count = len(self.strings)
+        for position, string in enumerate(self.strings):
+            self.starts.append(offset)
+            ranks.extend(ord(char) + count for char in string)
+            ranks.append(position)
+            offset += len(string) + 1
+        self.starts.append(offset)
+        self.text = SEPARATOR.join(self.strings) + SEPARATOR
+        self.suffixes = suffix_array(ranks)
+
+    def __len__(self):
+        return len(self.text)
+
+    def add(self, string):
+        if string not in self.known:
+            self.known.add(string)
+            self.added[string] = None
+
+    def discard(self, string):
+        # a string in the array stays there, and is still yielded by search
+        if string in self.added:
+            del self.added[string]
+            self.known.discard(string)
+        elif string in self.known:
+            self.removed += 1
+
+    def stale(self):
+        # whether the delta has grown enough for the array to be rebuilt
+        return len(self.added) + self.removed > max(DELTA_MINIMUM, len(self.strings) // DELTA_FRACTION)
+
+    def string_at(self, offset):
+        # index of the string holding the character at offset
+        return bisect_right(self.starts, offset) - 1
+
+    def bounds(self, pattern):
+        # the range of suffixes that start with pattern
+        text, length = self.text, len(pattern)
+
+        def head(start):
+            return text[start : start + length]
+
+        first = bisect_left(self.suffixes, pattern, key=head)
+        return first, bisect_right(self.suffixes, pattern, lo=first, key=head)
+
+    def search(self, pattern):
+        # yields each string containing pattern once, lazily, in the order
+        # of the text following the match, then the added strings that
+        # contain it
+        if SEPARATOR in pattern:
+            return
+        start, end = self.bounds(pattern)
+        seen = set()
+        for index in range(start, end):
+            position = self.string_at(self.suffixes[index])
+            if position not in seen:
+                seen.add(position)
+                yield self.strings[position]
+        for string in list(self.added):
+            if pattern in string:
+                yield string
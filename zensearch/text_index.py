@@ -0,0 +1,113 @@
+from array import array
+from bisect import bisect_left, insort
+from heapq import merge
+import re
+
+TOKEN = re.compile(r"\w+")
+TEXT_FIELDS = ("subject", "description", "signature")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for if in into is it no not of on or such "
+    "that the their then there these they this to was will with".split()
+)
+
+
+class Analyzer:
+    """
+    Splits free text into lowercased word tokens,
+    dropping any stopwords.
+    """
+
+    def __init__(self, stopwords=frozenset()):
+        self.stopwords = stopwords
+
+    def analyze(self, text):
+        return [token for token in TOKEN.findall(str(text).lower()) if token not in self.stopwords]
+
+
+def intersect(small, large):
+    # gallops through the larger posting list for each doc of the smaller one
+    result = array(small.typecode)
+    low = 0
+    for doc in small:
+        bound = 1
+        while low + bound < len(large) and large[low + bound] < doc:
+            bound *= 2
+        low = bisect_left(large, doc, low, min(low + bound + 1, len(large)))
+        if low == len(large):
+            break
+        if large[low] == doc:
+            result.append(doc)
+    return result
+
+
+def union(postings):
+    result = array(postings[0].typecode)
+    for doc in merge(*postings):
+        if not result or result[-1] != doc:
+            result.append(doc)
+    return result
+
+
+class InvertedIndex:
+    """
+    Inverted index over the free text fields of records. Every field value
+    is a document, identified by the packed posting of its record and field,
+    and each token maps to the sorted array of the documents containing it.
+    """
+
+    def __init__(self, analyzer=None, fields=TEXT_FIELDS):
+        self.analyzer = analyzer or Analyzer()
+        self.fields = fields
+        self.postings = {}
+
+    def add_record(self, table, doc, record):
+        for field in self.fields:
+            if field in record:
+                self.add(table.posting(doc, field), record[field])
+
+    def add(self, doc, text):
+        for token in self.analyzer.analyze(text):
+            postings = self.postings.get(token)
+            if postings is None:
+                self.postings[token] = array("Q", [doc])
+            elif postings[-1] < doc:
+                postings.append(doc)
+            elif postings[-1] != doc:
+                # a record updated in place keeps its doc id
+                index = bisect_left(postings, doc)
+                if index == len(postings) or postings[index] != doc:
+                    insort(postings, doc)
+
+    def remove_record(self, table, doc, record):
+        for field in self.fields:
+            if field in record:
+                self.remove(table.posting(doc, field), record[field])
+
+    def remove(self, doc, text):
+        # drops the document from the postings of its tokens
+        for token in set(self.analyzer.analyze(text)):
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            index = bisect_left(postings, doc)
+            if index < len(postings) and postings[index] == doc:
+                del postings[index]
+            if not postings:
+                del self.postings[token]
+
+    def search(self, text, operator="and"):
+        # returns the documents containing all of the terms of the text,
+        # or any of them when operator is "or"
+        terms = self.analyzer.analyze(text)
+        if not terms:
+            return []
+        postings = [self.postings.get(term, array("Q")) for term in set(terms)]
+        if operator == "or":
+            return union(postings)
+        postings.sort(key=len)
+        docs = postings[0]
+        for other in postings[1:]:
+            if not docs:
+                break
+            docs = intersect(docs, other)
+        return docs
@@ -1,68 +1,290 @@
 import jsons
 from entry import Entry
+from records import discard
+from metrics import NULL_METRICS
+
+
+def next_row(row, string, char):
+    # next row of the Levenshtein table between string and a prefix extended by char
+    # (hot loop, so min() is unrolled into comparisons)
+    left = row[0] + 1
+    new_row = [left]
+    for column, string_char in enumerate(string):
+        cost = row[column] + (string_char != char)
+        if left + 1 < cost:
+            cost = left + 1
+        if row[column + 1] + 1 < cost:
+            cost = row[column + 1] + 1
+        new_row.append(cost)
+        left = cost
+    return new_row
 
 
 class TerminalNode:
     """
-    TerminalNodes exist as the leaf nodes of the trie, 
+    TerminalNodes exist as the leaf nodes of the trie,
     that is - at the end of words key'd by the TERMINAL.
     These allow objects to be stored at the end of search terms.
     """
 
-    def __init__(self):
-        self.storage = []
+    __slots__ = ("storage",)
+
+    def __init__(self, storage=None):
+        self.storage = [] if storage is None else storage
 
     def add(self, item):
         self.storage.append(item)
 
 
+class RadixNode:
+    """
+    Node of the path compressed trie. The label holds the characters on
+    the edge leading into the node, so a chain of single child nodes is
+    stored as one node. Children are keyed by the first character of
+    their label.
+    """
+
+    __slots__ = ("label", "children", "terminal")
+
+    def __init__(self, label):
+        self.label = label
+        self.children = None
+        self.terminal = None
+
+    def get_child(self, char):
+        if self.children is None:
+            return None
+        return self.children.get(char)
+
+    def set_child(self, child):
+        if self.children is None:
+            self.children = {}
+        self.children[child.label[0]] = child
+
+
 class Trie:
     """
-    Dictionary based trie which indexes search terms.
+    Radix (path compressed) trie which indexes search terms.
+    storage creates the container of the items of a string, a list
+    by default or an array for integer postings.
     """
 
-    def __init__(self):
-        self.root = {}
+    def __init__(self, storage=list):
+        self.storage = storage
+        self.root = RadixNode("")
+        self.metrics = NULL_METRICS
         self.TERMINAL = "\0"
 
     def add(self, entry):
-        if not entry.string:
-            self.set_terminal_node(self.root, entry)
-            return
+        self.insert(entry.string, entry)
+
+    def insert(self, string, item):
+        self.terminal_node(string).add(item)
 
+    def extend(self, string, items):
+        self.terminal_node(string).storage.extend(items)
+
+    def terminal_node(self, string):
+        # walks to the node of the string, creating and splitting nodes on the way
         current_node = self.root
-        for char in entry.string:
-            current_node = current_node.setdefault(char, {})
+        index = 0
+        while index < len(string):
+            child = current_node.get_child(string[index])
+            if child is None:
+                child = RadixNode(string[index:])
+                current_node.set_child(child)
+                current_node = child
+                break
+
+            label = child.label
+            if not string.startswith(label, index):
+                # the string diverges part way along the edge, split it
+                common = self.common_prefix_length(label, string, index)
+                middle = RadixNode(label[:common])
+                child.label = label[common:]
+                middle.set_child(child)
+                current_node.set_child(middle)
+                child = middle
 
-        if self.TERMINAL in current_node:
-            terminal_node = current_node[self.TERMINAL]
-            terminal_node.add(entry)
-        else:
-            self.set_terminal_node(current_node, entry)
+            current_node = child
+            index += len(child.label)
 
-    def set_terminal_node(self, current_node, item):
-        terminal_node = TerminalNode()
-        terminal_node.add(item)
-        current_node[self.TERMINAL] = terminal_node
+        if current_node.terminal is None:
+            current_node.terminal = TerminalNode(self.storage())
+        return current_node.terminal
+
+    def common_prefix_length(self, label, string, offset):
+        length = 0
+        limit = min(len(label), len(string) - offset)
+        while length < limit and label[length] == string[offset + length]:
+            length += 1
+        return length
+
+    def find_node(self, string):
+        current_node = self.root
+        index = 0
+        length = len(string)
+        while index < length:
+            children = current_node.children
+            if children is None:
+                return None
+            child = children.get(string[index])
+            if child is None or not string.startswith(child.label, index):
+                return None
+            current_node = child
+            index += len(child.label)
+        return current_node
 
     def retrieve(self, string):
-        if not string and self.TERMINAL in self.root:
-            return self.root[self.TERMINAL].storage
+        if self.metrics.enabled:
+            return self.counted_retrieve(string)
+        node = self.find_node(string)
+        if node is None or node.terminal is None:
+            return False
+        return node.terminal.storage
+
+    def counted_retrieve(self, string):
+        # retrieve, counting the nodes visited on the way down
+        path = self.find_path(string, partial=True)
+        self.metrics.count("trie.nodes_visited", len(path))
+        if len(string) != sum(len(node.label) for node in path) or path[-1].terminal is None:
+            return False
+        return path[-1].terminal.storage
+
+    def find_path(self, string, partial=False):
+        # the nodes from the root to the node of the string, or as far
+        # towards it as the trie goes when partial is set
+        path = [self.root]
+        index = 0
+        while index < len(string):
+            child = path[-1].get_child(string[index])
+            if child is None or not string.startswith(child.label, index):
+                return path if partial else None
+            path.append(child)
+            index += len(child.label)
+        return path
+
+    def discard(self, string, item):
+        # removes one occurrence of an orderable item, such as a posting, from
+        # the items of the string without rebuilding them
+        path = self.find_path(string)
+        if path is None or path[-1].terminal is None:
+            return False
+        node = path[-1]
+        if not discard(node.terminal.storage, item):
+            return False
+        if not node.terminal.storage:
+            node.terminal = None
+            self.prune(path)
+        return True
 
+    def prune(self, path):
+        # removes childless nodes without items bottom up, and merges a node
+        # without items that has one child into that child
+        while len(path) > 1 and path[-1].terminal is None:
+            node = path.pop()
+            parent = path[-1]
+            if not node.children:
+                del parent.children[node.label[0]]
+                if not parent.children:
+                    parent.children = None
+            elif len(node.children) == 1:
+                (child,) = node.children.values()
+                child.label = node.label + child.label
+                parent.children[child.label[0]] = child
+                return
+            else:
+                return
+
+    def find_prefix_node(self, prefix):
+        # returns the node whose subtree holds every string starting with prefix
+        # and the string the node ends, the prefix may end part way along its edge
         current_node = self.root
-        for char in string:
-            if char in current_node:
-                current_node = current_node[char]
+        index = 0
+        while index < len(prefix):
+            child = current_node.get_child(prefix[index])
+            if child is None:
+                return None
+            if prefix.startswith(child.label, index):
+                index += len(child.label)
+                current_node = child
+            elif child.label.startswith(prefix[index:]):
+                return child, prefix[:index] + child.label
             else:
-                return False
+                return None
+        return current_node, prefix
 
-        if self.TERMINAL not in current_node:
-            return False
+    def iter_terminals(self, prefix):
+        # lazily yields every string starting with prefix with its storage,
+        # only as much of the subtree is walked as the caller consumes
+        found = self.find_prefix_node(prefix)
+        if found is None:
+            return
+        stack = [found]
+        visited = 0
+        try:
+            while stack:
+                node, string = stack.pop()
+                visited += 1
+                if node.terminal is not None:
+                    yield string, node.terminal.storage
+                if node.children:
+                    stack.extend((child, string + child.label) for child in reversed(list(node.children.values())))
+        finally:
+            # runs when the walk ends or the caller stops consuming it
+            if self.metrics.enabled:
+                self.metrics.count("trie.nodes_visited", visited)
+
+    def iter_prefix(self, prefix):
+        # lazily yields the items stored under every string starting with prefix
+        for _, storage in self.iter_terminals(prefix):
+            yield from storage
+
+    def fuzzy_matches(self, string, max_distance):
+        # returns the (distance, string, storage) of every string within
+        # max_distance edits of string, closest first. The trie is walked once,
+        # computing one Levenshtein row per character and abandoning subtrees
+        # no row in can get back under the limit
+        matches = []
+        first_row = list(range(len(string) + 1))
+        stack = [(self.root, "", first_row)]
+        visited = 0
+        while stack:
+            node, prefix, row = stack.pop()
+            visited += 1
+            for char in node.label:
+                row = next_row(row, string, char)
+                if min(row) > max_distance:
+                    break
+            else:
+                prefix += node.label
+                if node.terminal is not None and row[-1] <= max_distance:
+                    matches.append((row[-1], prefix, node.terminal.storage))
+                for child in (node.children or {}).values():
+                    stack.append((child, prefix, row))
+        matches.sort(key=lambda match: match[0])
+        if self.metrics.enabled:
+            self.metrics.count("trie.nodes_visited", visited)
+        return matches
+
+    def fuzzy_retrieve(self, string, max_distance):
+        # returns the items of every string within max_distance edits of string
+        return [item for _, _, storage in self.fuzzy_matches(string, max_distance) for item in storage]
 
-        return current_node[self.TERMINAL].storage
+    def expand(self, node):
+        # rebuilds the character per level dictionary form of the subtree
+        levels = {}
+        for child in (node.children or {}).values():
+            current_level = levels
+            for char in child.label[:-1]:
+                current_level = current_level.setdefault(char, {})
+            current_level[child.label[-1]] = self.expand(child)
+        if node.terminal is not None:
+            levels[self.TERMINAL] = node.terminal
+        return levels
 
     def export(self):
-        return jsons.dumps(self.root)
+        return jsons.dumps(self.expand(self.root))
 
 
 if __name__ == "__main__":